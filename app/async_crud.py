@@ -0,0 +1,218 @@
+"""Async counterparts of the functions in `crud`.
+
+Every function runs the matching sync CRUD function on the AsyncSession's
+connection through `run_sync`, so both stacks share one implementation and the
+same loader plans. Results that are serialized with relationships are always
+loaded through those plans: lazy loading is not possible once the route has
+left the session's greenlet.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, schemas
+from typing import Optional, Sequence, Tuple
+
+
+async def _reload(db: AsyncSession, getter, *args):
+    # Start from a clean identity map so the loader plan builds the whole graph
+    db.expunge_all()
+    return await getter(db, *args)
+
+
+# Customer CRUD
+async def get_customer(db: AsyncSession, customer_id: int):
+    return await db.run_sync(crud.get_customer, customer_id)
+
+
+async def get_customers(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    return await db.run_sync(crud.get_customers, skip=skip, limit=limit, after_id=after_id)
+
+
+async def create_customer(db: AsyncSession, customer: schemas.CustomerCreate):
+    return await db.run_sync(crud.create_customer, customer)
+
+
+async def update_customer(db: AsyncSession, customer_id: int, customer: schemas.CustomerUpdate):
+    return await db.run_sync(crud.update_customer, customer_id, customer)
+
+
+async def delete_customer(db: AsyncSession, customer_id: int):
+    return await db.run_sync(crud.delete_customer, customer_id)
+
+
+# ShopItemCategory CRUD
+async def get_category(db: AsyncSession, category_id: int):
+    return await db.run_sync(crud.get_category, category_id)
+
+
+async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    return await db.run_sync(crud.get_categories, skip=skip, limit=limit, after_id=after_id)
+
+
+async def get_category_cached(db: AsyncSession, category_id: int):
+    return await db.run_sync(crud.get_category_cached, category_id)
+
+
+async def get_categories_cached(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    return await db.run_sync(crud.get_categories_cached, skip=skip, limit=limit, after_id=after_id)
+
+
+async def get_categories_with_counts(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+):
+    return await db.run_sync(crud.get_categories_with_counts, skip=skip, limit=limit, after_id=after_id)
+
+
+async def get_categories_with_counts_cached(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+):
+    return await db.run_sync(crud.get_categories_with_counts_cached, skip=skip, limit=limit, after_id=after_id)
+
+
+async def create_category(db: AsyncSession, category: schemas.ShopItemCategoryCreate):
+    return await db.run_sync(crud.create_category, category)
+
+
+async def update_category(db: AsyncSession, category_id: int, category: schemas.ShopItemCategoryUpdate):
+    return await db.run_sync(crud.update_category, category_id, category)
+
+
+async def delete_category(db: AsyncSession, category_id: int):
+    return await db.run_sync(crud.delete_category, category_id)
+
+
+# ShopItem CRUD
+async def get_shop_item(db: AsyncSession, item_id: int):
+    return await db.run_sync(crud.get_shop_item, item_id)
+
+
+async def get_shop_items(db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, **filters):
+    return await db.run_sync(crud.get_shop_items, skip=skip, limit=limit, after_id=after_id, **filters)
+
+
+async def get_shop_item_rows(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, **filters
+):
+    return await db.run_sync(crud.get_shop_item_rows, skip=skip, limit=limit, after_id=after_id, **filters)
+
+
+async def get_shop_item_cached(db: AsyncSession, item_id: int):
+    return await db.run_sync(crud.get_shop_item_cached, item_id)
+
+
+async def get_shop_items_cached(
+    db: AsyncSession, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, **filters
+):
+    return await db.run_sync(crud.get_shop_items_cached, skip=skip, limit=limit, after_id=after_id, **filters)
+
+
+async def search_shop_items(
+    db: AsyncSession, query: str, category_ids: Sequence[int] = (), skip: int = 0, limit: int = 20
+):
+    return await db.run_sync(crud.search_shop_items, query, category_ids=category_ids, skip=skip, limit=limit)
+
+
+async def create_shop_item(db: AsyncSession, item: schemas.ShopItemCreate):
+    db_item = await db.run_sync(crud.create_shop_item, item)
+    return await _reload(db, get_shop_item, db_item.id)
+
+
+async def update_shop_item(db: AsyncSession, item_id: int, item: schemas.ShopItemUpdate):
+    db_item = await db.run_sync(crud.update_shop_item, item_id, item)
+    if db_item is None:
+        return None
+    return await _reload(db, get_shop_item, item_id)
+
+
+async def delete_shop_item(db: AsyncSession, item_id: int):
+    # Snapshot the response before the row goes away: flushing the delete
+    # unloads relationships that could otherwise only be lazy loaded
+    db_item = await get_shop_item(db, item_id)
+    if db_item is None:
+        return None
+    response = schemas.ShopItem.model_validate(db_item)
+    await db.run_sync(crud.delete_shop_item, item_id)
+    return response
+
+
+# Order CRUD
+async def get_order(db: AsyncSession, order_id: int):
+    return await db.run_sync(crud.get_order, order_id)
+
+
+async def get_orders(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+):
+    return await db.run_sync(crud.get_orders, skip=skip, limit=limit, after_id=after_id, customer_id=customer_id)
+
+
+async def get_order_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+):
+    return await db.run_sync(
+        crud.get_order_rows, skip=skip, limit=limit, after_id=after_id, customer_id=customer_id
+    )
+
+
+async def get_customer_order_summary(db: AsyncSession, customer_id: int):
+    return await db.run_sync(crud.get_customer_order_summary, customer_id)
+
+
+async def create_order(db: AsyncSession, order: schemas.OrderCreate):
+    return await db.run_sync(crud.create_order, order)
+
+
+async def update_order(db: AsyncSession, order_id: int, order: schemas.OrderUpdate):
+    db_order = await db.run_sync(crud.update_order, order_id, order)
+    if db_order is None:
+        return None
+    return await _reload(db, get_order, order_id)
+
+
+async def update_order_item(db: AsyncSession, order_id: int, line_id: int, item: schemas.OrderItemUpdate):
+    return await db.run_sync(crud.update_order_item, order_id, line_id, item)
+
+
+async def delete_order(db: AsyncSession, order_id: int):
+    # Snapshot the response before the row goes away: flushing the delete
+    # unloads relationships that could otherwise only be lazy loaded
+    db_order = await get_order(db, order_id)
+    if db_order is None:
+        return None
+    response = schemas.Order.model_validate(db_order)
+    await db.run_sync(crud.delete_order, order_id)
+    return response
+
+
+# Sales analytics
+async def get_item_sales_cached(
+    db: AsyncSession, metric: schemas.SalesMetric = schemas.SalesMetric.revenue, skip: int = 0, limit: int = 100
+):
+    return await db.run_sync(crud.get_item_sales_cached, metric=metric, skip=skip, limit=limit)
+
+
+async def get_category_sales_cached(db: AsyncSession):
+    return await db.run_sync(crud.get_category_sales_cached)
+
+
+async def get_basket_sizes_cached(db: AsyncSession):
+    return await db.run_sync(crud.get_basket_sizes_cached)
+
+
+# Bulk import
+async def bulk_create_customers(db: AsyncSession, customers: Sequence[Tuple[int, schemas.CustomerCreate]]):
+    return await db.run_sync(crud.bulk_create_customers, customers)
+
+
+async def bulk_create_categories(db: AsyncSession, categories: Sequence[Tuple[int, schemas.ShopItemCategoryCreate]]):
+    return await db.run_sync(crud.bulk_create_categories, categories)
+
+
+async def bulk_create_shop_items(db: AsyncSession, items: Sequence[Tuple[int, schemas.ShopItemCreate]]):
+    return await db.run_sync(crud.bulk_create_shop_items, items)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from .. import async_crud, crud, schemas
+from ..conditional import async_conditional_get
+from ..database import get_async_db
+
+router = APIRouter()
+check_etag = async_conditional_get(crud.ANALYTICS_RESOURCES)
+
+
+@router.get("/revenue/items", response_model=List[schemas.ItemSales], dependencies=[Depends(check_etag)])
+async def read_item_revenue(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_item_sales_cached(db, metric=schemas.SalesMetric.revenue, skip=skip, limit=limit)
+
+
+@router.get("/revenue/categories", response_model=List[schemas.CategorySales], dependencies=[Depends(check_etag)])
+async def read_category_revenue(db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_category_sales_cached(db)
+
+
+@router.get("/top-sellers", response_model=List[schemas.ItemSales], dependencies=[Depends(check_etag)])
+async def read_top_sellers(
+    n: int = Query(10, ge=1, le=1000),
+    by: schemas.SalesMetric = schemas.SalesMetric.revenue,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await async_crud.get_item_sales_cached(db, metric=by, limit=n)
+
+
+@router.get("/basket-sizes", response_model=schemas.BasketSizeDistribution, dependencies=[Depends(check_etag)])
+async def read_basket_sizes(db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_basket_sizes_cached(db)
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import async_crud, crud, schemas
+from ..bulk import BulkBatch, bulk_body, bulk_openapi
+from ..conditional import async_conditional_get
+from ..database import get_async_db
+from ..pagination import decode_cursor, set_next_cursor
+from ..serialization import fast_json
+
+router = APIRouter()
+check_etag = async_conditional_get(crud.CUSTOMER_RESOURCES)
+check_orders_etag = async_conditional_get(crud.ORDER_RESOURCES)
+
+
+@router.post("/", response_model=schemas.Customer)
+async def create_customer(customer: schemas.CustomerCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_customer(db=db, customer=customer)
+
+
+@router.post("/bulk", response_model=schemas.BulkResult, openapi_extra=bulk_openapi(schemas.CustomerCreate))
+async def bulk_create_customers(
+    batch: BulkBatch = Depends(bulk_body(schemas.CustomerCreate)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    ids, errors = await async_crud.bulk_create_customers(db, batch.rows)
+    return batch.result(ids, errors)
+
+
+@router.get("/", response_model=List[schemas.Customer], dependencies=[Depends(check_etag)])
+async def read_customers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    customers = await async_crud.get_customers(db, skip=skip, limit=limit, after_id=decode_cursor(cursor))
+    set_next_cursor(response, customers, limit)
+    return customers
+
+
+@router.get("/{customer_id}", response_model=schemas.Customer, dependencies=[Depends(check_etag)])
+async def read_customer(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_customer = await async_crud.get_customer(db, customer_id=customer_id)
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
+
+
+@router.get(
+    "/{customer_id}/orders", response_model=List[schemas.Order], dependencies=[Depends(check_orders_etag)]
+)
+async def read_customer_orders(
+    customer_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    orders = await async_crud.get_order_rows(
+        db, skip=skip, limit=limit, after_id=decode_cursor(cursor), customer_id=customer_id
+    )
+    if not orders and await async_crud.get_customer(db, customer_id=customer_id) is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    set_next_cursor(response, orders, limit)
+    return fast_json(orders, response)
+
+
+@router.get(
+    "/{customer_id}/orders/summary",
+    response_model=schemas.CustomerOrderSummary,
+    dependencies=[Depends(check_orders_etag)],
+)
+async def read_customer_order_summary(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    summary = await async_crud.get_customer_order_summary(db, customer_id=customer_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return summary
+
+
+@router.put("/{customer_id}", response_model=schemas.Customer)
+async def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_customer = await async_crud.update_customer(db, customer_id=customer_id, customer=customer)
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
+
+
+@router.delete("/{customer_id}", response_model=schemas.Customer)
+async def delete_customer(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_customer = await async_crud.delete_customer(db, customer_id=customer_id)
+    if db_customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return db_customer
\ No newline at end of file
@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import async_crud, crud, schemas
+from ..conditional import async_conditional_get
+from ..database import get_async_db
+from ..export import ExportFormat, MEDIA_TYPES, astream_orders
+from ..pagination import decode_cursor, set_next_cursor
+from ..serialization import fast_json
+
+router = APIRouter()
+check_etag = async_conditional_get(crud.ORDER_RESOURCES)
+
+
+@router.post("/", response_model=schemas.Order)
+async def create_order(order: schemas.OrderCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_order(db=db, order=order)
+
+
+@router.get("/", response_model=List[schemas.Order], dependencies=[Depends(check_etag)])
+async def read_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    orders = await async_crud.get_order_rows(db, skip=skip, limit=limit, after_id=decode_cursor(cursor))
+    set_next_cursor(response, orders, limit)
+    return fast_json(orders, response)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_orders(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return StreamingResponse(astream_orders(db.bind, export_format), media_type=MEDIA_TYPES[export_format])
+
+
+@router.get("/{order_id}", response_model=schemas.Order, dependencies=[Depends(check_etag)])
+async def read_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order = await async_crud.get_order(db, order_id=order_id)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return db_order
+
+
+@router.put("/{order_id}", response_model=schemas.Order)
+async def update_order(order_id: int, order: schemas.OrderUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_order = await async_crud.update_order(db, order_id=order_id, order=order)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return db_order
+
+
+@router.patch("/{order_id}/items/{line_id}", response_model=schemas.OrderItem)
+async def update_order_item(
+    order_id: int, line_id: int, item: schemas.OrderItemUpdate, db: AsyncSession = Depends(get_async_db)
+):
+    db_order_item = await async_crud.update_order_item(db, order_id=order_id, line_id=line_id, item=item)
+    if db_order_item is None:
+        raise HTTPException(status_code=404, detail="Order line not found")
+    return db_order_item
+
+
+@router.delete("/{order_id}", response_model=schemas.Order)
+async def delete_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order = await async_crud.delete_order(db, order_id=order_id)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return db_order
\ No newline at end of file
@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from .. import async_crud, crud, schemas
+from ..bulk import BulkBatch, bulk_body, bulk_openapi
+from ..conditional import async_conditional_get
+from ..database import get_async_db
+from ..pagination import decode_sorted_cursor, set_next_cursor
+from ..serialization import fast_json
+
+router = APIRouter()
+check_etag = async_conditional_get(crud.SHOP_ITEM_RESOURCES)
+
+
+@router.post("/", response_model=schemas.ShopItem)
+async def create_shop_item(item: schemas.ShopItemCreate, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.create_shop_item(db=db, item=item)
+
+
+@router.post("/bulk", response_model=schemas.BulkResult, openapi_extra=bulk_openapi(schemas.ShopItemCreate))
+async def bulk_create_shop_items(
+    batch: BulkBatch = Depends(bulk_body(schemas.ShopItemCreate)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    ids, errors = await async_crud.bulk_create_shop_items(db, batch.rows)
+    return batch.result(ids, errors)
+
+
+@router.get("/", response_model=List[schemas.ShopItem], dependencies=[Depends(check_etag)])
+async def read_shop_items(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    category_id: Optional[List[int]] = Query(None, description="Items in any of these categories"),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    title_prefix: Optional[str] = Query(None, min_length=1, description="Case-sensitive title prefix"),
+    sort: schemas.ShopItemSort = schemas.ShopItemSort.id,
+    db: AsyncSession = Depends(get_async_db),
+):
+    after_key, after_id = decode_sorted_cursor(cursor, sort.value) or (None, None)
+    items = await async_crud.get_shop_items_cached(
+        db,
+        skip=skip,
+        limit=limit,
+        after_id=after_id,
+        category_ids=tuple(category_id or ()),
+        min_price=min_price,
+        max_price=max_price,
+        title_prefix=title_prefix,
+        sort=sort.value,
+        after_key=after_key,
+    )
+    set_next_cursor(response, items, limit, sort.value)
+    return fast_json(items, response)
+
+
+@router.get("/search", response_model=List[schemas.ShopItem], dependencies=[Depends(check_etag)])
+async def search_shop_items(
+    q: str = Query(..., min_length=1, description="Words to find in titles and descriptions, matched as prefixes"),
+    category_id: Optional[List[int]] = Query(None, description="Items in any of these categories"),
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await async_crud.search_shop_items(db, q, category_ids=tuple(category_id or ()), skip=skip, limit=limit)
+
+
+@router.get("/{item_id}", response_model=schemas.ShopItem, dependencies=[Depends(check_etag)])
+async def read_shop_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_item = await async_crud.get_shop_item_cached(db, item_id=item_id)
+    if db_item is None:
+        raise HTTPException(status_code=404, detail="Shop item not found")
+    return db_item
+
+
+@router.put("/{item_id}", response_model=schemas.ShopItem)
+async def update_shop_item(item_id: int, item: schemas.ShopItemUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_item = await async_crud.update_shop_item(db, item_id=item_id, item=item)
+    if db_item is None:
+        raise HTTPException(status_code=404, detail="Shop item not found")
+    return db_item
+
+
+@router.delete("/{item_id}", response_model=schemas.ShopItem)
+async def delete_shop_item(item_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_item = await async_crud.delete_shop_item(db, item_id=item_id)
+    if db_item is None:
+        raise HTTPException(status_code=404, detail="Shop item not found")
+    return db_item
\ No newline at end of file
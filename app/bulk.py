@@ -0,0 +1,90 @@
+import json
+from typing import Dict, List, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+
+from . import schemas
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class BulkBatch:
+    """Rows of a bulk request that passed validation, with the rejected ones."""
+
+    def __init__(self, total: int, rows: List[Tuple[int, BaseModel]], errors: List[schemas.BulkError]):
+        self.total = total
+        self.rows = rows
+        self.errors = errors
+
+    def result(self, ids: Dict[int, int], errors: Sequence[schemas.BulkError]) -> schemas.BulkResult:
+        """Combine the ids and errors of the write with the validation errors."""
+        all_errors = sorted([*self.errors, *errors], key=lambda error: error.index)
+        return schemas.BulkResult(
+            created=len(ids),
+            failed=len(all_errors),
+            ids=[ids.get(index) for index in range(self.total)],
+            errors=all_errors,
+        )
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}" for item in error.errors()
+    )
+
+
+def bulk_body(schema: Type[BaseModel]):
+    """Dependency parsing a JSON array or NDJSON body of `schema` rows.
+
+    Rows that fail validation are reported by index instead of failing the
+    whole request.
+    """
+
+    async def parse(request: Request) -> BulkBatch:
+        body = await request.body()
+        media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+        raw_rows = []
+        if media_type in NDJSON_MEDIA_TYPES:
+            for line in body.splitlines():
+                if line.strip():
+                    raw_rows.append(line)
+        else:
+            try:
+                raw_rows = json.loads(body)
+            except ValueError:
+                raise HTTPException(status_code=422, detail="Body must be a JSON array or NDJSON")
+            if not isinstance(raw_rows, list):
+                raise HTTPException(status_code=422, detail="Body must be a JSON array or NDJSON")
+
+        rows = []
+        errors = []
+        for index, raw_row in enumerate(raw_rows):
+            try:
+                if isinstance(raw_row, bytes):
+                    rows.append((index, schema.model_validate_json(raw_row)))
+                else:
+                    rows.append((index, schema.model_validate(raw_row)))
+            except ValidationError as e:
+                errors.append(schemas.BulkError(index=index, detail=_format_validation_error(e)))
+        return BulkBatch(len(raw_rows), rows, errors)
+
+    return parse
+
+
+def bulk_openapi(schema: Type[BaseModel]) -> dict:
+    """Request body documentation for a bulk endpoint, which reads the body itself."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": {"$ref": f"#/components/schemas/{schema.__name__}"}}
+                },
+                "application/x-ndjson": {
+                    "schema": {"type": "string", "description": f"One {schema.__name__} JSON object per line"}
+                },
+            },
+        }
+    }
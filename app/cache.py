@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .config import settings
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Keys are tuples whose first element is a namespace, so that all entries
+    derived from one table can be dropped together with `invalidate`. Every
+    invalidation bumps the namespace generation: a value loaded while a write
+    was committing is not stored, so readers cannot put stale data back.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get_or_load(self, key: Tuple, loader: Callable[[], Any]) -> Any:
+        """Return the cached value of `key`, calling `loader` on a miss."""
+        if not self.enabled:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self._timer():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            generation = self._generations.get(key[0], 0)
+
+        value = loader()
+
+        with self._lock:
+            if self._generations.get(key[0], 0) == generation:
+                self._entries[key] = (self._timer() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *namespaces: Hashable):
+        """Drop every entry of the given namespaces."""
+        with self._lock:
+            for namespace in namespaces:
+                self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            for key in [key for key in self._entries if key[0] in namespaces]:
+                del self._entries[key]
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for namespace in self._generations:
+                self._generations[namespace] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+# Caches category and shop item responses. Shop item responses embed their
+# categories, so category writes invalidate both namespaces. Each process has
+# its own cache: writes made by other workers show up after at most `ttl`.
+catalogue_cache = TTLCache(maxsize=settings.cache_maxsize, ttl=settings.cache_ttl)
+
+
+# Caches sales analytics. Aggregates scan every order line, so they are kept
+# longer than catalogue entries and dropped by every order write instead.
+analytics_cache = TTLCache(maxsize=settings.analytics_cache_maxsize, ttl=settings.analytics_cache_ttl)
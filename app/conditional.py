@@ -0,0 +1,58 @@
+"""Conditional GET support (ETag / If-None-Match).
+
+ETags are derived from the request URL, the schema version and the versions of
+the tables the response is built from, so checking them costs a single lookup
+in `resource_versions`. The schema version covers migrations, which can change
+stored data and response shapes without any write bumping a table version. When the client's copy is current the request is answered
+with `304 Not Modified` before the route runs, skipping its queries and
+serialization altogether.
+"""
+import hashlib
+from typing import Sequence
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import crud
+from .database import get_async_db, get_db
+from .migrations import LATEST_VERSION
+
+
+def compute_etag(request: Request, versions: Sequence[int]) -> str:
+    key = f"{request.url.path}?{request.url.query}|{LATEST_VERSION}|{','.join(map(str, versions))}"
+    return '"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison function
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip() for candidate in if_none_match.split(","))
+    return etag in (candidate[2:] if candidate.startswith("W/") else candidate for candidate in candidates)
+
+
+def _check(request: Request, response: Response, etag: str):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _matches(if_none_match, etag):
+        raise HTTPException(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+
+def conditional_get(resources: Sequence[str]):
+    """Route dependency answering 304 when `resources` have not changed."""
+
+    def check(request: Request, response: Response, db: Session = Depends(get_db)):
+        _check(request, response, compute_etag(request, crud.get_versions(db, resources)))
+
+    return check
+
+
+def async_conditional_get(resources: Sequence[str]):
+    """Async counterpart of `conditional_get`."""
+
+    async def check(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        versions = await db.run_sync(crud.get_versions, resources)
+        _check(request, response, compute_etag(request, versions))
+
+    return check
@@ -0,0 +1,111 @@
+import os
+from typing import Dict, Optional
+
+# Connection pragmas applied by each SQLite profile. "default" leaves SQLite's
+# own defaults alone (rollback journal, synchronous=FULL); "production" lets
+# readers proceed while a writer commits and trades durability of the last
+# transactions on power loss for far fewer fsyncs.
+SQLITE_PROFILES: Dict[str, Dict[str, object]] = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}")
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    if value.lower() in ("1", "true", "yes", "on"):
+        return True
+    if value.lower() in ("0", "false", "no", "off"):
+        return False
+    raise ValueError(f"{name} must be a boolean, got {value!r}")
+
+
+class Settings:
+    """Application settings read from environment variables."""
+
+    def __init__(self):
+        # "sync" serves requests from the threadpool with a blocking Session,
+        # "async" uses native async routes on top of an AsyncSession.
+        self.db_mode = os.getenv("SHOP_DB_MODE", "sync").lower()
+        if self.db_mode not in ("sync", "async"):
+            raise ValueError(f"SHOP_DB_MODE must be 'sync' or 'async', got {self.db_mode!r}")
+
+        self.database_url = os.getenv("SHOP_DATABASE_URL", "sqlite:///./shop.db")
+
+        # Startup work done by the app's lifespan. Deployments that run
+        # `python -m app.manage init-db` before starting workers turn it off.
+        self.init_db = _env_bool("SHOP_INIT_DB", True)
+        self.seed_data = _env_bool("SHOP_SEED_DATA", False)
+
+        # Connection pool sized for concurrent readers; WAL lets them run
+        # alongside the single writer SQLite allows.
+        self.pool_size = _env_int("SHOP_DB_POOL_SIZE", 20)
+        self.max_overflow = _env_int("SHOP_DB_MAX_OVERFLOW", 10)
+        self.pool_timeout = _env_int("SHOP_DB_POOL_TIMEOUT", 30)
+
+        self.sqlite_profile = os.getenv("SHOP_SQLITE_PROFILE", "production").lower()
+        if self.sqlite_profile not in SQLITE_PROFILES:
+            raise ValueError(
+                f"SHOP_SQLITE_PROFILE must be one of {sorted(SQLITE_PROFILES)}, got {self.sqlite_profile!r}"
+            )
+        # Individual pragmas can be overridden on top of the profile
+        self.sqlite_pragmas = dict(SQLITE_PROFILES[self.sqlite_profile])
+        for pragma in ("journal_mode", "synchronous", "temp_store"):
+            value = os.getenv(f"SHOP_SQLITE_{pragma.upper()}")
+            if value:
+                self.sqlite_pragmas[pragma] = value.upper()
+        for pragma in ("busy_timeout", "cache_size", "mmap_size"):
+            value = _env_int(f"SHOP_SQLITE_{pragma.upper()}", None)
+            if value is not None:
+                self.sqlite_pragmas[pragma] = value
+
+        # Catalogue read cache; a TTL or size of 0 disables it
+        self.cache_ttl = _env_float("SHOP_CACHE_TTL", 30.0)
+        self.cache_maxsize = _env_int("SHOP_CACHE_MAXSIZE", 1024)
+        self.analytics_cache_ttl = _env_float("SHOP_ANALYTICS_CACHE_TTL", 300.0)
+        self.analytics_cache_maxsize = _env_int("SHOP_ANALYTICS_CACHE_MAXSIZE", 256)
+
+        # Idempotency-Key responses are replayed for this many seconds. A key
+        # whose request never finished is released after the lock timeout.
+        self.idempotency_ttl = _env_float("SHOP_IDEMPOTENCY_TTL", 86400.0)
+        self.idempotency_lock_timeout = _env_float("SHOP_IDEMPOTENCY_LOCK_TIMEOUT", 60.0)
+        self.idempotency_purge_interval = _env_float("SHOP_IDEMPOTENCY_PURGE_INTERVAL", 300.0)
+
+        # Statements slower than this are logged; 0 disables the log
+        self.slow_query_ms = _env_float("SHOP_SLOW_QUERY_MS", 100.0)
+
+    @property
+    def async_mode(self) -> bool:
+        return self.db_mode == "async"
+
+
+settings = Settings()
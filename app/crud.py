@@ -1,6 +1,80 @@
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from sqlalchemy import delete, func, insert, literal_column, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from . import models, schemas
-from typing import List, Optional
+from .cache import analytics_cache, catalogue_cache
+from .errors import InUseError, check_references
+from .metrics import order_lines_created, orders_created
+from .search import match_expression, rank, shop_items_fts
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Loader plans
+#
+# Each plan eagerly loads exactly the relationships its response schema
+# serializes, so reads run a fixed number of queries whatever the page size
+# instead of lazy loading per row.
+SHOP_ITEM_LOAD_OPTIONS = (
+    selectinload(models.ShopItem.categories),
+)
+
+ORDER_LOAD_OPTIONS = (
+    joinedload(models.Order.customer),
+    selectinload(models.Order.items)
+    .selectinload(models.OrderItem.shop_item)
+    .selectinload(models.ShopItem.categories),
+)
+
+
+# Resource versions
+#
+# Every write bumps the version of the table it changes within its own
+# transaction. A response derived from a set of tables cannot have changed
+# while their versions have not, which makes the versions usable as ETags and
+# as cache keys that stay correct across worker processes.
+CUSTOMER_RESOURCES = ("customers",)
+CATEGORY_RESOURCES = ("categories",)
+# Item counts change with the shop items' category assignments
+CATEGORY_COUNT_RESOURCES = ("categories", "shop_items")
+SHOP_ITEM_RESOURCES = ("shop_items", "categories")
+ORDER_RESOURCES = ("orders", "customers", "shop_items", "categories")
+
+
+def get_versions(db: Session, names: Sequence[str]) -> Tuple[int, ...]:
+    # All versions are read with one query and kept for the session
+    versions = db.info.get("resource_versions")
+    if versions is None:
+        versions = dict(db.query(models.ResourceVersion.name, models.ResourceVersion.version).all())
+        db.info["resource_versions"] = versions
+    return tuple(versions.get(name, 0) for name in names)
+
+
+def bump_versions_statement(*names: str):
+    """Statement bumping the versions of `names`, for writes made with Core."""
+    statement = sqlite_insert(models.ResourceVersion).values([{"name": name, "version": 1} for name in names])
+    return statement.on_conflict_do_update(
+        index_elements=[models.ResourceVersion.name],
+        set_={"version": models.ResourceVersion.version + 1}
+    )
+
+
+def _bump_versions(db: Session, *names: str):
+    db.execute(bump_versions_statement(*names))
+    db.info.pop("resource_versions", None)
+
+
+def _in_parameter_order(rows):
+    """Rows of a multi-row INSERT ... RETURNING, in the order of its parameters.
+
+    `sort_by_parameter_order=True` would fall back to one INSERT per row, as
+    SQLAlchemy has no insert sentinel for SQLite. SQLite gives every new row
+    an id one above the largest in the table, so the ids of a single insert
+    increase in parameter order and sorting by id restores it.
+    """
+    return sorted(rows, key=lambda row: row.id)
 
 
 # Customer CRUD
@@ -8,8 +82,11 @@ def get_customer(db: Session, customer_id: int):
     return db.query(models.Customer).filter(models.Customer.id == customer_id).first()
 
 
-def get_customers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Customer).offset(skip).limit(limit).all()
+def get_customers(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    query = db.query(models.Customer)
+    if after_id is not None:
+        query = query.filter(models.Customer.id > after_id)
+    return query.order_by(models.Customer.id).offset(skip).limit(limit).all()
 
 
 def create_customer(db: Session, customer: schemas.CustomerCreate):
@@ -19,6 +96,7 @@ def create_customer(db: Session, customer: schemas.CustomerCreate):
         email=customer.email
     )
     db.add(db_customer)
+    _bump_versions(db, "customers")
     db.commit()
     db.refresh(db_customer)
     return db_customer
@@ -30,6 +108,7 @@ def update_customer(db: Session, customer_id: int, customer: schemas.CustomerUpd
         update_data = customer.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_customer, field, value)
+        _bump_versions(db, "customers")
         db.commit()
         db.refresh(db_customer)
     return db_customer
@@ -38,7 +117,10 @@ def update_customer(db: Session, customer_id: int, customer: schemas.CustomerUpd
 def delete_customer(db: Session, customer_id: int):
     db_customer = db.query(models.Customer).filter(models.Customer.id == customer_id).first()
     if db_customer:
+        if db.query(models.Order.id).filter(models.Order.customer_id == customer_id).first() is not None:
+            raise InUseError("Customer has orders")
         db.delete(db_customer)
+        _bump_versions(db, "customers")
         db.commit()
     return db_customer
 
@@ -48,8 +130,28 @@ def get_category(db: Session, category_id: int):
     return db.query(models.ShopItemCategory).filter(models.ShopItemCategory.id == category_id).first()
 
 
-def get_categories(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.ShopItemCategory).offset(skip).limit(limit).all()
+def get_categories(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    query = db.query(models.ShopItemCategory)
+    if after_id is not None:
+        query = query.filter(models.ShopItemCategory.id > after_id)
+    return query.order_by(models.ShopItemCategory.id).offset(skip).limit(limit).all()
+
+
+def get_categories_with_counts(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None):
+    """Categories with the number of items in each, as (category, count) rows.
+
+    The counts come from the same grouped query, read from the association
+    table's category index.
+    """
+    association = models.shop_item_category_association
+    query = (
+        db.query(models.ShopItemCategory, func.count(association.c.shop_item_id))
+        .outerjoin(association, association.c.category_id == models.ShopItemCategory.id)
+        .group_by(models.ShopItemCategory.id)
+    )
+    if after_id is not None:
+        query = query.filter(models.ShopItemCategory.id > after_id)
+    return query.order_by(models.ShopItemCategory.id).offset(skip).limit(limit).all()
 
 
 def create_category(db: Session, category: schemas.ShopItemCategoryCreate):
@@ -58,8 +160,10 @@ def create_category(db: Session, category: schemas.ShopItemCategoryCreate):
         description=category.description
     )
     db.add(db_category)
+    _bump_versions(db, "categories")
     db.commit()
     db.refresh(db_category)
+    catalogue_cache.invalidate("categories")
     return db_category
 
 
@@ -69,8 +173,11 @@ def update_category(db: Session, category_id: int, category: schemas.ShopItemCat
         update_data = category.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_category, field, value)
+        _bump_versions(db, "categories")
         db.commit()
         db.refresh(db_category)
+        # Shop item responses embed their categories
+        catalogue_cache.invalidate("categories", "shop_items")
     return db_category
 
 
@@ -78,17 +185,190 @@ def delete_category(db: Session, category_id: int):
     db_category = db.query(models.ShopItemCategory).filter(models.ShopItemCategory.id == category_id).first()
     if db_category:
         db.delete(db_category)
+        _bump_versions(db, "categories")
         db.commit()
+        catalogue_cache.invalidate("categories", "shop_items")
     return db_category
 
 
+def get_category_cached(db: Session, category_id: int) -> Optional[schemas.ShopItemCategory]:
+    def load():
+        db_category = get_category(db, category_id)
+        return None if db_category is None else schemas.ShopItemCategory.model_validate(db_category)
+    return catalogue_cache.get_or_load(("categories", get_versions(db, CATEGORY_RESOURCES), category_id), load)
+
+
+def get_categories_cached(
+    db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[schemas.ShopItemCategory]:
+    def load():
+        return [
+            schemas.ShopItemCategory.model_validate(db_category)
+            for db_category in get_categories(db, skip=skip, limit=limit, after_id=after_id)
+        ]
+    return catalogue_cache.get_or_load(
+        ("categories", get_versions(db, CATEGORY_RESOURCES), "list", skip, limit, after_id), load
+    )
+
+
+def get_categories_with_counts_cached(
+    db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+) -> List[schemas.ShopItemCategoryWithCount]:
+    def load():
+        return [
+            schemas.ShopItemCategoryWithCount(
+                **schemas.ShopItemCategory.model_validate(db_category).model_dump(), item_count=item_count
+            )
+            for db_category, item_count in get_categories_with_counts(db, skip=skip, limit=limit, after_id=after_id)
+        ]
+    return catalogue_cache.get_or_load(
+        ("categories", get_versions(db, CATEGORY_COUNT_RESOURCES), "counts", skip, limit, after_id), load
+    )
+
+
 # ShopItem CRUD
 def get_shop_item(db: Session, item_id: int):
-    return db.query(models.ShopItem).filter(models.ShopItem.id == item_id).first()
+    return db.query(models.ShopItem).options(*SHOP_ITEM_LOAD_OPTIONS).filter(models.ShopItem.id == item_id).first()
+
+
+SHOP_ITEM_SORT_COLUMNS = {
+    "id": models.ShopItem.id,
+    "price": models.ShopItem.price,
+    "title": models.ShopItem.title,
+}
+
+
+def _prefix_upper_bound(prefix: str) -> Optional[str]:
+    # The smallest string greater than every string starting with `prefix`
+    while prefix and ord(prefix[-1]) == 0x10FFFF:
+        prefix = prefix[:-1]
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _in_categories(category_ids: Sequence[int]):
+    association = models.shop_item_category_association
+    return models.ShopItem.id.in_(
+        select(association.c.shop_item_id).where(association.c.category_id.in_(category_ids))
+    )
+
+
+def _filter_shop_items(
+    query,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    category_ids: Sequence[int] = (),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    title_prefix: Optional[str] = None,
+    sort: str = "id",
+    after_key: Any = None,
+):
+    if category_ids:
+        query = query.filter(_in_categories(category_ids))
+    if min_price is not None:
+        query = query.filter(models.ShopItem.price >= min_price)
+    if max_price is not None:
+        query = query.filter(models.ShopItem.price <= max_price)
+    if title_prefix:
+        query = query.filter(models.ShopItem.title >= title_prefix)
+        upper_bound = _prefix_upper_bound(title_prefix)
+        if upper_bound is not None:
+            query = query.filter(models.ShopItem.title < upper_bound)
+
+    descending = sort.startswith("-")
+    column = SHOP_ITEM_SORT_COLUMNS[sort.lstrip("-")]
+    if after_id is not None:
+        if column is models.ShopItem.id:
+            position, after = models.ShopItem.id, after_id
+        else:
+            position, after = tuple_(column, models.ShopItem.id), tuple_(after_key, after_id)
+        query = query.filter(position < after if descending else position > after)
+    if column is models.ShopItem.id:
+        order_by = [column.desc() if descending else column]
+    elif descending:
+        order_by = [column.desc(), models.ShopItem.id.desc()]
+    else:
+        order_by = [column, models.ShopItem.id]
+    return query.order_by(*order_by).offset(skip).limit(limit)
+
+
+def get_shop_items(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, **filters):
+    """Shop items matching the filters, in `sort` order.
+
+    Items in any of `category_ids` are selected through the association
+    table's category index. The title prefix is case-sensitive and matched
+    as a range on the title index. Sorting by price or title breaks ties by
+    id, and a page starts after the row (`after_key`, `after_id`).
+    """
+    query = db.query(models.ShopItem).options(*SHOP_ITEM_LOAD_OPTIONS)
+    return _filter_shop_items(query, skip=skip, limit=limit, after_id=after_id, **filters).all()
+
+
+def _categories_by_item(db: Session, item_ids: Sequence[int]) -> Dict[int, List[dict]]:
+    association = models.shop_item_category_association
+    categories = defaultdict(list)
+    if not item_ids:
+        return categories
+    rows = db.execute(
+        select(
+            association.c.shop_item_id,
+            models.ShopItemCategory.title,
+            models.ShopItemCategory.description,
+            models.ShopItemCategory.id,
+        )
+        .join(models.ShopItemCategory, models.ShopItemCategory.id == association.c.category_id)
+        .where(association.c.shop_item_id.in_(set(item_ids)))
+        .order_by(association.c.shop_item_id, association.c.category_id)
+    )
+    for shop_item_id, title, description, category_id in rows:
+        categories[shop_item_id].append({"title": title, "description": description, "id": category_id})
+    return categories
+
+
+def get_shop_item_rows(
+    db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, **filters
+) -> List[dict]:
+    """`get_shop_items` as plain dicts shaped like `schemas.ShopItem`.
+
+    Columns are read straight into dicts with one query for the items and one
+    for their categories, skipping the ORM and response validation.
+    """
+    query = db.query(models.ShopItem.title, models.ShopItem.description, models.ShopItem.price, models.ShopItem.id)
+    rows = _filter_shop_items(query, skip=skip, limit=limit, after_id=after_id, **filters).all()
+    categories = _categories_by_item(db, [row.id for row in rows])
+    return [
+        {"title": title, "description": description, "price": price, "id": item_id, "categories": categories[item_id]}
+        for title, description, price, item_id in rows
+    ]
+
+
+def search_shop_items(
+    db: Session, query: str, category_ids: Sequence[int] = (), skip: int = 0, limit: int = 20
+):
+    """Shop items whose title or description contain every word of `query`
+    as a prefix, most relevant first by BM25."""
+    match = match_expression(query)
+    if match is None:
+        return []
+    db_query = (
+        db.query(models.ShopItem)
+        .options(*SHOP_ITEM_LOAD_OPTIONS)
+        .join(shop_items_fts, shop_items_fts.c.rowid == models.ShopItem.id)
+        .filter(literal_column("shop_items_fts").op("MATCH")(match))
+    )
+    if category_ids:
+        db_query = db_query.filter(_in_categories(category_ids))
+    return db_query.order_by(rank(), models.ShopItem.id).offset(skip).limit(limit).all()
 
 
-def get_shop_items(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.ShopItem).offset(skip).limit(limit).all()
+def _get_categories(db: Session, category_ids: Sequence[int]) -> List[models.ShopItemCategory]:
+    categories = db.query(models.ShopItemCategory).filter(models.ShopItemCategory.id.in_(category_ids)).all()
+    found = {category.id for category in categories}
+    check_references(category_ids=[category_id for category_id in category_ids if category_id not in found])
+    return categories
 
 
 def create_shop_item(db: Session, item: schemas.ShopItemCreate):
@@ -100,14 +380,13 @@ def create_shop_item(db: Session, item: schemas.ShopItemCreate):
     
     # Add categories
     if item.category_ids:
-        categories = db.query(models.ShopItemCategory).filter(
-            models.ShopItemCategory.id.in_(item.category_ids)
-        ).all()
-        db_item.categories = categories
+        db_item.categories = _get_categories(db, item.category_ids)
     
     db.add(db_item)
+    _bump_versions(db, "shop_items")
     db.commit()
     db.refresh(db_item)
+    catalogue_cache.invalidate("shop_items")
     return db_item
 
 
@@ -120,87 +399,356 @@ def update_shop_item(db: Session, item_id: int, item: schemas.ShopItemUpdate):
         if 'category_ids' in update_data:
             category_ids = update_data.pop('category_ids')
             if category_ids is not None:
-                categories = db.query(models.ShopItemCategory).filter(
-                    models.ShopItemCategory.id.in_(category_ids)
-                ).all()
-                db_item.categories = categories
+                db_item.categories = _get_categories(db, category_ids)
         
         # Update other fields
         for field, value in update_data.items():
             setattr(db_item, field, value)
         
+        _bump_versions(db, "shop_items")
         db.commit()
         db.refresh(db_item)
+        catalogue_cache.invalidate("shop_items")
     return db_item
 
 
 def delete_shop_item(db: Session, item_id: int):
     db_item = db.query(models.ShopItem).filter(models.ShopItem.id == item_id).first()
     if db_item:
+        if db.query(models.OrderItem.id).filter(models.OrderItem.shop_item_id == item_id).first() is not None:
+            raise InUseError("Shop item is on orders")
         db.delete(db_item)
+        _bump_versions(db, "shop_items")
         db.commit()
+        catalogue_cache.invalidate("shop_items")
     return db_item
 
 
+def get_shop_item_cached(db: Session, item_id: int) -> Optional[schemas.ShopItem]:
+    def load():
+        db_item = get_shop_item(db, item_id)
+        return None if db_item is None else schemas.ShopItem.model_validate(db_item)
+    return catalogue_cache.get_or_load(("shop_items", get_versions(db, SHOP_ITEM_RESOURCES), item_id), load)
+
+
+def get_shop_items_cached(
+    db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None, **filters
+) -> List[dict]:
+    """`get_shop_item_rows` through the catalogue cache; takes the same filters."""
+    def load():
+        return get_shop_item_rows(db, skip=skip, limit=limit, after_id=after_id, **filters)
+    filter_key = tuple(sorted(
+        (name, tuple(sorted(value)) if name == "category_ids" else value) for name, value in filters.items()
+    ))
+    return catalogue_cache.get_or_load(
+        ("shop_items", get_versions(db, SHOP_ITEM_RESOURCES), "list", skip, limit, after_id, filter_key), load
+    )
+
+
 # Order CRUD
 def get_order(db: Session, order_id: int):
-    return db.query(models.Order).filter(models.Order.id == order_id).first()
+    return db.query(models.Order).options(*ORDER_LOAD_OPTIONS).filter(models.Order.id == order_id).first()
+
+
+def get_orders(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+):
+    query = db.query(models.Order).options(*ORDER_LOAD_OPTIONS)
+    if customer_id is not None:
+        # Served by the (customer_id, id) order of ix_orders_customer_id
+        query = query.filter(models.Order.customer_id == customer_id)
+    if after_id is not None:
+        query = query.filter(models.Order.id > after_id)
+    return query.order_by(models.Order.id).offset(skip).limit(limit).all()
+
+
+def get_order_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+) -> List[dict]:
+    """`get_orders` as plain dicts shaped like `schemas.Order`.
+
+    Runs three queries whatever the page size: the orders with their
+    customers, their lines with the shop items, and those items' categories.
+    """
+    query = (
+        db.query(
+            models.Order.customer_id,
+            models.Order.id,
+            models.Order.total,
+            models.Customer.name,
+            models.Customer.surname,
+            models.Customer.email,
+        )
+        .join(models.Customer, models.Customer.id == models.Order.customer_id)
+    )
+    if customer_id is not None:
+        query = query.filter(models.Order.customer_id == customer_id)
+    if after_id is not None:
+        query = query.filter(models.Order.id > after_id)
+    orders = []
+    lines_by_order = {}
+    for order_customer_id, order_id, total, name, surname, email in (
+        query.order_by(models.Order.id).offset(skip).limit(limit)
+    ):
+        lines_by_order[order_id] = []
+        orders.append({
+            "customer_id": order_customer_id,
+            "id": order_id,
+            "total": total,
+            "customer": {"name": name, "surname": surname, "email": email, "id": order_customer_id},
+            "items": lines_by_order[order_id],
+        })
+    if not orders:
+        return orders
+
+    lines = db.execute(
+        select(
+            models.OrderItem.order_id,
+            models.OrderItem.shop_item_id,
+            models.OrderItem.quantity,
+            models.OrderItem.id,
+            models.OrderItem.unit_price,
+            models.ShopItem.title,
+            models.ShopItem.description,
+            models.ShopItem.price,
+        )
+        .join(models.ShopItem, models.ShopItem.id == models.OrderItem.shop_item_id)
+        .where(models.OrderItem.order_id.in_(lines_by_order))
+        .order_by(models.OrderItem.order_id, models.OrderItem.id)
+    ).all()
+    categories = _categories_by_item(db, [line.shop_item_id for line in lines])
+    shop_items = {}
+    for order_id, shop_item_id, quantity, line_id, unit_price, title, description, price in lines:
+        shop_item = shop_items.get(shop_item_id)
+        if shop_item is None:
+            shop_item = shop_items[shop_item_id] = {
+                "title": title, "description": description, "price": price, "id": shop_item_id,
+                "categories": categories[shop_item_id],
+            }
+        lines_by_order[order_id].append({
+            "shop_item_id": shop_item_id, "quantity": quantity, "id": line_id, "unit_price": unit_price,
+            "shop_item": shop_item,
+        })
+    return orders
+
+
+def get_customer_order_summary(db: Session, customer_id: int) -> Optional[schemas.CustomerOrderSummary]:
+    """Order count, lifetime spend and last order of a customer in one
+    aggregate query over the stored order totals, or None when the customer
+    does not exist."""
+    row = (
+        db.query(
+            models.Customer.id,
+            func.count(models.Order.id),
+            func.coalesce(func.sum(models.Order.total), 0.0),
+            func.max(models.Order.id),
+        )
+        .outerjoin(models.Order, models.Order.customer_id == models.Customer.id)
+        .filter(models.Customer.id == customer_id)
+        .group_by(models.Customer.id)
+        .first()
+    )
+    if row is None:
+        return None
+    customer_id, order_count, lifetime_spend, last_order_id = row
+    return schemas.CustomerOrderSummary(
+        customer_id=customer_id,
+        order_count=order_count,
+        lifetime_spend=round(lifetime_spend, 2),
+        last_order_id=last_order_id,
+    )
 
 
-def get_orders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Order).offset(skip).limit(limit).all()
+def _order_total(lines: Sequence[dict]) -> float:
+    return round(sum(line["quantity"] * line["unit_price"] for line in lines if line["unit_price"] is not None), 2)
+
+
+def _order_lines(items: Sequence[schemas.OrderItemCreate], prices: Dict[int, float]) -> List[dict]:
+    # Lines capture the item's price, so later price changes leave them alone
+    return [
+        {
+            "shop_item_id": item.shop_item_id,
+            "quantity": item.quantity,
+            "unit_price": prices.get(item.shop_item_id),
+        }
+        for item in items
+    ]
 
 
 def create_order(db: Session, order: schemas.OrderCreate):
-    db_order = models.Order(customer_id=order.customer_id)
-    db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
-    
-    # Add order items
-    for item in order.items:
-        db_order_item = models.OrderItem(
-            order_id=db_order.id,
-            shop_item_id=item.shop_item_id,
-            quantity=item.quantity
+    # Load everything the response embeds up front, one query per table,
+    # so nothing has to be refreshed once the order is written
+    customer = db.get(models.Customer, order.customer_id)
+    shop_items = {
+        shop_item.id: shop_item
+        for shop_item in db.query(models.ShopItem).options(*SHOP_ITEM_LOAD_OPTIONS).filter(
+            models.ShopItem.id.in_({item.shop_item_id for item in order.items})
         )
-        db.add(db_order_item)
-    
+    } if order.items else {}
+    check_references(
+        customer_id=[] if customer is not None else [order.customer_id],
+        shop_item_id=[item.shop_item_id for item in order.items if item.shop_item_id not in shop_items],
+    )
+
+    lines = _order_lines(order.items, {shop_item_id: shop_item.price for shop_item_id, shop_item in shop_items.items()})
+    db_order = models.Order(customer_id=order.customer_id, total=_order_total(lines))
+    db.add(db_order)
+    db.flush()
+
+    # All lines go in with one multi-row INSERT ... RETURNING and keep the
+    # order of the request's items
+    db_order_items = []
+    if lines:
+        db_order_items = _in_parameter_order(db.scalars(
+            insert(models.OrderItem).returning(models.OrderItem), [{"order_id": db_order.id, **line} for line in lines]
+        ))
+        for db_order_item in db_order_items:
+            if db_order_item.shop_item_id in shop_items:
+                set_committed_value(db_order_item, "shop_item", shop_items[db_order_item.shop_item_id])
+    set_committed_value(db_order, "items", db_order_items)
+    if customer is not None:
+        set_committed_value(db_order, "customer", customer)
+
+    # Order and lines are committed together
+    _bump_versions(db, "orders")
     db.commit()
-    db.refresh(db_order)
+    analytics_cache.invalidate("analytics")
+    orders_created.inc()
+    order_lines_created.inc(len(db_order_items))
     return db_order
 
 
+def _item_prices(db: Session, shop_item_ids) -> Dict[int, float]:
+    if not shop_item_ids:
+        return {}
+    return dict(
+        db.query(models.ShopItem.id, models.ShopItem.price).filter(models.ShopItem.id.in_(shop_item_ids)).all()
+    )
+
+
+def _replace_order_lines(db: Session, order_id: int, items: Sequence[schemas.OrderItemCreate]) -> Tuple[float, int]:
+    """Make the lines of an order match `items` and return the new total and
+    the number of lines inserted.
+
+    Only the difference is written: each wanted line is matched with an
+    existing line of the same shop item, preferring one with the same
+    quantity, and the quantity is updated if it changed. Existing lines
+    left unmatched are deleted and wanted lines left unmatched are
+    inserted, with one statement for each kind of change. Matched lines
+    keep their id and captured price.
+    """
+    existing = defaultdict(list)
+    for line in db.query(
+        models.OrderItem.id, models.OrderItem.shop_item_id, models.OrderItem.quantity, models.OrderItem.unit_price
+    ).filter(models.OrderItem.order_id == order_id).order_by(models.OrderItem.id):
+        existing[line.shop_item_id].append(line)
+
+    # Lines with the same item and quantity are matched first, so that they
+    # are left alone, then the remaining lines of the same item
+    matches = [None] * len(items)
+    for index, item in enumerate(items):
+        candidates = existing.get(item.shop_item_id, ())
+        for position, line in enumerate(candidates):
+            if line.quantity == item.quantity:
+                matches[index] = candidates.pop(position)
+                break
+    for index, item in enumerate(items):
+        if matches[index] is None and existing.get(item.shop_item_id):
+            matches[index] = existing[item.shop_item_id].pop(0)
+
+    kept = []
+    updates = []
+    unmatched = []
+    for item, line in zip(items, matches):
+        if line is None:
+            unmatched.append(item)
+            continue
+        kept.append({"quantity": item.quantity, "unit_price": line.unit_price})
+        if line.quantity != item.quantity:
+            updates.append({"id": line.id, "quantity": item.quantity})
+    removed = [line.id for lines in existing.values() for line in lines]
+    # Matched lines refer to existing items, only the new ones need checking
+    prices = _item_prices(db, {item.shop_item_id for item in unmatched})
+    check_references(shop_item_id=[item.shop_item_id for item in unmatched if item.shop_item_id not in prices])
+    inserts = _order_lines(unmatched, prices)
+
+    if removed:
+        db.execute(delete(models.OrderItem).where(models.OrderItem.id.in_(removed)))
+    if updates:
+        # Executed as one executemany UPDATE by primary key
+        db.execute(update(models.OrderItem), updates)
+    if inserts:
+        db.execute(insert(models.OrderItem), [{"order_id": order_id, **line} for line in inserts])
+    return _order_total(kept + inserts), len(inserts)
+
+
 def update_order(db: Session, order_id: int, order: schemas.OrderUpdate):
     db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
     if db_order:
         update_data = order.model_dump(exclude_unset=True)
+        lines_created = 0
+        if order.customer_id is not None and db.get(models.Customer, order.customer_id) is None:
+            check_references(customer_id=[order.customer_id])
         
         # Handle items separately
         if 'items' in update_data:
-            items = update_data.pop('items')
-            if items is not None:
-                # Delete existing order items
-                db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).delete()
-                
-                # Add new order items
-                for item in items:
-                    db_order_item = models.OrderItem(
-                        order_id=order_id,
-                        shop_item_id=item['shop_item_id'],
-                        quantity=item['quantity']
-                    )
-                    db.add(db_order_item)
+            update_data.pop('items')
+            if order.items is not None:
+                db_order.total, lines_created = _replace_order_lines(db, order_id, order.items)
         
         # Update other fields
         for field, value in update_data.items():
             setattr(db_order, field, value)
         
+        _bump_versions(db, "orders")
         db.commit()
+        analytics_cache.invalidate("analytics")
+        order_lines_created.inc(lines_created)
         db.refresh(db_order)
     return db_order
 
 
+def update_order_item(db: Session, order_id: int, line_id: int, item: schemas.OrderItemUpdate):
+    """Change one line of an order and adjust the order's total by the
+    difference, without reading its other lines."""
+    db_order_item = db.query(models.OrderItem).filter(
+        models.OrderItem.id == line_id, models.OrderItem.order_id == order_id
+    ).first()
+    if db_order_item is None:
+        return None
+
+    old_amount = db_order_item.quantity * (db_order_item.unit_price or 0.0)
+    update_data = item.model_dump(exclude_unset=True, exclude_none=True)
+    if update_data.get("shop_item_id", db_order_item.shop_item_id) != db_order_item.shop_item_id:
+        # A different item is sold at its current price
+        prices = _item_prices(db, {update_data["shop_item_id"]})
+        check_references(shop_item_id=[update_data["shop_item_id"]] if not prices else [])
+        db_order_item.unit_price = prices[update_data["shop_item_id"]]
+    for field, value in update_data.items():
+        setattr(db_order_item, field, value)
+    new_amount = db_order_item.quantity * (db_order_item.unit_price or 0.0)
+
+    db.execute(
+        update(models.Order)
+        .where(models.Order.id == order_id)
+        .values(total=func.round(models.Order.total + (new_amount - old_amount), 2))
+    )
+    _bump_versions(db, "orders")
+    db.commit()
+    analytics_cache.invalidate("analytics")
+    return db.query(models.OrderItem).options(
+        selectinload(models.OrderItem.shop_item).selectinload(models.ShopItem.categories)
+    ).filter(models.OrderItem.id == line_id).first()
+
+
 def delete_order(db: Session, order_id: int):
     db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
     if db_order:
@@ -208,5 +756,266 @@ def delete_order(db: Session, order_id: int):
         _ = db_order.customer  # Trigger lazy loading
         _ = db_order.items  # Trigger lazy loading
         db.delete(db_order)
+        _bump_versions(db, "orders")
         db.commit()
-    return db_order
\ No newline at end of file
+        analytics_cache.invalidate("analytics")
+    return db_order
+
+
+# Sales analytics
+#
+# Each report is a single set-based query aggregated by SQLite; no order lines
+# are loaded into Python. Per-item totals are read from ix_order_items_sales
+# alone, so they scale with the index rather than the table.
+ANALYTICS_RESOURCES = ("orders", "shop_items", "categories")
+
+
+def _item_sales_subquery():
+    return (
+        select(
+            models.OrderItem.shop_item_id,
+            func.sum(models.OrderItem.quantity).label("units_sold"),
+            func.count().label("order_lines"),
+            func.coalesce(func.sum(models.OrderItem.quantity * models.OrderItem.unit_price), 0.0).label("revenue"),
+        )
+        .group_by(models.OrderItem.shop_item_id)
+        .subquery("item_sales")
+    )
+
+
+def get_item_sales(
+    db: Session, metric: schemas.SalesMetric = schemas.SalesMetric.revenue, skip: int = 0, limit: int = 100
+) -> List[schemas.ItemSales]:
+    """Units sold and revenue of every item that sold, best sellers first."""
+    sales = _item_sales_subquery()
+    ranking = sales.c.revenue if metric == schemas.SalesMetric.revenue else sales.c.units_sold
+    rows = db.execute(
+        select(models.ShopItem.id, models.ShopItem.title, sales.c.units_sold, sales.c.order_lines, sales.c.revenue)
+        .join(sales, sales.c.shop_item_id == models.ShopItem.id)
+        .order_by(ranking.desc(), models.ShopItem.id)
+        .offset(skip)
+        .limit(limit)
+    ).all()
+    return [
+        schemas.ItemSales(
+            shop_item_id=item_id, title=title, units_sold=units_sold, order_lines=order_lines,
+            revenue=round(revenue, 2),
+        )
+        for item_id, title, units_sold, order_lines, revenue in rows
+    ]
+
+
+def get_category_sales(db: Session) -> List[schemas.CategorySales]:
+    """Units sold and revenue of every category, highest revenue first.
+
+    An item in several categories counts towards each of them.
+    """
+    sales = _item_sales_subquery()
+    association = models.shop_item_category_association
+    # Aggregate from the items that sold, whose categories are found through
+    # the association's primary key, then add the categories that sold nothing
+    category_sales = (
+        select(
+            association.c.category_id,
+            func.sum(sales.c.units_sold).label("units_sold"),
+            func.sum(sales.c.revenue).label("revenue"),
+        )
+        .select_from(sales)
+        .join(association, association.c.shop_item_id == sales.c.shop_item_id)
+        .group_by(association.c.category_id)
+        .subquery("category_sales")
+    )
+    revenue = func.coalesce(category_sales.c.revenue, 0.0).label("revenue")
+    rows = db.execute(
+        select(
+            models.ShopItemCategory.id,
+            models.ShopItemCategory.title,
+            func.coalesce(category_sales.c.units_sold, 0),
+            revenue,
+        )
+        .outerjoin(category_sales, category_sales.c.category_id == models.ShopItemCategory.id)
+        .order_by(revenue.desc(), models.ShopItemCategory.id)
+    ).all()
+    return [
+        schemas.CategorySales(category_id=category_id, title=title, units_sold=units_sold, revenue=round(revenue, 2))
+        for category_id, title, units_sold, revenue in rows
+    ]
+
+
+def get_basket_sizes(db: Session) -> schemas.BasketSizeDistribution:
+    """Number of orders by number of lines, including orders with none."""
+    lines_per_order = (
+        select(func.count().label("lines"))
+        .select_from(models.OrderItem)
+        .group_by(models.OrderItem.order_id)
+        .subquery("lines_per_order")
+    )
+    counts = dict(db.execute(
+        select(lines_per_order.c.lines, func.count()).group_by(lines_per_order.c.lines)
+    ).all())
+    order_count = db.query(func.count(models.Order.id)).scalar()
+    empty = order_count - sum(counts.values())
+    if empty > 0:
+        counts[0] = empty
+    total_lines = sum(lines * orders for lines, orders in counts.items())
+    return schemas.BasketSizeDistribution(
+        orders=order_count,
+        mean_lines=round(total_lines / order_count, 3) if order_count else 0.0,
+        buckets=[schemas.BasketSizeBucket(lines=lines, orders=orders) for lines, orders in sorted(counts.items())],
+    )
+
+
+def get_item_sales_cached(
+    db: Session, metric: schemas.SalesMetric = schemas.SalesMetric.revenue, skip: int = 0, limit: int = 100
+) -> List[schemas.ItemSales]:
+    return analytics_cache.get_or_load(
+        ("analytics", get_versions(db, ANALYTICS_RESOURCES), "items", metric.value, skip, limit),
+        lambda: get_item_sales(db, metric=metric, skip=skip, limit=limit),
+    )
+
+
+def get_category_sales_cached(db: Session) -> List[schemas.CategorySales]:
+    return analytics_cache.get_or_load(
+        ("analytics", get_versions(db, ANALYTICS_RESOURCES), "categories"), lambda: get_category_sales(db)
+    )
+
+
+def get_basket_sizes_cached(db: Session) -> schemas.BasketSizeDistribution:
+    return analytics_cache.get_or_load(
+        ("analytics", get_versions(db, ANALYTICS_RESOURCES), "basket_sizes"), lambda: get_basket_sizes(db)
+    )
+
+
+def order_export_statement():
+    """One row per order line, flattened with the customer and captured price.
+
+    Orders without lines produce a single row with empty line columns.
+    """
+    return (
+        select(
+            models.Order.id.label("order_id"),
+            models.Order.customer_id,
+            models.Customer.name.label("customer_name"),
+            models.Customer.surname.label("customer_surname"),
+            models.Customer.email.label("customer_email"),
+            models.OrderItem.id.label("line_id"),
+            models.OrderItem.shop_item_id,
+            models.ShopItem.title.label("shop_item_title"),
+            models.OrderItem.quantity,
+            models.OrderItem.unit_price,
+            (models.OrderItem.quantity * models.OrderItem.unit_price).label("line_total"),
+        )
+        .join(models.Customer, models.Customer.id == models.Order.customer_id)
+        .outerjoin(models.OrderItem, models.OrderItem.order_id == models.Order.id)
+        .outerjoin(models.ShopItem, models.ShopItem.id == models.OrderItem.shop_item_id)
+        .order_by(models.Order.id, models.OrderItem.id)
+    )
+
+
+# Bulk import
+#
+# Rows arrive as (index, schema) pairs so errors can be reported against the
+# caller's input. Each chunk is inserted with multi-row INSERT ... RETURNING
+# statements and committed as its own transaction.
+BULK_CHUNK_SIZE = 1000
+
+
+def _insert_returning_ids(db: Session, table, rows: Sequence[Tuple[int, dict]]):
+    result = db.execute(insert(table).returning(table.c.id), [values for _, values in rows])
+    return {index: row.id for (index, _), row in zip(rows, _in_parameter_order(result))}
+
+
+def _bulk_import(db: Session, resource: str, rows: Sequence[Tuple[int, dict]], insert_chunk: Callable):
+    ids: Dict[int, int] = {}
+    errors: List[schemas.BulkError] = []
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        try:
+            ids.update(insert_chunk(chunk))
+            _bump_versions(db, resource)
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            # Retry the chunk row by row to find the offending rows
+            for row in chunk:
+                try:
+                    ids.update(insert_chunk([row]))
+                    _bump_versions(db, resource)
+                    db.commit()
+                except IntegrityError as e:
+                    db.rollback()
+                    errors.append(schemas.BulkError(index=row[0], detail=str(e.orig)))
+    return ids, errors
+
+
+def bulk_create_customers(db: Session, customers: Sequence[Tuple[int, schemas.CustomerCreate]]):
+    table = models.Customer.__table__
+    errors = []
+
+    # Reject emails that already exist or repeat within the batch up front
+    emails = [customer.email for _, customer in customers]
+    existing = set()
+    for start in range(0, len(emails), BULK_CHUNK_SIZE):
+        existing.update(email for (email,) in db.query(models.Customer.email).filter(
+            models.Customer.email.in_(emails[start:start + BULK_CHUNK_SIZE])
+        ))
+    rows = []
+    for index, customer in customers:
+        if customer.email in existing:
+            errors.append(schemas.BulkError(index=index, detail=f"Email {customer.email} already registered"))
+            continue
+        existing.add(customer.email)
+        rows.append((index, customer.model_dump()))
+
+    ids, insert_errors = _bulk_import(
+        db, "customers", rows, lambda chunk: _insert_returning_ids(db, table, chunk)
+    )
+    return ids, errors + insert_errors
+
+
+def bulk_create_categories(db: Session, categories: Sequence[Tuple[int, schemas.ShopItemCategoryCreate]]):
+    table = models.ShopItemCategory.__table__
+    rows = [(index, category.model_dump()) for index, category in categories]
+    ids, errors = _bulk_import(
+        db, "categories", rows, lambda chunk: _insert_returning_ids(db, table, chunk)
+    )
+    catalogue_cache.invalidate("categories")
+    return ids, errors
+
+
+def bulk_create_shop_items(db: Session, items: Sequence[Tuple[int, schemas.ShopItemCreate]]):
+    table = models.ShopItem.__table__
+    errors = []
+
+    # Resolve the categories of the whole batch with a single query
+    category_ids = {category_id for _, item in items for category_id in item.category_ids}
+    known_category_ids = {
+        category_id for (category_id,) in db.query(models.ShopItemCategory.id).filter(
+            models.ShopItemCategory.id.in_(category_ids)
+        )
+    } if category_ids else set()
+
+    rows = []
+    item_category_ids = {}
+    for index, item in items:
+        unknown = sorted(set(item.category_ids) - known_category_ids)
+        if unknown:
+            errors.append(schemas.BulkError(index=index, detail=f"Unknown category ids: {unknown}"))
+            continue
+        rows.append((index, item.model_dump(exclude={"category_ids"})))
+        item_category_ids[index] = set(item.category_ids)
+
+    def insert_chunk(chunk):
+        chunk_ids = _insert_returning_ids(db, table, chunk)
+        links = [
+            {"shop_item_id": chunk_ids[index], "category_id": category_id}
+            for index, _ in chunk
+            for category_id in item_category_ids[index]
+        ]
+        if links:
+            db.execute(insert(models.shop_item_category_association), links)
+        return chunk_ids
+
+    ids, insert_errors = _bulk_import(db, "shop_items", rows, insert_chunk)
+    catalogue_cache.invalidate("shop_items")
+    return ids, errors + insert_errors
@@ -1,17 +1,71 @@
-from sqlalchemy import create_engine
+from typing import Dict
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .config import settings
+from .migrations import immediate_transaction, migrate
 from .models import Base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./shop.db"
+SQLALCHEMY_DATABASE_URL = settings.database_url
+ASYNC_SQLALCHEMY_DATABASE_URL = make_url(SQLALCHEMY_DATABASE_URL).set(drivername="sqlite+aiosqlite")
+
+
+def configure_sqlite(engine: Engine, pragmas: Dict[str, object]):
+    """Apply `pragmas` to every new connection of `engine`.
+
+    Foreign keys are enforced whatever the pragmas, SQLite leaves them off by
+    default.
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _pool_args(url, poolclass) -> dict:
+    # In-memory databases live on a single connection and are not pooled
+    if make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+    }
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    **_pool_args(SQLALCHEMY_DATABASE_URL, QueuePool)
+)
+configure_sqlite(engine, settings.sqlite_pragmas)
+# Committed objects keep their loaded state, so responses built inside a
+# write do not need to be reloaded from the database.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    **_pool_args(ASYNC_SQLALCHEMY_DATABASE_URL, AsyncAdaptedQueuePool)
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+configure_sqlite(async_engine.sync_engine, settings.sqlite_pragmas)
+# Lazy loading is not available outside of the session's greenlet once a
+# route starts serializing, so objects must also stay loaded after commit.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
+    # Under the write lock, so workers starting together do not race to
+    # create the same tables
+    with immediate_transaction(engine) as connection:
+        Base.metadata.create_all(bind=connection)
+    migrate(engine)
 
 
 def get_db():
@@ -19,4 +73,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
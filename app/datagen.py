@@ -0,0 +1,212 @@
+"""Synthetic data generator for benchmarks and tests.
+
+Rows are generated deterministically from a seed and bulk-loaded with batched
+Core inserts in a single transaction. Distributions aim to resemble a real
+shop: item popularity and customer activity follow Zipf's law, items belong
+to one or more categories, most orders are small and prices are log-normal.
+
+    python -m app.manage generate --scale small --seed 42
+"""
+import itertools
+import math
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+from . import models
+from .crud import bump_versions_statement
+
+BATCH_SIZE = 10000
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda", "William", "Elizabeth",
+    "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen",
+    "Daniel", "Nancy", "Matthew", "Lisa", "Anthony", "Betty", "Mark", "Margaret", "Donald", "Sandra",
+]
+SURNAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin",
+    "Lee", "Perez", "Thompson", "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson",
+]
+ADJECTIVES = [
+    "Classic", "Compact", "Deluxe", "Eco", "Essential", "Portable", "Premium", "Pro", "Smart", "Ultra",
+    "Vintage", "Wireless", "Handmade", "Organic", "Heavy-Duty", "Lightweight", "Modern", "Rustic",
+]
+NOUNS = [
+    "Lamp", "Chair", "Backpack", "Headphones", "Kettle", "Notebook", "Jacket", "Speaker", "Blender", "Mug",
+    "Keyboard", "Monitor", "Sneakers", "Watch", "Camera", "Tent", "Novel", "Drill", "Pan", "Sofa",
+    "Scarf", "Router", "Bicycle", "Candle", "Planter", "Desk", "Blanket", "Charger", "Guitar", "Puzzle",
+]
+
+
+@dataclass
+class Scale:
+    """Number of rows to generate for each table."""
+    customers: int = 10000
+    categories: int = 50
+    shop_items: int = 100000
+    order_lines: int = 1000000
+    # Orders have between 1 and this many lines, smaller ones being likelier
+    max_lines_per_order: int = 8
+    max_categories_per_item: int = 3
+    # Zipf exponents; 0 is uniform, higher concentrates on fewer rows
+    item_popularity_skew: float = 1.1
+    customer_activity_skew: float = 0.8
+
+
+SCALES: Dict[str, Scale] = {
+    "tiny": Scale(customers=100, categories=10, shop_items=500, order_lines=2000),
+    "small": Scale(customers=1000, categories=20, shop_items=10000, order_lines=100000),
+    "medium": Scale(customers=5000, categories=40, shop_items=50000, order_lines=500000),
+    "large": Scale(),
+}
+
+
+def _zipf_cum_weights(n: int, skew: float) -> List[float]:
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, n + 1)))
+
+
+def _geometric_cum_weights(n: int, ratio: float) -> List[float]:
+    return list(itertools.accumulate(ratio ** k for k in range(n)))
+
+
+class _Sampler:
+    """Draws ids with Zipf-distributed popularity.
+
+    Popularity ranks are assigned to ids in a random order, so the most
+    popular rows are spread over the table instead of being the lowest ids.
+    """
+
+    def __init__(self, rng: random.Random, n: int, skew: float):
+        self.rng = rng
+        self.ids = list(range(1, n + 1))
+        rng.shuffle(self.ids)
+        self.cum_weights = _zipf_cum_weights(n, skew)
+
+    def sample(self, k: int) -> List[int]:
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+
+def _insert_batches(connection, table, rows: Iterable[dict]) -> int:
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(insert(table), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+        count += len(batch)
+    return count
+
+
+def _customers(rng: random.Random, scale: Scale):
+    for i in range(1, scale.customers + 1):
+        name = rng.choice(FIRST_NAMES)
+        surname = rng.choice(SURNAMES)
+        yield {"name": name, "surname": surname, "email": f"{name}.{surname}.{i}@example.com".lower()}
+
+
+def _categories(scale: Scale):
+    for i in range(1, scale.categories + 1):
+        noun = NOUNS[(i - 1) % len(NOUNS)]
+        yield {"title": f"{noun} {i}", "description": f"{noun} and accessories"}
+
+
+def _shop_items(rng: random.Random, scale: Scale, prices: List[float]):
+    for i in range(1, scale.shop_items + 1):
+        adjective = rng.choice(ADJECTIVES)
+        noun = rng.choice(NOUNS)
+        # Log-normal prices: most items are cheap, a few are expensive
+        price = round(min(max(rng.lognormvariate(math.log(25), 1.0), 0.5), 5000), 2)
+        prices.append(price)
+        yield {
+            "title": f"{adjective} {noun} {i}",
+            "description": f"{adjective} {noun.lower()}, item {i}",
+            "price": price,
+        }
+
+
+def _item_categories(rng: random.Random, scale: Scale):
+    if not scale.categories:
+        return
+    categories = _Sampler(rng, scale.categories, 0.5)
+    sizes = range(1, min(scale.max_categories_per_item, scale.categories) + 1)
+    size_weights = _geometric_cum_weights(len(sizes), 0.4)
+    for item_id in range(1, scale.shop_items + 1):
+        size = rng.choices(sizes, cum_weights=size_weights)[0]
+        category_ids = set()
+        while len(category_ids) < size:
+            category_ids.update(categories.sample(size - len(category_ids)))
+        for category_id in sorted(category_ids):
+            yield {"shop_item_id": item_id, "category_id": category_id}
+
+
+def _insert_orders(connection, rng: random.Random, scale: Scale, prices: List[float]):
+    if not (scale.order_lines and scale.customers and scale.shop_items):
+        return 0, 0
+    customers = _Sampler(rng, scale.customers, scale.customer_activity_skew)
+    items = _Sampler(rng, scale.shop_items, scale.item_popularity_skew)
+    sizes = range(1, scale.max_lines_per_order + 1)
+    size_weights = _geometric_cum_weights(len(sizes), 0.6)
+    quantities = (1, 2, 3, 4, 5)
+    quantity_weights = (60, 80, 90, 95, 100)
+
+    orders_table = models.Order.__table__
+    lines_table = models.OrderItem.__table__
+    order_count = 0
+    orders = []
+    lines = []
+    remaining = scale.order_lines
+    # Orders go in before their lines, one batch of lines at a time
+    while remaining > 0:
+        order_count += 1
+        customer_id = customers.sample(1)[0]
+        size = min(rng.choices(sizes, cum_weights=size_weights)[0], remaining)
+        total = 0.0
+        for shop_item_id, quantity in zip(
+            items.sample(size), rng.choices(quantities, cum_weights=quantity_weights, k=size)
+        ):
+            unit_price = prices[shop_item_id - 1]
+            total += quantity * unit_price
+            lines.append({
+                "order_id": order_count, "shop_item_id": shop_item_id, "quantity": quantity, "unit_price": unit_price,
+            })
+        orders.append({"id": order_count, "customer_id": customer_id, "total": round(total, 2)})
+        remaining -= size
+        if len(lines) >= BATCH_SIZE or remaining == 0:
+            connection.execute(insert(orders_table), orders)
+            connection.execute(insert(lines_table), lines)
+            orders = []
+            lines = []
+    return order_count, scale.order_lines
+
+
+def generate(engine: Engine, scale: Scale, seed: int = 42) -> Dict[str, int]:
+    """Fill an empty database with `scale` rows, deterministically for `seed`.
+
+    Returns the number of rows inserted into each table.
+    """
+    rng = random.Random(seed)
+    prices: List[float] = []
+    with engine.begin() as connection:
+        if connection.execute(select(func.count()).select_from(models.Customer)).scalar():
+            raise RuntimeError("Refusing to generate data into a database that already has customers")
+
+        counts = {
+            "customers": _insert_batches(connection, models.Customer.__table__, _customers(rng, scale)),
+            "categories": _insert_batches(connection, models.ShopItemCategory.__table__, _categories(scale)),
+            "shop_items": _insert_batches(connection, models.ShopItem.__table__, _shop_items(rng, scale, prices)),
+            "item_categories": _insert_batches(
+                connection, models.shop_item_category_association, _item_categories(rng, scale)
+            ),
+        }
+        counts["orders"], counts["order_lines"] = _insert_orders(connection, rng, scale, prices)
+        # ETags and cache keys are built from the versions alone
+        connection.execute(bump_versions_statement("customers", "categories", "shop_items", "orders"))
+    return counts
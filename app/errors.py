@@ -0,0 +1,50 @@
+"""Errors raised by the CRUD layer and their HTTP responses.
+
+CRUD functions know nothing about HTTP; the handlers installed by
+`add_error_handlers` turn their exceptions into responses for every route.
+"""
+from typing import Dict, Iterable, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class MissingReferencesError(Exception):
+    """A write refers to rows that do not exist.
+
+    `missing` maps each field of the request to the ids it referred to that
+    were not found.
+    """
+
+    def __init__(self, missing: Dict[str, List[int]]):
+        super().__init__("; ".join(f"unknown {field}: {ids}" for field, ids in missing.items()))
+        self.missing = missing
+
+
+class InUseError(Exception):
+    """A delete would leave other rows referring to the deleted one."""
+
+
+def check_references(**missing: Iterable[int]):
+    """Raise `MissingReferencesError` for the fields with missing ids."""
+    missing = {field: sorted(set(ids)) for field, ids in missing.items()}
+    missing = {field: ids for field, ids in missing.items() if ids}
+    if missing:
+        raise MissingReferencesError(missing)
+
+
+async def missing_references_handler(request: Request, exc: MissingReferencesError) -> JSONResponse:
+    # Shaped like FastAPI's own validation errors
+    return JSONResponse(status_code=422, content={"detail": [
+        {"loc": ["body", field], "msg": f"Unknown ids: {ids}", "type": "missing_reference", "ids": ids}
+        for field, ids in exc.missing.items()
+    ]})
+
+
+async def in_use_handler(request: Request, exc: InUseError) -> JSONResponse:
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
+
+def add_error_handlers(app: FastAPI):
+    app.add_exception_handler(MissingReferencesError, missing_references_handler)
+    app.add_exception_handler(InUseError, in_use_handler)
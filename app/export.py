@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Iterator, Sequence
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .crud import order_export_statement
+
+# Rows fetched from the cursor at a time; memory use is bounded by one batch
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _encode(rows: Sequence, columns: Sequence[str], export_format: ExportFormat, header: bool) -> str:
+    if export_format == ExportFormat.ndjson:
+        return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_orders(engine: Engine, export_format: ExportFormat) -> Iterator[str]:
+    """Yield the order export in batches read from a server-side cursor.
+
+    The export uses its own connection so it does not depend on the request's
+    session still being open while the response streams.
+    """
+    with engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, yield_per=EXPORT_BATCH_SIZE
+        ).execute(order_export_statement())
+        columns = list(result.keys())
+        header = True
+        for rows in result.partitions():
+            yield _encode(rows, columns, export_format, header)
+            header = False
+        if header and export_format == ExportFormat.csv:
+            yield _encode([], columns, export_format, header)
+
+
+async def astream_orders(engine: AsyncEngine, export_format: ExportFormat) -> AsyncIterator[str]:
+    """Async counterpart of `stream_orders`."""
+    async with engine.connect() as connection:
+        result = await connection.stream(
+            order_export_statement(), execution_options={"yield_per": EXPORT_BATCH_SIZE}
+        )
+        columns = list(result.keys())
+        header = True
+        async for rows in result.partitions():
+            yield _encode(rows, columns, export_format, header)
+            header = False
+        if header and export_format == ExportFormat.csv:
+            yield _encode([], columns, export_format, header)
@@ -0,0 +1,224 @@
+"""Idempotency-Key support for order creation and bulk imports.
+
+Clients that retry a write send the same `Idempotency-Key` header with every
+attempt. The first attempt reserves the key before the route runs and stores
+its response; retries get the stored response back from a single primary key
+lookup, without running the write again. A key reused with a different
+request is rejected, as is a retry that arrives while the first attempt is
+still running.
+
+Only successful responses are stored: a failed write changed nothing, so the
+key is released and the request can be retried as is. Keys live in the
+`idempotency_keys` table for `SHOP_IDEMPOTENCY_TTL` seconds and are purged in
+the background.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from . import models
+from .config import settings
+from .database import get_db
+
+logger = logging.getLogger("app.idempotency")
+
+HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+# POST routes whose responses are stored, without their trailing slash
+IDEMPOTENT_PATHS = frozenset({"/orders", "/customers/bulk", "/categories/bulk", "/shop-items/bulk"})
+
+
+def _hash(*parts: bytes) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        # Length-prefixed, so different splits of the same bytes differ
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.digest()
+
+
+def reserve(db: Session, key_hash: bytes, fingerprint: bytes, now: float) -> Optional[models.IdempotencyKey]:
+    """Reserve a key for the request with `fingerprint`.
+
+    Returns None when the key is now reserved for this request, or the live
+    entry of an earlier request that holds it.
+    """
+    entry = db.get(models.IdempotencyKey, key_hash)
+    if entry is not None and entry.expires_at > now:
+        return entry
+
+    # Expired entries are taken over in place
+    values = {
+        "fingerprint": fingerprint,
+        "status_code": None,
+        "content_type": None,
+        "body": None,
+        "expires_at": now + settings.idempotency_lock_timeout,
+    }
+    statement = sqlite_insert(models.IdempotencyKey).values(key_hash=key_hash, **values)
+    result = db.execute(statement.on_conflict_do_update(
+        index_elements=[models.IdempotencyKey.key_hash],
+        set_=values,
+        where=models.IdempotencyKey.expires_at <= now,
+    ))
+    db.commit()
+    if result.rowcount:
+        return None
+    # Another request reserved the key in the meantime
+    db.expire_all()
+    return db.get(models.IdempotencyKey, key_hash)
+
+
+def complete(db: Session, key_hash: bytes, status_code: int, content_type: Optional[str], body: bytes, now: float):
+    db.query(models.IdempotencyKey).filter(models.IdempotencyKey.key_hash == key_hash).update({
+        "status_code": status_code,
+        "content_type": content_type,
+        "body": body,
+        "expires_at": now + settings.idempotency_ttl,
+    })
+    db.commit()
+
+
+def release(db: Session, key_hash: bytes):
+    db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.key_hash == key_hash, models.IdempotencyKey.status_code.is_(None)
+    ).delete()
+    db.commit()
+
+
+def purge_expired(db: Session, now: float) -> int:
+    """Delete the expired keys and return how many there were."""
+    count = db.query(models.IdempotencyKey).filter(models.IdempotencyKey.expires_at <= now).delete()
+    db.commit()
+    return count
+
+
+def _with_session(app, function: Callable, *args):
+    # Sessions come from the app's `get_db`, so dependency overrides apply
+    sessions = app.dependency_overrides.get(get_db, get_db)()
+    db = next(sessions)
+    try:
+        return function(db, *args)
+    finally:
+        sessions.close()
+
+
+async def purge_periodically(app, interval: float):
+    """Purge expired keys every `interval` seconds until cancelled."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            count = await run_in_threadpool(_with_session, app, purge_expired, time.time())
+        except Exception:
+            logger.exception("Purging idempotency keys failed")
+        else:
+            if count:
+                logger.info("Purged %d expired idempotency keys", count)
+
+
+class IdempotencyMiddleware:
+    """Replay the stored response of writes retried with an Idempotency-Key.
+
+    Runs with a blocking session from the threadpool in both database modes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"].rstrip("/") not in IDEMPOTENT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+        key = Headers(scope=scope).get(HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        # The whole body goes into the fingerprint, so it is read up front
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        app = scope["app"]
+        key_hash = _hash(key.encode())
+        fingerprint = _hash(scope["path"].rstrip("/").encode(), scope.get("query_string", b""), body)
+        entry = await run_in_threadpool(_with_session, app, reserve, key_hash, fingerprint, time.time())
+        if entry is not None:
+            await self._respond_to_retry(entry, fingerprint, scope, receive, send)
+            return
+
+        body_sent = False
+        status_code = None
+        content_type = None
+        response_chunks = []
+
+        async def receive_body():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_and_capture(message):
+            nonlocal status_code, content_type
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                content_type = Headers(raw=message.get("headers", [])).get("content-type")
+            elif message["type"] == "http.response.body":
+                response_chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_capture)
+        except Exception:
+            await run_in_threadpool(_with_session, app, release, key_hash)
+            raise
+        if status_code is not None and 200 <= status_code < 300:
+            await run_in_threadpool(
+                _with_session, app, complete, key_hash, status_code, content_type, b"".join(response_chunks),
+                time.time(),
+            )
+        else:
+            await run_in_threadpool(_with_session, app, release, key_hash)
+
+    async def _respond_to_retry(self, entry: models.IdempotencyKey, fingerprint: bytes, scope, receive, send):
+        if entry.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used with a different request"}, status_code=422
+            )
+        elif entry.status_code is None:
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still being processed"}, status_code=409
+            )
+        else:
+            headers = {REPLAYED_HEADER: "true"}
+            if entry.content_type is not None:
+                headers["content-type"] = entry.content_type
+            response = Response(content=entry.body, status_code=entry.status_code, headers=headers)
+        await response(scope, receive, send)
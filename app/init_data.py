@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from .database import SessionLocal
 from . import models
+from .crud import bump_versions_statement
 
 
 def init_test_data():
@@ -21,6 +22,7 @@ def init_test_data():
         
         for customer in customers:
             db.add(customer)
+        db.execute(bump_versions_statement("customers"))
         db.commit()
         
         # Create test categories
@@ -33,6 +35,7 @@ def init_test_data():
         
         for category in categories:
             db.add(category)
+        db.execute(bump_versions_statement("categories"))
         db.commit()
         
         # Refresh to get IDs
@@ -70,6 +73,7 @@ def init_test_data():
         
         for item in shop_items:
             db.add(item)
+        db.execute(bump_versions_statement("shop_items"))
         db.commit()
         
         # Refresh to get IDs
@@ -83,6 +87,7 @@ def init_test_data():
         shop_items[3].categories.append(categories[2])  # T-Shirt -> Clothing
         shop_items[4].categories.append(categories[3])  # Coffee Mug -> Home & Garden
         
+        db.execute(bump_versions_statement("shop_items"))
         db.commit()
         
         # Create test orders
@@ -93,6 +98,7 @@ def init_test_data():
         
         for order in orders:
             db.add(order)
+        db.execute(bump_versions_statement("orders"))
         db.commit()
         
         # Refresh to get IDs
@@ -101,14 +107,24 @@ def init_test_data():
         
         # Create test order items
         order_items = [
-            models.OrderItem(order_id=orders[0].id, shop_item_id=shop_items[0].id, quantity=1),  # John buys Laptop
-            models.OrderItem(order_id=orders[0].id, shop_item_id=shop_items[4].id, quantity=2),  # John buys 2 Coffee Mugs
-            models.OrderItem(order_id=orders[1].id, shop_item_id=shop_items[1].id, quantity=1),  # Jane buys Smartphone
-            models.OrderItem(order_id=orders[1].id, shop_item_id=shop_items[2].id, quantity=1),  # Jane buys Book
+            models.OrderItem(order_id=orders[0].id, shop_item_id=shop_items[0].id, quantity=1,
+                             unit_price=shop_items[0].price),  # John buys Laptop
+            models.OrderItem(order_id=orders[0].id, shop_item_id=shop_items[4].id, quantity=2,
+                             unit_price=shop_items[4].price),  # John buys 2 Coffee Mugs
+            models.OrderItem(order_id=orders[1].id, shop_item_id=shop_items[1].id, quantity=1,
+                             unit_price=shop_items[1].price),  # Jane buys Smartphone
+            models.OrderItem(order_id=orders[1].id, shop_item_id=shop_items[2].id, quantity=1,
+                             unit_price=shop_items[2].price),  # Jane buys Book
         ]
         
         for order_item in order_items:
             db.add(order_item)
+        for order in orders:
+            order.total = round(sum(
+                order_item.quantity * order_item.unit_price
+                for order_item in order_items if order_item.order_id == order.id
+            ), 2)
+        db.execute(bump_versions_statement("orders"))
         db.commit()
         
         print("Test data initialized successfully!")
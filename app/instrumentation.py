@@ -0,0 +1,123 @@
+import logging
+import time
+import weakref
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger("app.sql")
+
+# Upper bounds of the query count buckets; values above the last go to "+Inf"
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Statements are truncated in logs and metrics
+MAX_STATEMENT_LENGTH = 500
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+_instrumented_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+class RequestStats:
+    """SQL executed while serving one request."""
+
+    __slots__ = ("queries", "db_time", "slowest_statement", "slowest_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.slowest_time = 0.0
+
+    def record(self, statement: str, duration: float):
+        self.queries += 1
+        self.db_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    """Stats of the request being served, or None outside of a request."""
+    return _request_stats.get()
+
+
+def truncate_statement(statement: str) -> str:
+    statement = " ".join(statement.split())
+    if len(statement) > MAX_STATEMENT_LENGTH:
+        return statement[:MAX_STATEMENT_LENGTH] + "..."
+    return statement
+
+
+def instrument_engine(engine: Engine, slow_query_ms: Optional[float] = None):
+    """Time every statement of `engine` and attribute it to the current request.
+
+    Statements slower than `slow_query_ms` (default `SHOP_SLOW_QUERY_MS`) are
+    logged as warnings on the "app.sql" logger. Instrumenting an engine twice
+    is a no-op.
+    """
+    if engine in _instrumented_engines:
+        return
+    _instrumented_engines.add(engine)
+    threshold = (settings.slow_query_ms if slow_query_ms is None else slow_query_ms) / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.record(statement, duration)
+        if threshold > 0 and duration >= threshold:
+            logger.warning("Slow query (%.1f ms): %s", duration * 1000, truncate_statement(statement))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
+
+
+class SQLInstrumentationMiddleware:
+    """Collect SQL stats per request and report them in `Server-Timing`.
+
+    The stats are aggregated per route by `MetricsMiddleware`, which runs
+    inside this middleware.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                timing = (
+                    f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                    f"app;dur={elapsed_ms:.2f}"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
@@ -1,21 +1,68 @@
-from fastapi import FastAPI
-from .database import create_tables
-from .routers import customers, categories, shop_items, orders
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from starlette.concurrency import run_in_threadpool
+from .cache import analytics_cache, catalogue_cache
+from .config import settings
+from .database import async_engine, create_tables, engine
+from .errors import add_error_handlers
+from .idempotency import IdempotencyMiddleware, purge_periodically
 from .init_data import init_test_data
+from .instrumentation import SQLInstrumentationMiddleware, instrument_engine
+from .metrics import CONTENT_TYPE, MetricsMiddleware, instrument_pool, render_metrics, route_snapshot
+
+if settings.async_mode:
+    from .async_routers import analytics, customers, categories, shop_items, orders
+else:
+    from .routers import analytics, customers, categories, shop_items, orders
+
 
-app = FastAPI(title="Shop API", description="A simple shop API with FastAPI and SQLite", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema setup runs once per worker at startup rather than at import, and
+    # demo data is only written when asked for
+    if settings.init_db:
+        await run_in_threadpool(create_tables)
+    if settings.seed_data:
+        await run_in_threadpool(init_test_data)
+    purge = None
+    if settings.idempotency_purge_interval > 0:
+        purge = asyncio.create_task(purge_periodically(app, settings.idempotency_purge_interval))
+    yield
+    if purge is not None:
+        purge.cancel()
+    # Pooled aiosqlite connections each run on a non-daemon thread that would
+    # keep the process alive after the server stops
+    await async_engine.dispose()
+    engine.dispose()
 
-# Create tables
-create_tables()
 
-# Initialize test data
-init_test_data()
+app = FastAPI(
+    title="Shop API",
+    description="A simple shop API with FastAPI and SQLite",
+    version="1.0.0",
+    lifespan=lifespan,
+)
+# The SQL middleware is outermost, so its stats are complete when the
+# metrics middleware records them; replayed idempotent writes are still
+# counted by both
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(SQLInstrumentationMiddleware)
+add_error_handlers(app)
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
 
 # Include routers
 app.include_router(customers.router, prefix="/customers", tags=["customers"])
 app.include_router(categories.router, prefix="/categories", tags=["categories"])
 app.include_router(shop_items.router, prefix="/shop-items", tags=["shop-items"])
 app.include_router(orders.router, prefix="/orders", tags=["orders"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
 
 
 @app.get("/")
@@ -25,4 +72,20 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"catalogue": catalogue_cache.stats(), "analytics": analytics_cache.stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    # Served on the event loop, where the threadpool limiter lives
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/metrics/routes")
+def routes_metrics():
+    return {"routes": route_snapshot()}
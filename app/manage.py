@@ -0,0 +1,75 @@
+"""Management commands.
+
+    python -m app.manage init-db [--seed]
+    python -m app.manage generate [--scale small] [--seed 42] [--customers N ...]
+    python -m app.manage rebuild-search
+"""
+import argparse
+import dataclasses
+import sys
+import time
+from typing import List, Optional
+
+from .database import create_tables, engine
+from .datagen import SCALES, generate
+from .init_data import init_test_data
+from .migrations import LATEST_VERSION
+from .search import rebuild_search_index
+
+
+def init_db(args):
+    create_tables()
+    print(f"Database schema is at version {LATEST_VERSION}")
+    if args.seed:
+        init_test_data()
+
+
+def generate_data(args):
+    overrides = {
+        field.name: getattr(args, field.name)
+        for field in dataclasses.fields(SCALES[args.scale])
+        if getattr(args, field.name) is not None
+    }
+    scale = dataclasses.replace(SCALES[args.scale], **overrides)
+    create_tables()
+    start = time.perf_counter()
+    counts = generate(engine, scale, args.seed)
+    elapsed = time.perf_counter() - start
+    print(", ".join(f"{count} {table}" for table, count in counts.items()) + f" generated in {elapsed:.1f}s")
+
+
+def rebuild_search(args):
+    create_tables()
+    start = time.perf_counter()
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+    print(f"Search index rebuilt in {time.perf_counter() - start:.1f}s")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.manage", description="Shop API management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init_db_parser = commands.add_parser("init-db", help="Create the tables and apply pending migrations")
+    init_db_parser.add_argument("--seed", action="store_true", help="Add the demo data to an empty database")
+    init_db_parser.set_defaults(handler=init_db)
+
+    generate_parser = commands.add_parser("generate", help="Fill an empty database with synthetic data")
+    generate_parser.add_argument("--scale", choices=list(SCALES), default="small")
+    generate_parser.add_argument("--seed", type=int, default=42, help="Same seed, same data")
+    for field in dataclasses.fields(SCALES["small"]):
+        generate_parser.add_argument(
+            f"--{field.name.replace('_', '-')}", type=field.type, help=f"Override {field.name} of the scale"
+        )
+    generate_parser.set_defaults(handler=generate_data)
+
+    rebuild_search_parser = commands.add_parser("rebuild-search", help="Rebuild the full-text index of shop items")
+    rebuild_search_parser.set_defaults(handler=rebuild_search)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import anyio.to_thread
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .instrumentation import QUERY_COUNT_BUCKETS, UNMATCHED_ROUTE, current_request_stats, truncate_statement
+
+# Response appends the charset
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+DURATION_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Labels = Tuple[str, ...]
+
+
+class _Sharded:
+    """Base of metrics that keep one shard per thread.
+
+    Updates only touch the calling thread's shard, so they never wait on a
+    lock; the shards are summed when the metrics are scraped.
+    """
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        with self._lock:
+            shards = list(self._shards)
+        # Copying a dict is atomic under the GIL, iterating it is not
+        return [shard.copy() for shard in shards]
+
+
+class Counter(_Sharded):
+    type = "counter"
+
+    def inc(self, amount: float = 1, labels: Labels = ()):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def values(self) -> Dict[Labels, float]:
+        totals: Dict[Labels, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for labels, value in sorted(self.values().items()):
+            yield self.name, dict(zip(self.label_names, labels)), value
+
+
+class Gauge(Counter):
+    """Gauge moved up and down by the application, such as in-flight requests."""
+    type = "gauge"
+
+    def dec(self, amount: float = 1, labels: Labels = ()):
+        self.inc(-amount, labels)
+
+
+class Histogram(_Sharded):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], label_names: Sequence[str] = ()):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Labels = ()):
+        shard = self._shard()
+        # One slot per bucket, then +Inf, sum and count
+        slots = shard.get(labels)
+        if slots is None:
+            slots = shard[labels] = [0] * (len(self.buckets) + 3)
+        slots[bisect.bisect_left(self.buckets, value)] += 1
+        slots[-2] += value
+        slots[-1] += 1
+
+    def values(self) -> Dict[Labels, List[float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, slots in shard.items():
+                total = totals.setdefault(labels, [0] * len(slots))
+                for i, value in enumerate(list(slots)):
+                    total[i] += value
+        return totals
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for labels, slots in sorted(self.values().items()):
+            label_dict = dict(zip(self.label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), slots):
+                cumulative += count
+                yield f"{self.name}_bucket", {**label_dict, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_sum", label_dict, slots[-2]
+            yield f"{self.name}_count", label_dict, slots[-1]
+
+
+class Slowest(_Sharded):
+    """Slowest statement seen per label set; reported by `/metrics/routes`
+    rather than scraped."""
+
+    def observe(self, duration: float, statement: str, labels: Labels = ()):
+        shard = self._shard()
+        slowest = shard.get(labels)
+        if slowest is None or duration >= slowest[0]:
+            shard[labels] = (duration, statement)
+
+    def values(self) -> Dict[Labels, Tuple[float, str]]:
+        slowest: Dict[Labels, Tuple[float, str]] = {}
+        for shard in self._snapshots():
+            for labels, entry in shard.items():
+                if labels not in slowest or entry[0] >= slowest[labels][0]:
+                    slowest[labels] = entry
+        return slowest
+
+
+class CallbackGauge:
+    """Gauge read from the application state when scraped."""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.help = help
+        self.collect = collect
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for labels, value in self.collect():
+            yield self.name, labels, value
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render(metrics: Iterable) -> str:
+    """Render `metrics` in the Prometheus text exposition format."""
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        for name, labels, value in metric.samples():
+            if labels:
+                label_text = ",".join(f'{key}="{_escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+requests_total = Counter(
+    "shop_http_requests_total", "HTTP requests served.", ("method", "route", "status")
+)
+request_duration = Histogram(
+    "shop_http_request_duration_seconds", "HTTP request latency.", DURATION_BUCKETS_SECONDS, ("method", "route")
+)
+requests_in_flight = Gauge("shop_http_requests_in_flight", "HTTP requests being served.")
+db_queries_per_request = Histogram(
+    "shop_db_queries_per_request", "SQL statements issued per request.", QUERY_COUNT_BUCKETS, ("method", "route")
+)
+db_time = Histogram(
+    "shop_db_time_seconds", "Time spent in SQL statements per request.", DURATION_BUCKETS_SECONDS, ("method", "route")
+)
+db_pool_checkouts = Counter("shop_db_pool_checkouts_total", "Connections checked out of the pool.", ("engine",))
+orders_created = Counter("shop_orders_created_total", "Orders created.")
+order_lines_created = Counter("shop_order_lines_created_total", "Order lines created.")
+slowest_statements = Slowest("shop_db_slowest_statement", "Slowest SQL statement per route.", ("method", "route"))
+
+_pools: Dict[str, Engine] = {}
+
+
+def instrument_pool(engine: Engine, name: str):
+    """Count checkouts of `engine`'s pool and report its usage as `name`."""
+    if name in _pools:
+        return
+    _pools[name] = engine
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        db_pool_checkouts.inc(labels=(name,))
+
+
+def _pool_stat(method: str):
+    def collect():
+        for name, engine in sorted(_pools.items()):
+            stat = getattr(engine.pool, method, None)
+            if stat is not None:
+                # QueuePool counts overflow from -pool_size
+                yield {"engine": name}, max(stat(), 0)
+    return collect
+
+
+def _threadpool_stat(attribute: str):
+    def collect():
+        # The limiter belongs to the running event loop, which serves /metrics
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        if attribute == "tasks_waiting":
+            yield {}, limiter.statistics().tasks_waiting
+        else:
+            yield {}, getattr(limiter, attribute)
+    return collect
+
+
+process_metrics = [
+    CallbackGauge("shop_threadpool_threads_busy", "Threadpool workers running sync routes.",
+                  _threadpool_stat("borrowed_tokens")),
+    CallbackGauge("shop_threadpool_threads_max", "Threadpool size.", _threadpool_stat("total_tokens")),
+    CallbackGauge("shop_threadpool_tasks_waiting", "Sync routes waiting for a free worker.",
+                  _threadpool_stat("tasks_waiting")),
+    CallbackGauge("shop_db_pool_size", "Connections the pool keeps open.", _pool_stat("size")),
+    CallbackGauge("shop_db_pool_checked_out", "Connections in use.", _pool_stat("checkedout")),
+    CallbackGauge("shop_db_pool_overflow", "Connections in use beyond the pool size.", _pool_stat("overflow")),
+]
+
+REGISTRY = [
+    requests_total,
+    request_duration,
+    requests_in_flight,
+    db_queries_per_request,
+    db_time,
+    db_pool_checkouts,
+    orders_created,
+    order_lines_created,
+    *process_metrics,
+]
+
+
+def render_metrics() -> str:
+    return render(REGISTRY)
+
+
+def _histogram_snapshot(histogram: Histogram, slots: Optional[List[float]], scale: float = 1) -> dict:
+    if slots is None:
+        slots = [0] * (len(histogram.buckets) + 3)
+    buckets = {}
+    cumulative = 0
+    for bound, count in zip(histogram.buckets + (float("inf"),), slots):
+        cumulative += count
+        buckets[_format_value(bound * scale)] = cumulative
+    return {"count": slots[-1], "sum": round(slots[-2] * scale, 3), "buckets": buckets}
+
+
+def _route_key(labels: Labels) -> str:
+    # Unmatched requests are reported together whatever their method
+    method, route = labels
+    return route if route == UNMATCHED_ROUTE else f"{method} {route}"
+
+
+def _by_route(values: Dict[Labels, List[float]]) -> Dict[str, List[float]]:
+    routes: Dict[str, List[float]] = {}
+    for labels, slots in values.items():
+        total = routes.setdefault(_route_key(labels), [0] * len(slots))
+        for i, value in enumerate(slots):
+            total[i] += value
+    return routes
+
+
+def route_snapshot() -> Dict[str, dict]:
+    """Latency, DB time and query count histograms of each route, in
+    milliseconds, with the slowest statement seen."""
+    durations = _by_route(request_duration.values())
+    db_times = _by_route(db_time.values())
+    queries = _by_route(db_queries_per_request.values())
+    slowest: Dict[str, Tuple[float, str]] = {}
+    for labels, entry in slowest_statements.values().items():
+        key = _route_key(labels)
+        if key not in slowest or entry[0] >= slowest[key][0]:
+            slowest[key] = entry
+    routes = {}
+    for route in sorted(durations):
+        slowest_time, slowest_statement = slowest.get(route, (0.0, None))
+        routes[route] = {
+            "latency_ms": _histogram_snapshot(request_duration, durations[route], 1000),
+            "db_time_ms": _histogram_snapshot(db_time, db_times.get(route), 1000),
+            "queries": _histogram_snapshot(db_queries_per_request, queries.get(route)),
+            "slowest_statement": None if slowest_statement is None else truncate_statement(slowest_statement),
+            "slowest_statement_ms": round(slowest_time * 1000, 3),
+        }
+    return routes
+
+
+class MetricsMiddleware:
+    """Count requests and time them per method and route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+        requests_in_flight.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            labels = (scope["method"], getattr(scope.get("route"), "path", UNMATCHED_ROUTE))
+            request_duration.observe(time.perf_counter() - start, labels)
+            requests_total.inc(labels=labels + (str(status),))
+            stats = current_request_stats()
+            if stats is not None:
+                db_queries_per_request.observe(stats.queries, labels)
+                db_time.observe(stats.db_time, labels)
+                if stats.slowest_statement is not None:
+                    slowest_statements.observe(stats.slowest_time, stats.slowest_statement, labels)
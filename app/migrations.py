@@ -0,0 +1,152 @@
+"""Schema migrations for existing databases.
+
+`Base.metadata.create_all` only creates missing tables, so changes to tables
+that already exist are applied here. Migrations are numbered and the number of
+the last one applied is kept in SQLite's `user_version` pragma. Each migration
+is idempotent, which lets a database freshly created by `create_all` be
+stamped with the latest version by running them all.
+
+Each migration commits together with its version stamp. pysqlite does not
+open transactions for DDL or pragmas, so the transactions are begun here
+with `BEGIN IMMEDIATE`, which also keeps concurrent processes from running
+the same migration twice.
+"""
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection, Engine
+
+from . import models
+from .search import create_search_index
+
+
+def _create_indexes(connection: Connection, *names: str):
+    indexes = {
+        index.name: index
+        for table in models.Base.metadata.sorted_tables
+        for index in table.indexes
+    }
+    for name in names:
+        indexes[name].create(connection, checkfirst=True)
+
+
+def _add_secondary_indexes(connection: Connection):
+    # ix_order_items_shop_item_id used to be created here too; migration 5
+    # replaced it with ix_order_items_sales
+    _create_indexes(
+        connection,
+        "ix_orders_customer_id",
+        "ix_order_items_order_id",
+        "ix_shop_item_category_association_category_id",
+        "ix_customers_surname",
+        "ix_shop_items_title",
+    )
+
+
+def _add_shop_item_price_index(connection: Connection):
+    _create_indexes(connection, "ix_shop_items_price")
+
+
+def _add_shop_item_search(connection: Connection):
+    create_search_index(connection)
+
+
+def _add_order_item_sales_index(connection: Connection):
+    # Spelled out because migration 5 changes the model's definition
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_order_items_sales ON order_items (shop_item_id, quantity)"
+    )
+
+
+def _column_names(connection: Connection, table: str) -> List[str]:
+    return [column["name"] for column in inspect(connection).get_columns(table)]
+
+
+def _add_order_totals(connection: Connection):
+    if "unit_price" not in _column_names(connection, "order_items"):
+        connection.exec_driver_sql("ALTER TABLE order_items ADD COLUMN unit_price FLOAT")
+        # Prices were not recorded before, the current ones are the best guess
+        connection.exec_driver_sql(
+            "UPDATE order_items SET unit_price = "
+            "(SELECT price FROM shop_items WHERE shop_items.id = order_items.shop_item_id)"
+        )
+    if "total" not in _column_names(connection, "orders"):
+        connection.exec_driver_sql("ALTER TABLE orders ADD COLUMN total FLOAT NOT NULL DEFAULT 0")
+        connection.exec_driver_sql(
+            "UPDATE orders SET total = COALESCE("
+            "(SELECT ROUND(SUM(quantity * unit_price), 2) FROM order_items WHERE order_items.order_id = orders.id), 0)"
+        )
+    sales_index = {
+        index["name"]: index["column_names"] for index in inspect(connection).get_indexes("order_items")
+    }.get("ix_order_items_sales")
+    if sales_index is not None and "unit_price" not in sales_index:
+        connection.exec_driver_sql("DROP INDEX ix_order_items_sales")
+    _create_indexes(connection, "ix_order_items_sales")
+    # Lookups by shop item are served by the sales index's leading column
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_order_items_shop_item_id")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Add indexes on foreign keys and lookup columns", _add_secondary_indexes),
+    (2, "Add an index on shop item prices for sorting and price filters", _add_shop_item_price_index),
+    (3, "Add a full-text index of shop items", _add_shop_item_search),
+    (4, "Add a covering index for sales analytics", _add_order_item_sales_index),
+    (5, "Capture unit prices on order lines and store order totals", _add_order_totals),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(connection: Connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+# Workers starting together wait this long for another one's schema setup,
+# which can include a backfill of every order line
+SCHEMA_LOCK_TIMEOUT_MS = 120000
+
+
+@contextmanager
+def immediate_transaction(engine: Engine) -> Iterator[Connection]:
+    """A connection in a transaction holding SQLite's write lock.
+
+    The driver is left in autocommit mode so that it neither commits around
+    DDL nor ignores it; the transaction covers every statement issued on the
+    connection, schema changes included.
+    """
+    with engine.connect() as connection:
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        busy_timeout = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        connection.exec_driver_sql(f"PRAGMA busy_timeout = {SCHEMA_LOCK_TIMEOUT_MS}")
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.exec_driver_sql("ROLLBACK")
+                raise
+            connection.exec_driver_sql("COMMIT")
+        finally:
+            connection.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+
+
+def migrate(engine: Engine) -> List[int]:
+    """Apply pending migrations to the database and return their numbers."""
+    applied = []
+    for number, description, upgrade in MIGRATIONS:
+        with immediate_transaction(engine) as connection:
+            # Read under the lock, another process may have just applied it
+            if get_version(connection) >= number:
+                continue
+            upgrade(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {number}")
+        applied.append(number)
+    return applied
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    applied = migrate(engine)
+    print(f"Applied migrations: {applied}" if applied else "Database is up to date")
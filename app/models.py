@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Table
+from sqlalchemy import DDL, Column, Integer, LargeBinary, String, Float, ForeignKey, Index, Table, event
 from sqlalchemy.orm import declarative_base, relationship
 
 Base = declarative_base()
@@ -8,7 +8,9 @@ shop_item_category_association = Table(
     'shop_item_category_association',
     Base.metadata,
     Column('shop_item_id', Integer, ForeignKey('shop_items.id'), primary_key=True),
-    Column('category_id', Integer, ForeignKey('shop_item_categories.id'), primary_key=True)
+    Column('category_id', Integer, ForeignKey('shop_item_categories.id'), primary_key=True),
+    # The primary key covers lookups by shop item, this covers lookups by category
+    Index('ix_shop_item_category_association_category_id', 'category_id', 'shop_item_id')
 )
 
 
@@ -17,7 +19,7 @@ class Customer(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    surname = Column(String, nullable=False)
+    surname = Column(String, nullable=False, index=True)
     email = Column(String, unique=True, nullable=False)
     
     # Relationship
@@ -39,9 +41,9 @@ class ShopItem(Base):
     __tablename__ = 'shop_items'
     
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
+    title = Column(String, nullable=False, index=True)
     description = Column(String)
-    price = Column(Float, nullable=False)
+    price = Column(Float, nullable=False, index=True)
     
     # Relationships
     categories = relationship("ShopItemCategory", secondary=shop_item_category_association, back_populates="shop_items")
@@ -52,7 +54,9 @@ class Order(Base):
     __tablename__ = 'orders'
     
     id = Column(Integer, primary_key=True, index=True)
-    customer_id = Column(Integer, ForeignKey('customers.id'), nullable=False)
+    customer_id = Column(Integer, ForeignKey('customers.id'), nullable=False, index=True)
+    # Sum of the lines' quantity * unit_price, kept up to date by every write
+    total = Column(Float, nullable=False, default=0.0, server_default='0')
     
     # Relationships
     customer = relationship("Customer", back_populates="orders")
@@ -63,10 +67,77 @@ class OrderItem(Base):
     __tablename__ = 'order_items'
     
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False)
+    order_id = Column(Integer, ForeignKey('orders.id'), nullable=False, index=True)
+    # Lookups by shop item use the leading column of ix_order_items_sales
     shop_item_id = Column(Integer, ForeignKey('shop_items.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
+    # Price of the item when the line was written; NULL if it was unknown
+    unit_price = Column(Float)
     
     # Relationships
     order = relationship("Order", back_populates="items")
-    shop_item = relationship("ShopItem", back_populates="order_items")
\ No newline at end of file
+    shop_item = relationship("ShopItem", back_populates="order_items")
+
+    __table_args__ = (
+        # Covers the per-item sales aggregates, which then never read the table
+        Index('ix_order_items_sales', 'shop_item_id', 'quantity', 'unit_price'),
+    )
+
+
+class ResourceVersion(Base):
+    __tablename__ = 'resource_versions'
+    
+    # One row per table, bumped by every write to it
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class IdempotencyKey(Base):
+    __tablename__ = 'idempotency_keys'
+    
+    # Hashes of the client's key and of the request it was first used with
+    key_hash = Column(LargeBinary, primary_key=True)
+    fingerprint = Column(LargeBinary, nullable=False)
+    # NULL while the first request is still running
+    status_code = Column(Integer)
+    content_type = Column(String)
+    body = Column(LargeBinary)
+    # Unix time after which the key may be reused and is purged
+    expires_at = Column(Float, nullable=False, index=True)
+
+
+# Full-text index of shop item titles and descriptions. The FTS5 table only
+# stores the index and reads the text from shop_items; triggers keep it in
+# sync with every write, including bulk inserts.
+SHOP_ITEM_SEARCH_DDL = [
+    DDL(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS shop_items_fts USING fts5("
+        "title, description, content='shop_items', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS shop_items_fts_insert AFTER INSERT ON shop_items BEGIN "
+        "INSERT INTO shop_items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+        "END"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS shop_items_fts_delete AFTER DELETE ON shop_items BEGIN "
+        "INSERT INTO shop_items_fts(shop_items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "END"
+    ),
+    DDL(
+        "CREATE TRIGGER IF NOT EXISTS shop_items_fts_update AFTER UPDATE OF title, description ON shop_items BEGIN "
+        "INSERT INTO shop_items_fts(shop_items_fts, rowid, title, description) "
+        "VALUES ('delete', old.id, old.title, old.description); "
+        "INSERT INTO shop_items_fts(rowid, title, description) VALUES (new.id, new.title, new.description); "
+        "END"
+    ),
+]
+
+for _ddl in SHOP_ITEM_SEARCH_DDL:
+    event.listen(ShopItem.__table__, "after_create", _ddl.execute_if(dialect="sqlite"))
+# The triggers go with the table; the index would otherwise outlive its rows
+event.listen(
+    ShopItem.__table__, "after_drop", DDL("DROP TABLE IF EXISTS shop_items_fts").execute_if(dialect="sqlite")
+)
@@ -0,0 +1,73 @@
+import base64
+import json
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int, sort: Optional[str] = None, key: Any = None) -> str:
+    """Encode the last row of a page as an opaque cursor.
+
+    Lists sorted by something other than the id also carry the sort and the
+    last row's sort key, so the next page starts right after it.
+    """
+    payload = {"id": last_id}
+    if sort is not None:
+        payload.update(sort=sort, key=key)
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        last_id = payload["id"]
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return payload
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Decode a cursor produced by `encode_cursor` back into a row id."""
+    if cursor is None:
+        return None
+    return _decode(cursor)["id"]
+
+
+def decode_sorted_cursor(cursor: Optional[str], sort: str) -> Optional[Tuple[Any, int]]:
+    """Decode the cursor of a list sorted by `sort` into (sort key, row id).
+
+    A cursor taken from a list with another sort order is rejected.
+    """
+    if cursor is None:
+        return None
+    payload = _decode(cursor)
+    if sort == "id" and "sort" not in payload:
+        return payload["id"], payload["id"]
+    if payload.get("sort") != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match the sort order")
+    return payload.get("key"), payload["id"]
+
+
+def _value(row: Any, name: str) -> Any:
+    return row[name] if isinstance(row, Mapping) else getattr(row, name)
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, sort: Optional[str] = None):
+    """Advertise the cursor of the following page when this page is full.
+
+    `sort` names the attribute the rows are sorted by, prefixed with "-" when
+    descending; the default is ascending ids. Rows are objects or dicts.
+    """
+    if rows and len(rows) >= limit:
+        last = rows[-1]
+        if sort is None or sort == "id":
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(_value(last, "id"))
+        else:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+                _value(last, "id"), sort, _value(last, sort.lstrip("-"))
+            )
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from typing import List
+
+from .. import crud, schemas
+from ..conditional import conditional_get
+from ..database import get_db
+
+router = APIRouter()
+check_etag = conditional_get(crud.ANALYTICS_RESOURCES)
+
+
+@router.get("/revenue/items", response_model=List[schemas.ItemSales], dependencies=[Depends(check_etag)])
+def read_item_revenue(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    return crud.get_item_sales_cached(db, metric=schemas.SalesMetric.revenue, skip=skip, limit=limit)
+
+
+@router.get("/revenue/categories", response_model=List[schemas.CategorySales], dependencies=[Depends(check_etag)])
+def read_category_revenue(db: Session = Depends(get_db)):
+    return crud.get_category_sales_cached(db)
+
+
+@router.get("/top-sellers", response_model=List[schemas.ItemSales], dependencies=[Depends(check_etag)])
+def read_top_sellers(
+    n: int = Query(10, ge=1, le=1000),
+    by: schemas.SalesMetric = schemas.SalesMetric.revenue,
+    db: Session = Depends(get_db),
+):
+    return crud.get_item_sales_cached(db, metric=by, limit=n)
+
+
+@router.get("/basket-sizes", response_model=schemas.BasketSizeDistribution, dependencies=[Depends(check_etag)])
+def read_basket_sizes(db: Session = Depends(get_db)):
+    return crud.get_basket_sizes_cached(db)
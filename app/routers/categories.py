@@ -1,11 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Union
 
 from .. import crud, schemas
+from ..bulk import BulkBatch, bulk_body, bulk_openapi
+from ..conditional import conditional_get
 from ..database import get_db
+from ..pagination import decode_cursor, decode_sorted_cursor, set_next_cursor
+from ..serialization import fast_json
 
 router = APIRouter()
+check_etag = conditional_get(crud.CATEGORY_RESOURCES)
+# The list may embed item counts and the items route returns shop items
+check_list_etag = conditional_get(crud.CATEGORY_COUNT_RESOURCES)
+check_items_etag = conditional_get(crud.SHOP_ITEM_RESOURCES)
 
 
 @router.post("/", response_model=schemas.ShopItemCategory)
@@ -13,20 +21,70 @@ def create_category(category: schemas.ShopItemCategoryCreate, db: Session = Depe
     return crud.create_category(db=db, category=category)
 
 
-@router.get("/", response_model=List[schemas.ShopItemCategory])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    categories = crud.get_categories(db, skip=skip, limit=limit)
+@router.post("/bulk", response_model=schemas.BulkResult, openapi_extra=bulk_openapi(schemas.ShopItemCategoryCreate))
+def bulk_create_categories(
+    batch: BulkBatch = Depends(bulk_body(schemas.ShopItemCategoryCreate)),
+    db: Session = Depends(get_db),
+):
+    ids, errors = crud.bulk_create_categories(db, batch.rows)
+    return batch.result(ids, errors)
+
+
+@router.get(
+    "/",
+    response_model=Union[List[schemas.ShopItemCategoryWithCount], List[schemas.ShopItemCategory]],
+    dependencies=[Depends(check_list_etag)],
+)
+def read_categories(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    with_counts: bool = Query(False, description="Include the number of items in each category"),
+    db: Session = Depends(get_db),
+):
+    get_categories = crud.get_categories_with_counts_cached if with_counts else crud.get_categories_cached
+    categories = get_categories(db, skip=skip, limit=limit, after_id=decode_cursor(cursor))
+    set_next_cursor(response, categories, limit)
     return categories
 
 
-@router.get("/{category_id}", response_model=schemas.ShopItemCategory)
+@router.get("/{category_id}", response_model=schemas.ShopItemCategory, dependencies=[Depends(check_etag)])
 def read_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = crud.get_category(db, category_id=category_id)
+    db_category = crud.get_category_cached(db, category_id=category_id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
     return db_category
 
 
+@router.get(
+    "/{category_id}/items", response_model=List[schemas.ShopItem], dependencies=[Depends(check_items_etag)]
+)
+def read_category_items(
+    category_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: schemas.ShopItemSort = schemas.ShopItemSort.id,
+    db: Session = Depends(get_db),
+):
+    if crud.get_category_cached(db, category_id=category_id) is None:
+        raise HTTPException(status_code=404, detail="Category not found")
+    after_key, after_id = decode_sorted_cursor(cursor, sort.value) or (None, None)
+    items = crud.get_shop_items_cached(
+        db,
+        skip=skip,
+        limit=limit,
+        after_id=after_id,
+        category_ids=(category_id,),
+        sort=sort.value,
+        after_key=after_key,
+    )
+    set_next_cursor(response, items, limit, sort.value)
+    return fast_json(items, response)
+
+
 @router.put("/{category_id}", response_model=schemas.ShopItemCategory)
 def update_category(category_id: int, category: schemas.ShopItemCategoryUpdate, db: Session = Depends(get_db)):
     db_category = crud.update_category(db, category_id=category_id, category=category)
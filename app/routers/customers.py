@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas
+from ..bulk import BulkBatch, bulk_body, bulk_openapi
+from ..conditional import conditional_get
 from ..database import get_db
+from ..pagination import decode_cursor, set_next_cursor
+from ..serialization import fast_json
 
 router = APIRouter()
+check_etag = conditional_get(crud.CUSTOMER_RESOURCES)
+check_orders_etag = conditional_get(crud.ORDER_RESOURCES)
 
 
 @router.post("/", response_model=schemas.Customer)
@@ -13,13 +19,29 @@ def create_customer(customer: schemas.CustomerCreate, db: Session = Depends(get_
     return crud.create_customer(db=db, customer=customer)
 
 
-@router.get("/", response_model=List[schemas.Customer])
-def read_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    customers = crud.get_customers(db, skip=skip, limit=limit)
+@router.post("/bulk", response_model=schemas.BulkResult, openapi_extra=bulk_openapi(schemas.CustomerCreate))
+def bulk_create_customers(
+    batch: BulkBatch = Depends(bulk_body(schemas.CustomerCreate)),
+    db: Session = Depends(get_db),
+):
+    ids, errors = crud.bulk_create_customers(db, batch.rows)
+    return batch.result(ids, errors)
+
+
+@router.get("/", response_model=List[schemas.Customer], dependencies=[Depends(check_etag)])
+def read_customers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    customers = crud.get_customers(db, skip=skip, limit=limit, after_id=decode_cursor(cursor))
+    set_next_cursor(response, customers, limit)
     return customers
 
 
-@router.get("/{customer_id}", response_model=schemas.Customer)
+@router.get("/{customer_id}", response_model=schemas.Customer, dependencies=[Depends(check_etag)])
 def read_customer(customer_id: int, db: Session = Depends(get_db)):
     db_customer = crud.get_customer(db, customer_id=customer_id)
     if db_customer is None:
@@ -27,6 +49,38 @@ def read_customer(customer_id: int, db: Session = Depends(get_db)):
     return db_customer
 
 
+@router.get(
+    "/{customer_id}/orders", response_model=List[schemas.Order], dependencies=[Depends(check_orders_etag)]
+)
+def read_customer_orders(
+    customer_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    orders = crud.get_order_rows(
+        db, skip=skip, limit=limit, after_id=decode_cursor(cursor), customer_id=customer_id
+    )
+    if not orders and crud.get_customer(db, customer_id=customer_id) is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    set_next_cursor(response, orders, limit)
+    return fast_json(orders, response)
+
+
+@router.get(
+    "/{customer_id}/orders/summary",
+    response_model=schemas.CustomerOrderSummary,
+    dependencies=[Depends(check_orders_etag)],
+)
+def read_customer_order_summary(customer_id: int, db: Session = Depends(get_db)):
+    summary = crud.get_customer_order_summary(db, customer_id=customer_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return summary
+
+
 @router.put("/{customer_id}", response_model=schemas.Customer)
 def update_customer(customer_id: int, customer: schemas.CustomerUpdate, db: Session = Depends(get_db)):
     db_customer = crud.update_customer(db, customer_id=customer_id, customer=customer)
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from .. import crud, schemas
+from ..conditional import conditional_get
 from ..database import get_db
+from ..export import ExportFormat, MEDIA_TYPES, stream_orders
+from ..pagination import decode_cursor, set_next_cursor
+from ..serialization import fast_json
 
 router = APIRouter()
+check_etag = conditional_get(crud.ORDER_RESOURCES)
 
 
 @router.post("/", response_model=schemas.Order)
@@ -13,13 +19,28 @@ def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db)):
     return crud.create_order(db=db, order=order)
 
 
-@router.get("/", response_model=List[schemas.Order])
-def read_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = crud.get_orders(db, skip=skip, limit=limit)
-    return orders
+@router.get("/", response_model=List[schemas.Order], dependencies=[Depends(check_etag)])
+def read_orders(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    orders = crud.get_order_rows(db, skip=skip, limit=limit, after_id=decode_cursor(cursor))
+    set_next_cursor(response, orders, limit)
+    return fast_json(orders, response)
 
 
-@router.get("/{order_id}", response_model=schemas.Order)
+@router.get("/export", response_class=StreamingResponse)
+def export_orders(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    db: Session = Depends(get_db),
+):
+    return StreamingResponse(stream_orders(db.get_bind(), export_format), media_type=MEDIA_TYPES[export_format])
+
+
+@router.get("/{order_id}", response_model=schemas.Order, dependencies=[Depends(check_etag)])
 def read_order(order_id: int, db: Session = Depends(get_db)):
     db_order = crud.get_order(db, order_id=order_id)
     if db_order is None:
@@ -35,6 +56,14 @@ def update_order(order_id: int, order: schemas.OrderUpdate, db: Session = Depend
     return db_order
 
 
+@router.patch("/{order_id}/items/{line_id}", response_model=schemas.OrderItem)
+def update_order_item(order_id: int, line_id: int, item: schemas.OrderItemUpdate, db: Session = Depends(get_db)):
+    db_order_item = crud.update_order_item(db, order_id=order_id, line_id=line_id, item=item)
+    if db_order_item is None:
+        raise HTTPException(status_code=404, detail="Order line not found")
+    return db_order_item
+
+
 @router.delete("/{order_id}", response_model=schemas.Order)
 def delete_order(order_id: int, db: Session = Depends(get_db)):
     db_order = crud.delete_order(db, order_id=order_id)
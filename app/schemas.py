@@ -1,3 +1,4 @@
+from enum import Enum
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -48,6 +49,10 @@ class ShopItemCategory(ShopItemCategoryBase):
         from_attributes = True
 
 
+class ShopItemCategoryWithCount(ShopItemCategory):
+    item_count: int
+
+
 # ShopItem Schemas
 class ShopItemBase(BaseModel):
     title: str
@@ -74,6 +79,15 @@ class ShopItem(ShopItemBase):
         from_attributes = True
 
 
+class ShopItemSort(str, Enum):
+    """Sort orders of the shop item list; "-" sorts descending."""
+    id = "id"
+    price = "price"
+    price_desc = "-price"
+    title = "title"
+    title_desc = "-title"
+
+
 # OrderItem Schemas
 class OrderItemBase(BaseModel):
     shop_item_id: int
@@ -84,8 +98,14 @@ class OrderItemCreate(OrderItemBase):
     pass
 
 
+class OrderItemUpdate(BaseModel):
+    shop_item_id: Optional[int] = None
+    quantity: Optional[int] = None
+
+
 class OrderItem(OrderItemBase):
     id: int
+    unit_price: Optional[float] = None
     shop_item: ShopItem
     
     class Config:
@@ -108,8 +128,61 @@ class OrderUpdate(BaseModel):
 
 class Order(OrderBase):
     id: int
+    total: float = 0.0
     customer: Customer
     items: List[OrderItem] = []
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class CustomerOrderSummary(BaseModel):
+    customer_id: int
+    order_count: int
+    lifetime_spend: float
+    last_order_id: Optional[int] = None
+
+
+# Analytics Schemas
+class SalesMetric(str, Enum):
+    revenue = "revenue"
+    units = "units"
+
+
+class ItemSales(BaseModel):
+    shop_item_id: int
+    title: str
+    units_sold: int
+    order_lines: int
+    revenue: float
+
+
+class CategorySales(BaseModel):
+    category_id: int
+    title: str
+    units_sold: int
+    revenue: float
+
+
+class BasketSizeBucket(BaseModel):
+    lines: int
+    orders: int
+
+
+class BasketSizeDistribution(BaseModel):
+    orders: int
+    mean_lines: float
+    buckets: List[BasketSizeBucket] = []
+
+
+# Bulk import Schemas
+class BulkError(BaseModel):
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel):
+    created: int
+    failed: int
+    ids: List[Optional[int]] = []
+    errors: List[BulkError] = []
@@ -0,0 +1,46 @@
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, table
+from sqlalchemy.engine import Connection
+
+from .models import SHOP_ITEM_SEARCH_DDL
+
+# The FTS5 index of shop items, see models.SHOP_ITEM_SEARCH_DDL
+shop_items_fts = table("shop_items_fts", column("rowid"), column("title"), column("description"))
+
+# BM25 weights of the indexed columns: title matches count ten times more
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching items that contain every word.
+
+    Each word is quoted, so FTS5 operators typed by users are searched for
+    literally, and matched as a prefix: "lap pro" finds "Laptop Professional".
+    Returns None when the text has no words.
+    """
+    tokens = _TOKEN.findall(query)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def rank():
+    """BM25 score of the current match; lower is more relevant."""
+    return func.bm25(literal_column("shop_items_fts"), TITLE_WEIGHT, DESCRIPTION_WEIGHT)
+
+
+def create_search_index(connection: Connection):
+    """Create the FTS5 table and its triggers if missing, then rebuild it."""
+    for ddl in SHOP_ITEM_SEARCH_DDL:
+        connection.execute(ddl)
+    rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection: Connection):
+    """Reindex every shop item, e.g. after rows were written with triggers off."""
+    connection.exec_driver_sql("INSERT INTO shop_items_fts(shop_items_fts) VALUES ('rebuild')")
@@ -0,0 +1,33 @@
+"""Fast JSON responses for the list endpoints.
+
+List routes build their pages as plain dicts shaped like the response schema
+and return them in a `FastJSONResponse`. FastAPI hands a returned response
+through untouched, so the rows skip the per-object validation and dump of
+`response_model`; the route keeps its `response_model` for the OpenAPI
+schema. Rows are encoded with orjson when it is installed.
+"""
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the standard library encoder is used instead
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+
+def fast_json(content: Any, response: Response) -> FastJSONResponse:
+    """Encode `content`, keeping the headers set on the route's `response`.
+
+    A returned response replaces the one FastAPI would build, so headers such
+    as the ETag and the next page cursor are copied over.
+    """
+    return FastJSONResponse(content, headers=dict(response.headers))
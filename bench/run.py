@@ -0,0 +1,339 @@
+"""Load test the Shop API in process and report throughput and latency.
+
+The benchmark seeds a SQLite database, then drives the real application
+through httpx's ASGI transport with concurrent clients, so it runs fully
+offline. Results are printed as JSON; pass `--baseline` with an earlier result
+to fail when a route got slower or started issuing more queries.
+
+    python -m bench.run --scale small --workload mixed --duration 10 --output bench.json
+    python -m bench.run --scale small --reuse --baseline bench.json
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.engine import Engine
+
+from app.datagen import SCALES, generate
+
+# Relative weights of the operations run by each workload
+WORKLOADS: Dict[str, Dict[str, int]] = {
+    "read-heavy": {
+        "list_shop_items": 20,
+        "read_shop_item": 30,
+        "list_categories": 10,
+        "read_customer": 10,
+        "list_orders": 10,
+        "read_order": 15,
+        "create_order": 4,
+        "update_shop_item": 1,
+    },
+    "mixed": {
+        "list_shop_items": 15,
+        "read_shop_item": 20,
+        "list_categories": 5,
+        "read_customer": 10,
+        "list_orders": 10,
+        "read_order": 15,
+        "create_order": 15,
+        "create_customer": 5,
+        "update_shop_item": 5,
+    },
+    "write-heavy": {
+        "read_shop_item": 10,
+        "read_order": 10,
+        "create_order": 60,
+        "create_customer": 10,
+        "update_shop_item": 10,
+    },
+}
+
+_request_queries: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "bench_request_queries", default=None
+)
+
+
+@dataclass
+class Dataset:
+    """Id ranges of the seeded rows the workload picks from."""
+    customers: int
+    categories: int
+    shop_items: int
+    orders: int
+
+
+class Operations:
+    """Builds the requests of each operation: (route, method, url, json body)."""
+
+    def __init__(self, dataset: Dataset, rng: random.Random):
+        self.dataset = dataset
+        self.rng = rng
+        self.created_customers = 0
+
+    def list_shop_items(self):
+        cursor_id = self.rng.randint(0, max(self.dataset.shop_items - 50, 0))
+        return "GET /shop-items/", "GET", f"/shop-items/?limit=50&cursor={_cursor(cursor_id)}", None
+
+    def read_shop_item(self):
+        return "GET /shop-items/{item_id}", "GET", f"/shop-items/{self.rng.randint(1, self.dataset.shop_items)}", None
+
+    def list_categories(self):
+        return "GET /categories/", "GET", "/categories/", None
+
+    def read_customer(self):
+        return "GET /customers/{customer_id}", "GET", f"/customers/{self.rng.randint(1, self.dataset.customers)}", None
+
+    def list_orders(self):
+        cursor_id = self.rng.randint(0, max(self.dataset.orders - 20, 0))
+        return "GET /orders/", "GET", f"/orders/?limit=20&cursor={_cursor(cursor_id)}", None
+
+    def read_order(self):
+        return "GET /orders/{order_id}", "GET", f"/orders/{self.rng.randint(1, self.dataset.orders)}", None
+
+    def create_order(self):
+        body = {
+            "customer_id": self.rng.randint(1, self.dataset.customers),
+            "items": [
+                {"shop_item_id": self.rng.randint(1, self.dataset.shop_items), "quantity": self.rng.randint(1, 5)}
+                for _ in range(self.rng.randint(1, 5))
+            ],
+        }
+        return "POST /orders/", "POST", "/orders/", body
+
+    def create_customer(self):
+        self.created_customers += 1
+        email = f"bench-{os.getpid()}-{time.monotonic_ns()}-{self.created_customers}@example.com"
+        return "POST /customers/", "POST", "/customers/", {"name": "Bench", "surname": "User", "email": email}
+
+    def update_shop_item(self):
+        item_id = self.rng.randint(1, self.dataset.shop_items)
+        body = {"price": round(self.rng.uniform(1, 500), 2)}
+        return "PUT /shop-items/{item_id}", "PUT", f"/shop-items/{item_id}", body
+
+
+def _cursor(last_id: int) -> str:
+    from app.pagination import encode_cursor
+    return encode_cursor(last_id)
+
+
+def load_dataset(engine: Engine) -> Dataset:
+    from app import models
+    with engine.connect() as connection:
+        def max_id(model):
+            return connection.execute(select(func.coalesce(func.max(model.id), 0))).scalar()
+        return Dataset(
+            customers=max_id(models.Customer),
+            categories=max_id(models.ShopItemCategory),
+            shop_items=max_id(models.ShopItem),
+            orders=max_id(models.Order),
+        )
+
+
+def count_queries(engine: Engine):
+    """Count the statements each request sends to `engine`."""
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return lambda: event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(percentile / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _summarize(samples: List[Tuple[float, int, bool]], elapsed: float) -> dict:
+    latencies = sorted(latency for latency, _, _ in samples)
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, ok in samples if not ok),
+        "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "queries_per_request": round(sum(queries for _, queries, _ in samples) / len(samples), 2) if samples else 0.0,
+    }
+
+
+async def run_workload(
+    app,
+    engine: Engine,
+    dataset: Dataset,
+    workload: str = "mixed",
+    duration: float = 10.0,
+    warmup: float = 1.0,
+    concurrency: int = 8,
+    seed_value: int = 42,
+) -> dict:
+    """Run `workload` against `app` and return its per-route statistics."""
+    import httpx
+
+    weights = WORKLOADS[workload]
+    names = list(weights)
+    samples: Dict[str, List[Tuple[float, int, bool]]] = {}
+    remove_listener = count_queries(engine)
+
+    async def worker(client: httpx.AsyncClient, worker_id: int, deadline: float, record: bool):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        operations = Operations(dataset, rng)
+        while time.perf_counter() < deadline:
+            operation: Callable = getattr(operations, rng.choices(names, weights=[weights[name] for name in names])[0])
+            route, method, url, body = operation()
+            counter = [0]
+            token = _request_queries.set(counter)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            finally:
+                latency = time.perf_counter() - start
+                _request_queries.reset(token)
+            if record:
+                samples.setdefault(route, []).append((latency, counter[0], ok))
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if warmup > 0:
+                deadline = time.perf_counter() + warmup
+                await asyncio.gather(*(worker(client, i, deadline, False) for i in range(concurrency)))
+            start = time.perf_counter()
+            deadline = start + duration
+            await asyncio.gather(*(worker(client, i, deadline, True) for i in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    finally:
+        remove_listener()
+
+    all_samples = [sample for route_samples in samples.values() for sample in route_samples]
+    return {
+        "summary": _summarize(all_samples, elapsed),
+        "routes": {route: _summarize(route_samples, elapsed) for route, route_samples in sorted(samples.items())},
+    }
+
+
+def compare(baseline: dict, current: dict, max_regression: float) -> List[str]:
+    """Describe every route that regressed beyond `max_regression` (a ratio)."""
+    regressions = []
+    for route, stats in current["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if before is None:
+            continue
+        if before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{route}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms")
+        if before["rps"] and stats["rps"] < before["rps"] * (1 - max_regression):
+            regressions.append(f"{route}: rps {before['rps']} -> {stats['rps']}")
+        # Cache hits make the average vary a little between runs
+        if stats["queries_per_request"] > before["queries_per_request"] * (1 + max_regression):
+            regressions.append(
+                f"{route}: queries/request {before['queries_per_request']} -> {stats['queries_per_request']}"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench.db", help="SQLite file to seed and benchmark")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync", help="SHOP_DB_MODE of the app")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON result to this file instead of stdout")
+    parser.add_argument("--baseline", help="JSON result to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tolerated slowdown ratio")
+    args = parser.parse_args(argv)
+
+    if not args.reuse and os.path.exists(args.db):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+
+    # The application reads its configuration at import time
+    os.environ["SHOP_DATABASE_URL"] = f"sqlite:///{args.db}"
+    os.environ["SHOP_DB_MODE"] = args.mode
+    # Tables are created here, before seeding, rather than by the lifespan
+    os.environ["SHOP_INIT_DB"] = "0"
+    from app.database import create_tables, engine
+
+    create_tables()
+    scale = SCALES[args.scale]
+    if not args.reuse:
+        started = time.perf_counter()
+        generate(engine, scale, args.seed)
+        print(f"Seeded {args.db} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    from app.database import async_engine
+    from app.main import app
+
+    dataset = load_dataset(engine)
+
+    async def benchmark():
+        # The app's lifespan disposes of the engines once the run is over
+        async with app.router.lifespan_context(app):
+            return await run_workload(
+                app,
+                async_engine.sync_engine if args.mode == "async" else engine,
+                dataset,
+                workload=args.workload,
+                duration=args.duration,
+                warmup=args.warmup,
+                concurrency=args.concurrency,
+                seed_value=args.seed,
+            )
+
+    result = asyncio.run(benchmark())
+    result["config"] = {
+        "scale": args.scale,
+        "dataset": asdict(dataset),
+        "workload": args.workload,
+        "mode": args.mode,
+        "duration": args.duration,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+    }
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    summary = result["summary"]
+    print(
+        f"{summary['requests']} requests, {summary['rps']} req/s, p50 {summary['p50_ms']}ms, "
+        f"p95 {summary['p95_ms']}ms, p99 {summary['p99_ms']}ms, {summary['queries_per_request']} queries/request",
+        file=sys.stderr,
+    )
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), result, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
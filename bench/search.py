@@ -0,0 +1,110 @@
+"""Compare shop item search through the FTS5 index with a LIKE scan.
+
+    python -m bench.search --scale small --queries 200
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Optional
+
+from sqlalchemy import case, create_engine, or_
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.datagen import ADJECTIVES, NOUNS, SCALES, generate
+from app.migrations import migrate
+
+from .run import _percentile
+
+
+def like_search(db: Session, query: str, limit: int = 20):
+    """The baseline: every word must appear in the title or description, and
+    title matches rank first, which takes a scan of the whole table."""
+    db_query = db.query(models.ShopItem).options(*crud.SHOP_ITEM_LOAD_OPTIONS)
+    title_matches = []
+    for word in query.split():
+        pattern = f"%{word}%"
+        db_query = db_query.filter(or_(models.ShopItem.title.like(pattern), models.ShopItem.description.like(pattern)))
+        title_matches.append(case((models.ShopItem.title.like(pattern), 1), else_=0))
+    return db_query.order_by(sum(title_matches).desc(), models.ShopItem.id).limit(limit).all()
+
+
+def fts_search(db: Session, query: str, limit: int = 20):
+    return crud.search_shop_items(db, query, limit=limit)
+
+
+def make_queries(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.3:
+            queries.append(rng.choice(NOUNS).lower())
+        elif kind < 0.6:
+            queries.append(f"{rng.choice(ADJECTIVES).lower()} {rng.choice(NOUNS).lower()}")
+        elif kind < 0.8:
+            # A specific item, which only matches a few rows
+            queries.append(f"{rng.choice(NOUNS).lower()} {rng.randint(1, 10000)}")
+        else:
+            # Partially typed word
+            noun = rng.choice(NOUNS).lower()
+            queries.append(noun[:max(3, len(noun) // 2)])
+    return queries
+
+
+def measure(engine, search: Callable, queries: List[str]) -> dict:
+    latencies = []
+    results = 0
+    with Session(engine) as db:
+        for query in queries:
+            start = time.perf_counter()
+            results += len(search(db, query))
+            latencies.append(time.perf_counter() - start)
+            db.expunge_all()
+    latencies.sort()
+    return {
+        "queries": len(queries),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "results_per_query": round(results / len(queries), 2),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="bench-search.db", help="SQLite file to seed and search")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--reuse", action="store_true", help="Reuse an already seeded database")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if not args.reuse:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    engine = create_engine(f"sqlite:///{args.db}")
+    models.Base.metadata.create_all(engine)
+    migrate(engine)
+    if not args.reuse:
+        generate(engine, SCALES[args.scale], args.seed)
+
+    queries = make_queries(args.queries, args.seed)
+    # Warm the page cache so both sides read from memory
+    measure(engine, like_search, queries[:5])
+    result = {
+        "scale": args.scale,
+        "like": measure(engine, like_search, queries),
+        "fts": measure(engine, fts_search, queries),
+    }
+    result["speedup_p50"] = round(result["like"]["p50_ms"] / result["fts"]["p50_ms"], 1)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,25 @@
+import os
+
+# The tests create their own tables; keep the app's startup away from shop.db
+os.environ.setdefault("SHOP_INIT_DB", "0")
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
-from app.database import get_db
+from app.cache import analytics_cache, catalogue_cache
+from app.config import settings
+from app.database import configure_sqlite, get_db
+from app.instrumentation import instrument_engine
 from app.models import Base
 from app.main import app
 
 # Create a test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+configure_sqlite(engine, settings.sqlite_pragmas)
+instrument_engine(engine)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 def override_get_db():
@@ -27,6 +37,8 @@ def client():
     
     # Override the get_db dependency
     app.dependency_overrides[get_db] = override_get_db
+    catalogue_cache.clear()
+    analytics_cache.clear()
     
     with TestClient(app) as test_client:
         yield test_client
@@ -45,4 +57,17 @@ def db_session():
     
     session.close()
     transaction.rollback()
-    connection.close()
\ No newline at end of file
+    connection.close()
+
+
+@pytest.fixture
+def query_counter():
+    """Collect the SQL statements executed against the test engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
@@ -0,0 +1,118 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import analytics_cache
+
+
+@pytest.fixture
+def sales(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Ana", "surname": "Lytics", "email": "ana.lytics@example.com"
+    }).json()["id"]
+    tools = client.post("/categories/", json={"title": "Tools"}).json()["id"]
+    garden = client.post("/categories/", json={"title": "Garden"}).json()["id"]
+    empty = client.post("/categories/", json={"title": "Empty"}).json()["id"]
+    drill = client.post("/shop-items/", json={"title": "Drill", "price": 50.0, "category_ids": [tools]}).json()["id"]
+    hose = client.post("/shop-items/", json={
+        "title": "Hose", "price": 10.0, "category_ids": [tools, garden]
+    }).json()["id"]
+    unsold = client.post("/shop-items/", json={"title": "Unsold", "price": 1.0}).json()["id"]
+
+    client.post("/orders/", json={"customer_id": customer_id, "items": [
+        {"shop_item_id": drill, "quantity": 1},
+        {"shop_item_id": hose, "quantity": 3},
+    ]})
+    client.post("/orders/", json={"customer_id": customer_id, "items": [{"shop_item_id": hose, "quantity": 4}]})
+    client.post("/orders/", json={"customer_id": customer_id})
+    return {
+        "customer_id": customer_id, "tools": tools, "garden": garden, "empty": empty,
+        "drill": drill, "hose": hose, "unsold": unsold,
+    }
+
+
+def test_item_revenue(client: TestClient, sales):
+    response = client.get("/analytics/revenue/items")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"shop_item_id": sales["hose"], "title": "Hose", "units_sold": 7, "order_lines": 2, "revenue": 70.0},
+        {"shop_item_id": sales["drill"], "title": "Drill", "units_sold": 1, "order_lines": 1, "revenue": 50.0},
+    ]
+
+    response = client.get("/analytics/revenue/items", params={"skip": 1, "limit": 1})
+    assert [row["shop_item_id"] for row in response.json()] == [sales["drill"]]
+
+
+def test_category_revenue_counts_items_in_every_category(client: TestClient, sales):
+    response = client.get("/analytics/revenue/categories")
+    assert response.status_code == 200
+    assert [(row["category_id"], row["units_sold"], row["revenue"]) for row in response.json()] == [
+        (sales["tools"], 8, 120.0),
+        (sales["garden"], 7, 70.0),
+        (sales["empty"], 0, 0.0),
+    ]
+
+
+def test_top_sellers(client: TestClient, sales):
+    client.post("/orders/", json={
+        "customer_id": sales["customer_id"], "items": [{"shop_item_id": sales["drill"], "quantity": 1}]
+    })
+
+    by_revenue = client.get("/analytics/top-sellers", params={"n": 1}).json()
+    assert [row["shop_item_id"] for row in by_revenue] == [sales["drill"]]
+
+    by_units = client.get("/analytics/top-sellers", params={"n": 1, "by": "units"}).json()
+    assert [row["shop_item_id"] for row in by_units] == [sales["hose"]]
+
+    assert client.get("/analytics/top-sellers", params={"by": "margin"}).status_code == 422
+    assert client.get("/analytics/top-sellers", params={"n": 0}).status_code == 422
+
+
+def test_basket_sizes(client: TestClient, sales):
+    response = client.get("/analytics/basket-sizes")
+    assert response.status_code == 200
+    assert response.json() == {
+        "orders": 3,
+        "mean_lines": 1.0,
+        "buckets": [{"lines": 0, "orders": 1}, {"lines": 1, "orders": 1}, {"lines": 2, "orders": 1}],
+    }
+
+
+def test_basket_sizes_without_orders(client: TestClient):
+    assert client.get("/analytics/basket-sizes").json() == {"orders": 0, "mean_lines": 0.0, "buckets": []}
+
+
+def test_order_writes_invalidate_analytics(client: TestClient, sales):
+    assert client.get("/analytics/revenue/items").json()[0]["units_sold"] == 7
+    client.get("/analytics/revenue/items")
+    hits = analytics_cache.stats()["hits"]
+    assert hits >= 1
+    assert client.get("/cache/stats").json()["analytics"]["hits"] == hits
+
+    order_id = client.post("/orders/", json={
+        "customer_id": sales["customer_id"], "items": [{"shop_item_id": sales["hose"], "quantity": 10}]
+    }).json()["id"]
+    assert client.get("/analytics/revenue/items").json()[0]["units_sold"] == 17
+
+    client.put(f"/orders/{order_id}", json={"items": [{"shop_item_id": sales["hose"], "quantity": 1}]})
+    assert client.get("/analytics/revenue/items").json()[0]["units_sold"] == 8
+
+    client.delete(f"/orders/{order_id}")
+    assert client.get("/analytics/revenue/items").json()[0]["units_sold"] == 7
+
+
+def test_analytics_etag(client: TestClient, sales):
+    response = client.get("/analytics/basket-sizes")
+    etag = response.headers["etag"]
+    assert client.get("/analytics/basket-sizes", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post("/orders/", json={"customer_id": sales["customer_id"]})
+    assert client.get("/analytics/basket-sizes", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_revenue_uses_captured_prices(client: TestClient, sales):
+    client.put(f"/shop-items/{sales['hose']}", json={"price": 1000.0})
+
+    rows = {row["shop_item_id"]: row for row in client.get("/analytics/revenue/items").json()}
+    assert rows[sales["hose"]]["revenue"] == 70.0
+    categories = {row["category_id"]: row for row in client.get("/analytics/revenue/categories").json()}
+    assert categories[sales["garden"]]["revenue"] == 70.0
@@ -0,0 +1,242 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.async_routers import analytics, customers, categories, shop_items, orders
+from app.cache import analytics_cache, catalogue_cache
+from app.config import settings
+from app.database import configure_sqlite, get_async_db
+from app.errors import add_error_handlers
+from app.models import Base
+from .conftest import engine
+
+# The async routes run against the same test database through aiosqlite
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+configure_sqlite(async_engine.sync_engine, settings.sqlite_pragmas)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="function")
+def async_client():
+    Base.metadata.create_all(bind=engine)
+
+    async_app = FastAPI()
+    async_app.include_router(customers.router, prefix="/customers")
+    async_app.include_router(categories.router, prefix="/categories")
+    async_app.include_router(shop_items.router, prefix="/shop-items")
+    async_app.include_router(orders.router, prefix="/orders")
+    async_app.include_router(analytics.router, prefix="/analytics")
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    add_error_handlers(async_app)
+    catalogue_cache.clear()
+    analytics_cache.clear()
+
+    with TestClient(async_app) as test_client:
+        yield test_client
+
+    Base.metadata.drop_all(bind=engine)
+
+
+def test_async_customer_crud(async_client: TestClient):
+    customer_data = {
+        "name": "Async",
+        "surname": "User",
+        "email": "async.user@example.com"
+    }
+    response = async_client.post("/customers/", json=customer_data)
+    assert response.status_code == 200
+    customer_id = response.json()["id"]
+
+    response = async_client.put(f"/customers/{customer_id}", json={"name": "Updated"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Updated"
+
+    response = async_client.get("/customers/")
+    assert [customer["id"] for customer in response.json()] == [customer_id]
+
+    response = async_client.delete(f"/customers/{customer_id}")
+    assert response.status_code == 200
+    assert async_client.get(f"/customers/{customer_id}").status_code == 404
+
+
+def test_async_shop_item_with_categories(async_client: TestClient):
+    category_id = async_client.post("/categories/", json={"title": "Async Category"}).json()["id"]
+    other_category_id = async_client.post("/categories/", json={"title": "Other Category"}).json()["id"]
+
+    response = async_client.post("/shop-items/", json={
+        "title": "Async Item",
+        "price": 5.0,
+        "category_ids": [category_id]
+    })
+    assert response.status_code == 200
+    item_id = response.json()["id"]
+    assert response.json()["categories"][0]["id"] == category_id
+
+    response = async_client.put(f"/shop-items/{item_id}", json={"category_ids": [other_category_id]})
+    assert response.status_code == 200
+    assert response.json()["categories"][0]["id"] == other_category_id
+
+    response = async_client.delete(f"/shop-items/{item_id}")
+    assert response.status_code == 200
+    assert response.json()["categories"][0]["id"] == other_category_id
+
+
+def test_async_order_crud(async_client: TestClient):
+    customer_id = async_client.post("/customers/", json={
+        "name": "Async",
+        "surname": "Customer",
+        "email": "async.customer@example.com"
+    }).json()["id"]
+    category_id = async_client.post("/categories/", json={"title": "Async Category"}).json()["id"]
+    item_id = async_client.post("/shop-items/", json={
+        "title": "Async Item",
+        "price": 5.0,
+        "category_ids": [category_id]
+    }).json()["id"]
+
+    response = async_client.post("/orders/", json={
+        "customer_id": customer_id,
+        "items": [{"shop_item_id": item_id, "quantity": 2}]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    order_id = data["id"]
+    assert data["customer"]["id"] == customer_id
+    assert data["items"][0]["shop_item"]["categories"][0]["id"] == category_id
+
+    response = async_client.put(f"/orders/{order_id}", json={
+        "items": [{"shop_item_id": item_id, "quantity": 5}]
+    })
+    assert response.status_code == 200
+    assert response.json()["items"][0]["quantity"] == 5
+
+    response = async_client.get("/orders/")
+    assert [order["id"] for order in response.json()] == [order_id]
+
+    response = async_client.delete(f"/orders/{order_id}")
+    assert response.status_code == 200
+    assert async_client.get(f"/orders/{order_id}").status_code == 404
+
+
+def test_async_export_orders(async_client: TestClient):
+    customer_id = async_client.post("/customers/", json={
+        "name": "Async",
+        "surname": "Customer",
+        "email": "async.export@example.com"
+    }).json()["id"]
+    item_id = async_client.post("/shop-items/", json={"title": "Async Item", "price": 5.0}).json()["id"]
+    async_client.post("/orders/", json={
+        "customer_id": customer_id,
+        "items": [{"shop_item_id": item_id, "quantity": 2}]
+    })
+
+    response = async_client.get("/orders/export", params={"format": "csv"})
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert lines[0].startswith("order_id,customer_id")
+    assert lines[1].endswith(",2,5.0,10.0")
+
+
+def test_async_conditional_get(async_client: TestClient):
+    category_id = async_client.post("/categories/", json={"title": "Async Category"}).json()["id"]
+    etag = async_client.get(f"/categories/{category_id}").headers["ETag"]
+
+    response = async_client.get(f"/categories/{category_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    async_client.put(f"/categories/{category_id}", json={"title": "Renamed"})
+    response = async_client.get(f"/categories/{category_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+
+
+def test_async_filter_and_sort_shop_items(async_client: TestClient):
+    category_id = async_client.post("/categories/", json={"title": "Books", "description": ""}).json()["id"]
+    for title, price in (("Novel", 20.0), ("Atlas", 35.0), ("Comic", 5.0)):
+        async_client.post("/shop-items/", json={
+            "title": title, "description": "", "price": price, "category_ids": [category_id],
+        })
+    async_client.post("/shop-items/", json={"title": "Lamp", "description": "", "price": 1.0})
+
+    response = async_client.get(f"/shop-items/?category_id={category_id}&sort=price&limit=2")
+    assert [item["title"] for item in response.json()] == ["Comic", "Novel"]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = async_client.get(f"/shop-items/?category_id={category_id}&sort=price&limit=2&cursor={cursor}")
+    assert [item["title"] for item in response.json()] == ["Atlas"]
+
+
+def test_async_category_items_and_counts(async_client: TestClient):
+    category_id = async_client.post("/categories/", json={"title": "Books"}).json()["id"]
+    async_client.post("/shop-items/", json={"title": "Novel", "price": 10.0, "category_ids": [category_id]})
+    async_client.post("/shop-items/", json={"title": "Lamp", "price": 10.0})
+
+    response = async_client.get("/categories/?with_counts=true")
+    assert response.json()[0]["item_count"] == 1
+
+    response = async_client.get(f"/categories/{category_id}/items")
+    assert [item["title"] for item in response.json()] == ["Novel"]
+
+
+def test_async_customer_orders_and_summary(async_client: TestClient):
+    customer_id = async_client.post("/customers/", json={
+        "name": "Async", "surname": "Buyer", "email": "async.buyer@example.com",
+    }).json()["id"]
+    item_id = async_client.post("/shop-items/", json={"title": "Mug", "price": 4.0}).json()["id"]
+    order_id = async_client.post("/orders/", json={
+        "customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 3}],
+    }).json()["id"]
+
+    response = async_client.get(f"/customers/{customer_id}/orders")
+    assert [order["id"] for order in response.json()] == [order_id]
+
+    response = async_client.get(f"/customers/{customer_id}/orders/summary")
+    assert response.json() == {
+        "customer_id": customer_id, "order_count": 1, "lifetime_spend": 12.0, "last_order_id": order_id,
+    }
+
+
+def test_async_analytics(async_client: TestClient):
+    customer_id = async_client.post("/customers/", json={
+        "name": "Async", "surname": "Analyst", "email": "async.analyst@example.com",
+    }).json()["id"]
+    item_id = async_client.post("/shop-items/", json={"title": "Mug", "price": 4.0}).json()["id"]
+    async_client.post("/orders/", json={
+        "customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 3}],
+    })
+
+    response = async_client.get("/analytics/top-sellers", params={"by": "units"})
+    assert [(row["shop_item_id"], row["units_sold"], row["revenue"]) for row in response.json()] == [
+        (item_id, 3, 12.0)
+    ]
+    assert async_client.get("/analytics/basket-sizes").json()["mean_lines"] == 1.0
+    assert async_client.get("/analytics/revenue/categories").json() == []
+
+
+def test_async_update_order_item(async_client: TestClient):
+    customer_id = async_client.post("/customers/", json={
+        "name": "Async", "surname": "Patcher", "email": "async.patcher@example.com",
+    }).json()["id"]
+    item_id = async_client.post("/shop-items/", json={"title": "Mug", "price": 4.0}).json()["id"]
+    data = async_client.post("/orders/", json={
+        "customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 3}],
+    }).json()
+
+    response = async_client.patch(f"/orders/{data['id']}/items/{data['items'][0]['id']}", json={"quantity": 1})
+    assert response.status_code == 200
+    assert response.json()["shop_item"]["id"] == item_id
+    assert async_client.get(f"/orders/{data['id']}").json()["total"] == 4.0
+
+
+def test_async_unknown_references(async_client: TestClient):
+    response = async_client.post("/orders/", json={
+        "customer_id": 99999, "items": [{"shop_item_id": 99999, "quantity": 1}],
+    })
+    assert response.status_code == 422
+    assert [error["loc"] for error in response.json()["detail"]] == [["body", "customer_id"], ["body", "shop_item_id"]]
@@ -0,0 +1,30 @@
+import asyncio
+
+from app.datagen import Scale, generate
+from app.main import app
+from bench.run import compare, load_dataset, run_workload
+from tests.conftest import engine
+
+
+def test_seed_and_run_mixed_workload(client):
+    generate(engine, Scale(customers=20, categories=3, shop_items=50, order_lines=100), seed=1)
+    dataset = load_dataset(engine)
+    assert dataset.customers == 20
+    assert dataset.shop_items == 50
+    assert dataset.orders > 0
+
+    result = asyncio.run(run_workload(app, engine, dataset, workload="mixed", duration=0.5, warmup=0, concurrency=2))
+
+    summary = result["summary"]
+    assert summary["requests"] > 0
+    assert summary["errors"] == 0
+    assert summary["queries_per_request"] > 0
+    assert sum(route["requests"] for route in result["routes"].values()) == summary["requests"]
+
+
+def test_compare_flags_regressions():
+    baseline = {"routes": {"GET /orders/": {"p95_ms": 10.0, "rps": 100.0, "queries_per_request": 2.0}}}
+    current = {"routes": {"GET /orders/": {"p95_ms": 15.0, "rps": 60.0, "queries_per_request": 3.0}}}
+
+    assert len(compare(baseline, current, max_regression=0.2)) == 3
+    assert compare(baseline, baseline, max_regression=0.2) == []
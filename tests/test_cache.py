@@ -0,0 +1,119 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get_or_load(("items", 1), loader) == 1
+    timer.now = 4
+    assert cache.get_or_load(("items", 1), loader) == 1
+    timer.now = 6
+    assert cache.get_or_load(("items", 1), loader) == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.get_or_load(("items", 1), lambda: "one")
+    cache.get_or_load(("items", 2), lambda: "two")
+    cache.get_or_load(("items", 1), lambda: "reloaded")
+    cache.get_or_load(("items", 3), lambda: "three")
+
+    assert cache.get_or_load(("items", 1), lambda: "reloaded") == "one"
+    assert cache.get_or_load(("items", 2), lambda: "reloaded") == "reloaded"
+    assert cache.stats()["evictions"] == 2
+
+
+def test_invalidate_namespace():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.get_or_load(("items", 1), lambda: "item")
+    cache.get_or_load(("categories", 1), lambda: "category")
+
+    cache.invalidate("items")
+    assert cache.get_or_load(("items", 1), lambda: "new item") == "new item"
+    assert cache.get_or_load(("categories", 1), lambda: "new category") == "category"
+
+
+def test_value_loaded_during_invalidation_is_not_stored():
+    cache = TTLCache(maxsize=10, ttl=60)
+
+    def stale_loader():
+        # A write commits and invalidates while this value is being loaded
+        cache.invalidate("items")
+        return "stale"
+
+    assert cache.get_or_load(("items", 1), stale_loader) == "stale"
+    assert cache.get_or_load(("items", 1), lambda: "fresh") == "fresh"
+
+
+def test_disabled_cache_always_loads():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.get_or_load(("items", 1), lambda: "one")
+    assert cache.get_or_load(("items", 1), lambda: "two") == "two"
+
+
+def test_read_shop_item_is_served_from_cache(client: TestClient, query_counter):
+    item_id = client.post("/shop-items/", json={"title": "Cached", "price": 1.0}).json()["id"]
+    client.get(f"/shop-items/{item_id}")
+
+    query_counter.clear()
+    response = client.get(f"/shop-items/{item_id}")
+    assert response.status_code == 200
+    assert response.json()["title"] == "Cached"
+    # Only the resource versions are read, the item comes from the cache
+    assert len(query_counter) == 1
+    assert "FROM resource_versions" in query_counter[0]
+
+    hits_before = client.get("/cache/stats").json()["catalogue"]["hits"]
+    client.get(f"/shop-items/{item_id}")
+    assert client.get("/cache/stats").json()["catalogue"]["hits"] == hits_before + 1
+
+
+def test_shop_item_writes_invalidate_cache(client: TestClient):
+    item_id = client.post("/shop-items/", json={"title": "Original", "price": 1.0}).json()["id"]
+    assert len(client.get("/shop-items/").json()) == 1
+    assert client.get(f"/shop-items/{item_id}").json()["title"] == "Original"
+
+    client.put(f"/shop-items/{item_id}", json={"title": "Updated"})
+    assert client.get(f"/shop-items/{item_id}").json()["title"] == "Updated"
+
+    client.post("/shop-items/", json={"title": "Second", "price": 2.0})
+    assert len(client.get("/shop-items/").json()) == 2
+
+    client.delete(f"/shop-items/{item_id}")
+    assert client.get(f"/shop-items/{item_id}").status_code == 404
+
+
+def test_category_update_invalidates_embedding_shop_items(client: TestClient):
+    category_id = client.post("/categories/", json={"title": "Original"}).json()["id"]
+    item_id = client.post("/shop-items/", json={
+        "title": "Item",
+        "price": 1.0,
+        "category_ids": [category_id]
+    }).json()["id"]
+    assert client.get(f"/shop-items/{item_id}").json()["categories"][0]["title"] == "Original"
+    assert client.get("/shop-items/").json()[0]["categories"][0]["title"] == "Original"
+
+    client.put(f"/categories/{category_id}", json={"title": "Renamed"})
+    assert client.get(f"/shop-items/{item_id}").json()["categories"][0]["title"] == "Renamed"
+    assert client.get("/shop-items/").json()[0]["categories"][0]["title"] == "Renamed"
+
+    client.delete(f"/categories/{category_id}")
+    assert client.get(f"/shop-items/{item_id}").json()["categories"] == []
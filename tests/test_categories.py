@@ -108,4 +108,72 @@ def test_update_nonexistent_category(client: TestClient):
 
 def test_delete_nonexistent_category(client: TestClient):
     response = client.delete("/categories/99999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_bulk_create_categories(client: TestClient):
+    categories = [{"title": f"Category {i}"} for i in range(3)]
+    categories.append({"title": "Category 0"})
+    response = client.post("/categories/bulk", json=categories)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 4
+    assert data["errors"] == []
+    assert len(set(data["ids"])) == 4
+
+    for category, category_id in zip(categories, data["ids"]):
+        assert client.get(f"/categories/{category_id}").json()["title"] == category["title"]
+
+
+def _categories_with_items(client: TestClient):
+    books = client.post("/categories/", json={"title": "Books"}).json()["id"]
+    games = client.post("/categories/", json={"title": "Games"}).json()["id"]
+    empty = client.post("/categories/", json={"title": "Empty"}).json()["id"]
+    for title, price, category_ids in (
+        ("Novel", 12.0, [books]),
+        ("Board Game", 30.0, [games]),
+        ("Game Guide", 8.0, [books, games]),
+        ("Atlas", 25.0, [books]),
+    ):
+        client.post("/shop-items/", json={"title": title, "price": price, "category_ids": category_ids})
+    return books, games, empty
+
+
+def test_read_categories_with_counts(client: TestClient):
+    books, games, empty = _categories_with_items(client)
+
+    response = client.get("/categories/?with_counts=true")
+    assert response.status_code == 200
+    assert {category["id"]: category["item_count"] for category in response.json()} == {
+        books: 3, games: 2, empty: 0,
+    }
+    assert "item_count" not in client.get("/categories/").json()[0]
+
+
+def test_category_counts_follow_item_writes(client: TestClient):
+    books, _, _ = _categories_with_items(client)
+    response = client.get("/categories/?with_counts=true")
+    etag = response.headers["ETag"]
+
+    client.post("/shop-items/", json={"title": "Poems", "price": 5.0, "category_ids": [books]})
+
+    response = client.get("/categories/?with_counts=true", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert next(category for category in response.json() if category["id"] == books)["item_count"] == 4
+
+
+def test_read_category_items(client: TestClient):
+    books, games, empty = _categories_with_items(client)
+
+    response = client.get(f"/categories/{books}/items")
+    assert response.status_code == 200
+    assert [item["title"] for item in response.json()] == ["Novel", "Game Guide", "Atlas"]
+
+    response = client.get(f"/categories/{books}/items?sort=price&limit=2")
+    assert [item["title"] for item in response.json()] == ["Game Guide", "Novel"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/categories/{books}/items?sort=price&limit=2&cursor={cursor}")
+    assert [item["title"] for item in response.json()] == ["Atlas"]
+    assert "X-Next-Cursor" not in response.headers
+
+    assert client.get(f"/categories/{empty}/items").json() == []
+    assert client.get("/categories/99999/items").status_code == 404
@@ -0,0 +1,126 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.init_data import init_test_data
+from app.migrations import LATEST_VERSION
+from tests.conftest import TestingSessionLocal
+
+
+def test_read_shop_item_not_modified(client: TestClient, query_counter):
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+
+    response = client.get(f"/shop-items/{item_id}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    query_counter.clear()
+    response = client.get(f"/shop-items/{item_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+    # Only the resource versions are read
+    assert len(query_counter) == 1
+
+
+def test_etag_changes_on_write(client: TestClient):
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+    etag = client.get(f"/shop-items/{item_id}").headers["ETag"]
+
+    client.put(f"/shop-items/{item_id}", json={"price": 2.0})
+    response = client.get(f"/shop-items/{item_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["price"] == 2.0
+    assert response.headers["ETag"] != etag
+
+
+def test_category_write_changes_shop_item_etag(client: TestClient):
+    category_id = client.post("/categories/", json={"title": "Category"}).json()["id"]
+    item_id = client.post("/shop-items/", json={
+        "title": "Item",
+        "price": 1.0,
+        "category_ids": [category_id]
+    }).json()["id"]
+    etag = client.get(f"/shop-items/{item_id}").headers["ETag"]
+
+    client.put(f"/categories/{category_id}", json={"title": "Renamed"})
+    response = client.get(f"/shop-items/{item_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["categories"][0]["title"] == "Renamed"
+
+
+def test_unrelated_write_keeps_etag(client: TestClient):
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+    etag = client.get(f"/shop-items/{item_id}").headers["ETag"]
+
+    client.post("/customers/", json={"name": "Test", "surname": "User", "email": "etag@example.com"})
+    response = client.get(f"/shop-items/{item_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_read_orders_not_modified(client: TestClient, query_counter):
+    customer_id = client.post("/customers/", json={
+        "name": "Test",
+        "surname": "Customer",
+        "email": "etag.orders@example.com"
+    }).json()["id"]
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+    client.post("/orders/", json={"customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 1}]})
+
+    etag = client.get("/orders/", params={"limit": 10}).headers["ETag"]
+
+    query_counter.clear()
+    response = client.get("/orders/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert len(query_counter) == 1
+
+    # Another page of the same collection is a different representation
+    response = client.get("/orders/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    # Order responses embed their shop items
+    client.put(f"/shop-items/{item_id}", json={"title": "Renamed"})
+    response = client.get("/orders/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["items"][0]["shop_item"]["title"] == "Renamed"
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"other", {etag}', "*"])
+def test_if_none_match_forms(client: TestClient, if_none_match):
+    customer_id = client.post("/customers/", json={
+        "name": "Test",
+        "surname": "User",
+        "email": "etag.forms@example.com"
+    }).json()["id"]
+    etag = client.get(f"/customers/{customer_id}").headers["ETag"]
+
+    response = client.get(f"/customers/{customer_id}", headers={"If-None-Match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304
+
+
+def test_if_none_match_mismatch(client: TestClient):
+    response = client.get("/categories/", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != '"stale"'
+
+
+def test_migration_changes_etag(client: TestClient, monkeypatch):
+    etag = client.get("/orders/").headers["ETag"]
+
+    # A migration can change stored data and response shapes without a write
+    monkeypatch.setattr("app.conditional.LATEST_VERSION", LATEST_VERSION + 1)
+    response = client.get("/orders/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_seed_data_changes_etags(client: TestClient, monkeypatch):
+    paths = ("/customers/", "/categories/", "/shop-items/", "/orders/")
+    etags = {path: client.get(path).headers["ETag"] for path in paths}
+
+    monkeypatch.setattr("app.init_data.SessionLocal", TestingSessionLocal)
+    init_test_data()
+
+    for path in paths:
+        response = client.get(path, headers={"If-None-Match": etags[path]})
+        assert response.status_code == 200
+        assert response.json()
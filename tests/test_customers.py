@@ -90,6 +90,18 @@ def test_delete_customer(client: TestClient):
     assert response.status_code == 404
 
 
+def test_delete_customer_with_orders(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "User", "email": "with.orders@example.com"
+    }).json()["id"]
+    client.post("/orders/", json={"customer_id": customer_id})
+
+    response = client.delete(f"/customers/{customer_id}")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Customer has orders"
+    assert client.get(f"/customers/{customer_id}").status_code == 200
+
+
 def test_read_nonexistent_customer(client: TestClient):
     response = client.get("/customers/99999")
     assert response.status_code == 404
@@ -103,4 +115,157 @@ def test_update_nonexistent_customer(client: TestClient):
 
 def test_delete_nonexistent_customer(client: TestClient):
     response = client.delete("/customers/99999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_read_customers_with_cursor(client: TestClient):
+    for i in range(5):
+        client.post("/customers/", json={
+            "name": "Test",
+            "surname": f"User{i}",
+            "email": f"cursor{i}@example.com"
+        })
+
+    # Walk all pages following the next cursor
+    seen = []
+    response = client.get("/customers/", params={"limit": 2})
+    while True:
+        assert response.status_code == 200
+        seen.extend(customer["id"] for customer in response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if next_cursor is None:
+            break
+        response = client.get("/customers/", params={"limit": 2, "cursor": next_cursor})
+
+    assert len(seen) == 5
+    assert seen == sorted(seen)
+
+
+def test_read_customers_with_invalid_cursor(client: TestClient):
+    response = client.get("/customers/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_bulk_create_customers(client: TestClient):
+    client.post("/customers/", json={
+        "name": "Existing",
+        "surname": "User",
+        "email": "existing@example.com"
+    })
+
+    customers = [
+        {"name": "Bulk", "surname": "One", "email": "bulk1@example.com"},
+        {"name": "Bulk", "surname": "Existing", "email": "existing@example.com"},
+        {"name": "Bulk", "surname": "Two", "email": "bulk2@example.com"},
+        {"name": "Bulk", "surname": "Repeated", "email": "bulk1@example.com"},
+        {"name": "Bulk", "surname": "Invalid"},
+    ]
+    response = client.post("/customers/bulk", json=customers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 3
+    assert [error["index"] for error in data["errors"]] == [1, 3, 4]
+    assert "existing@example.com" in data["errors"][0]["detail"]
+    assert data["ids"][1] is None
+
+    response = client.get(f"/customers/{data['ids'][2]}")
+    assert response.json()["email"] == "bulk2@example.com"
+
+
+def test_bulk_create_customers_ndjson(client: TestClient):
+    body = "\n".join([
+        '{"name": "Bulk", "surname": "One", "email": "ndjson1@example.com"}',
+        '{"name": "Bulk", "surname": "Two", "email": "ndjson2@example.com"}',
+        "",
+    ])
+    response = client.post(
+        "/customers/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 2
+    assert len(client.get("/customers/").json()) == 2
+
+
+def test_bulk_create_customers_invalid_body(client: TestClient):
+    response = client.post("/customers/bulk", json={"name": "Not a list"})
+    assert response.status_code == 422
+
+
+def _customer_with_orders(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Order", "surname": "History", "email": "order.history@example.com",
+    }).json()["id"]
+    other_id = client.post("/customers/", json={
+        "name": "Other", "surname": "Customer", "email": "other.customer@example.com",
+    }).json()["id"]
+    book = client.post("/shop-items/", json={"title": "Book", "price": 12.5}).json()["id"]
+    pen = client.post("/shop-items/", json={"title": "Pen", "price": 2.0}).json()["id"]
+    order_ids = []
+    for owner, items in (
+        (customer_id, [(book, 2), (pen, 1)]),
+        (other_id, [(book, 1)]),
+        (customer_id, [(pen, 5)]),
+        (customer_id, []),
+    ):
+        order_ids.append(client.post("/orders/", json={
+            "customer_id": owner,
+            "items": [{"shop_item_id": item_id, "quantity": quantity} for item_id, quantity in items],
+        }).json()["id"])
+    return customer_id, other_id, order_ids
+
+
+def test_read_customer_orders(client: TestClient):
+    customer_id, other_id, order_ids = _customer_with_orders(client)
+
+    response = client.get(f"/customers/{customer_id}/orders")
+    assert response.status_code == 200
+    orders = response.json()
+    assert [order["id"] for order in orders] == [order_ids[0], order_ids[2], order_ids[3]]
+    assert all(order["customer"]["id"] == customer_id for order in orders)
+    assert orders[0]["items"][0]["shop_item"]["title"] == "Book"
+
+    response = client.get(f"/customers/{customer_id}/orders?limit=2")
+    assert [order["id"] for order in response.json()] == [order_ids[0], order_ids[2]]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/customers/{customer_id}/orders?limit=2&cursor={cursor}")
+    assert [order["id"] for order in response.json()] == [order_ids[3]]
+
+
+def test_read_customer_orders_of_unknown_customer(client: TestClient):
+    response = client.get("/customers/99999/orders")
+    assert response.status_code == 404
+
+    customer_id = client.post("/customers/", json={
+        "name": "No", "surname": "Orders", "email": "no.orders@example.com",
+    }).json()["id"]
+    assert client.get(f"/customers/{customer_id}/orders").json() == []
+
+
+def test_read_customer_order_summary(client: TestClient):
+    customer_id, other_id, order_ids = _customer_with_orders(client)
+
+    response = client.get(f"/customers/{customer_id}/orders/summary")
+    assert response.status_code == 200
+    assert response.json() == {
+        "customer_id": customer_id,
+        "order_count": 3,
+        "lifetime_spend": 2 * 12.5 + 2.0 + 5 * 2.0,
+        "last_order_id": order_ids[3],
+    }
+    assert client.get(f"/customers/{other_id}/orders/summary").json()["lifetime_spend"] == 12.5
+
+    # Spend is what the orders cost, not what the items cost today
+    book = client.get(f"/orders/{order_ids[1]}").json()["items"][0]["shop_item_id"]
+    client.put(f"/shop-items/{book}", json={"price": 100.0})
+    assert client.get(f"/customers/{other_id}/orders/summary").json()["lifetime_spend"] == 12.5
+
+
+def test_read_customer_order_summary_without_orders(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "No", "surname": "Orders", "email": "no.orders@example.com",
+    }).json()["id"]
+
+    assert client.get(f"/customers/{customer_id}/orders/summary").json() == {
+        "customer_id": customer_id, "order_count": 0, "lifetime_spend": 0.0, "last_order_id": None,
+    }
+    assert client.get("/customers/99999/orders/summary").status_code == 404
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from app.config import SQLITE_PROFILES, Settings
+from app.database import configure_sqlite
+
+
+def test_production_profile_pragmas(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+    configure_sqlite(engine, SQLITE_PROFILES["production"])
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+    engine.dispose()
+
+
+@pytest.mark.parametrize("profile", sorted(SQLITE_PROFILES))
+def test_foreign_keys_are_enforced(tmp_path, profile):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fk.db'}")
+    configure_sqlite(engine, SQLITE_PROFILES[profile])
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE parents (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("CREATE TABLE children (id INTEGER PRIMARY KEY, parent_id REFERENCES parents (id))"))
+
+    with pytest.raises(IntegrityError), engine.begin() as connection:
+        connection.execute(text("INSERT INTO children (parent_id) VALUES (1)"))
+    engine.dispose()
+
+
+def test_readers_are_not_blocked_by_a_writer(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'wal.db'}")
+    configure_sqlite(engine, SQLITE_PROFILES["production"])
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO items (id) VALUES (1)"))
+
+    with engine.connect() as writer, engine.connect() as reader:
+        writer.execute(text("BEGIN IMMEDIATE"))
+        writer.execute(text("INSERT INTO items (id) VALUES (2)"))
+        # The reader sees the last committed snapshot instead of waiting
+        assert reader.execute(text("SELECT count(*) FROM items")).scalar() == 1
+        writer.execute(text("COMMIT"))
+    engine.dispose()
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("SHOP_DATABASE_URL", "sqlite:////tmp/other.db")
+    monkeypatch.setenv("SHOP_DB_POOL_SIZE", "8")
+    monkeypatch.setenv("SHOP_SQLITE_SYNCHRONOUS", "full")
+    monkeypatch.setenv("SHOP_SQLITE_CACHE_SIZE", "-2000")
+
+    settings = Settings()
+    assert settings.database_url == "sqlite:////tmp/other.db"
+    assert settings.pool_size == 8
+    assert settings.sqlite_pragmas["synchronous"] == "FULL"
+    assert settings.sqlite_pragmas["cache_size"] == -2000
+    assert settings.sqlite_pragmas["journal_mode"] == "WAL"
+
+
+def test_default_profile_has_no_pragmas(monkeypatch):
+    monkeypatch.setenv("SHOP_SQLITE_PROFILE", "default")
+    assert Settings().sqlite_pragmas == {}
+
+
+def test_invalid_settings(monkeypatch):
+    monkeypatch.setenv("SHOP_DB_POOL_SIZE", "many")
+    with pytest.raises(ValueError):
+        Settings()
@@ -0,0 +1,108 @@
+from collections import Counter
+
+import pytest
+from sqlalchemy import create_engine, select
+
+from app import models
+from app.datagen import Scale, generate
+from app.manage import main
+
+SCALE = Scale(customers=50, categories=8, shop_items=200, order_lines=1000, max_lines_per_order=5)
+
+
+def _engine():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    return engine
+
+
+def _dump(engine):
+    with engine.connect() as connection:
+        return {
+            table.name: connection.execute(select(table).order_by(*table.primary_key.columns)).all()
+            for table in models.Base.metadata.sorted_tables
+        }
+
+
+def test_generate_counts():
+    engine = _engine()
+
+    counts = generate(engine, SCALE, seed=1)
+
+    assert counts["customers"] == 50
+    assert counts["categories"] == 8
+    assert counts["shop_items"] == 200
+    assert counts["order_lines"] == 1000
+    tables = _dump(engine)
+    assert len(tables["orders"]) == counts["orders"]
+    assert len(tables["order_items"]) == 1000
+    assert len({customer.email for customer in tables["customers"]}) == 50
+
+    prices = {item.id: item.price for item in tables["shop_items"]}
+    totals = Counter()
+    for line in tables["order_items"]:
+        assert line.unit_price == prices[line.shop_item_id]
+        totals[line.order_id] += line.quantity * line.unit_price
+    assert all(order.total == pytest.approx(totals[order.id]) for order in tables["orders"])
+
+
+def test_generate_is_deterministic():
+    assert _dump(_seeded(seed=7)) == _dump(_seeded(seed=7))
+    assert _dump(_seeded(seed=7)) != _dump(_seeded(seed=8))
+
+
+def _seeded(seed):
+    engine = _engine()
+    generate(engine, SCALE, seed=seed)
+    return engine
+
+
+def test_generate_distributions():
+    tables = _dump(_seeded(seed=3))
+
+    lines_per_order = Counter(line.order_id for line in tables["order_items"])
+    assert set(lines_per_order.values()) <= set(range(1, 6))
+    assert lines_per_order.most_common()[-1][1] == 1
+
+    categories_per_item = Counter(row.shop_item_id for row in tables["shop_item_category_association"])
+    assert set(categories_per_item) == set(range(1, 201))
+    assert max(categories_per_item.values()) > 1
+
+    # Zipf popularity: the top 10% of items account for most of the lines
+    popularity = Counter(line.shop_item_id for line in tables["order_items"])
+    top = sum(count for _, count in popularity.most_common(20))
+    assert top > 500
+
+
+def test_generate_refuses_non_empty_database():
+    engine = _seeded(seed=1)
+
+    with pytest.raises(RuntimeError):
+        generate(engine, SCALE, seed=1)
+
+
+def test_manage_generate(client, capsys, monkeypatch):
+    from tests.conftest import engine
+
+    monkeypatch.setattr("app.manage.engine", engine)
+    monkeypatch.setattr("app.manage.create_tables", lambda: None)
+    main(["generate", "--scale", "tiny", "--customers", "5", "--order-lines", "20"])
+
+    assert "5 customers" in capsys.readouterr().out
+    assert len(client.get("/customers/").json()) == 5
+
+
+def test_generate_changes_etags(client):
+    from tests.conftest import engine
+
+    response = client.get("/shop-items/")
+    assert response.json() == []
+    etag = response.headers["ETag"]
+
+    generate(engine, SCALE, seed=1)
+
+    response = client.get("/shop-items/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    # The catalogue cache is keyed by the same versions
+    assert len(client.get("/shop-items/").json()) == 100
@@ -0,0 +1,118 @@
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import idempotency, models
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def order_request(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Retry", "surname": "Safe", "email": "retry.safe@example.com"
+    }).json()["id"]
+    item_id = client.post("/shop-items/", json={"title": "Widget", "price": 2.5}).json()["id"]
+    return {"customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 2}]}
+
+
+def test_retried_order_is_created_once(client: TestClient, order_request):
+    headers = {"Idempotency-Key": "order-1"}
+    first = client.post("/orders/", json=order_request, headers=headers)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+
+    retry = client.post("/orders/", json=order_request, headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.headers["content-type"] == "application/json"
+    assert retry.json() == first.json()
+    assert len(client.get("/orders/").json()) == 1
+
+
+def test_retry_does_not_run_the_write(client: TestClient, order_request, query_counter):
+    headers = {"Idempotency-Key": "order-1"}
+    client.post("/orders/", json=order_request, headers=headers)
+
+    query_counter.clear()
+    client.post("/orders/", json=order_request, headers=headers)
+    assert len(query_counter) == 1
+    assert "idempotency_keys" in query_counter[0]
+
+
+def test_key_reused_with_different_request(client: TestClient, order_request):
+    headers = {"Idempotency-Key": "order-1"}
+    client.post("/orders/", json=order_request, headers=headers)
+
+    order_request["items"][0]["quantity"] = 3
+    response = client.post("/orders/", json=order_request, headers=headers)
+    assert response.status_code == 422
+    assert len(client.get("/orders/").json()) == 1
+
+
+def test_requests_without_key_are_not_stored(client: TestClient, order_request):
+    client.post("/orders/", json=order_request)
+    client.post("/orders/", json=order_request)
+    assert len(client.get("/orders/").json()) == 2
+    with TestingSessionLocal() as db:
+        assert db.query(models.IdempotencyKey).count() == 0
+
+
+def test_invalid_key(client: TestClient, order_request):
+    response = client.post("/orders/", json=order_request, headers={"Idempotency-Key": "x" * 256})
+    assert response.status_code == 400
+    assert client.get("/orders/").json() == []
+
+
+def test_failed_request_releases_key(client: TestClient, order_request):
+    headers = {"Idempotency-Key": "order-1"}
+    missing = {**order_request, "customer_id": 999}
+    assert client.post("/orders/", json=missing, headers=headers).status_code == 422
+
+    # Nothing was stored, so the key is free for a corrected request
+    response = client.post("/orders/", json=order_request, headers=headers)
+    assert response.status_code == 200
+    assert "idempotent-replayed" not in response.headers
+
+
+def test_key_in_progress(client: TestClient, order_request):
+    body = json.dumps(order_request).encode()
+    with TestingSessionLocal() as db:
+        # A first attempt with the same body that is still running
+        assert idempotency.reserve(
+            db, idempotency._hash(b"order-1"), idempotency._hash(b"/orders", b"", body), time.time()
+        ) is None
+
+    response = client.post("/orders/", content=body, headers={
+        "Idempotency-Key": "order-1", "Content-Type": "application/json"
+    })
+    assert response.status_code == 409
+    assert client.get("/orders/").json() == []
+
+
+def test_bulk_import_replay(client: TestClient):
+    body = [{"title": "One"}, {"title": "Two"}]
+    headers = {"Idempotency-Key": "categories-1"}
+    first = client.post("/categories/bulk", json=body, headers=headers)
+    retry = client.post("/categories/bulk", json=body, headers=headers)
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    assert len(client.get("/categories/").json()) == 2
+
+
+def test_expired_keys_are_reused_and_purged(client: TestClient, order_request):
+    headers = {"Idempotency-Key": "order-1"}
+    client.post("/orders/", json=order_request, headers=headers)
+    with TestingSessionLocal() as db:
+        db.query(models.IdempotencyKey).update({"expires_at": time.time() - 1})
+        db.commit()
+
+    response = client.post("/orders/", json=order_request, headers=headers)
+    assert "idempotent-replayed" not in response.headers
+    assert len(client.get("/orders/").json()) == 2
+
+    with TestingSessionLocal() as db:
+        assert idempotency.purge_expired(db, time.time()) == 0
+        assert idempotency.purge_expired(db, time.time() + 10 ** 6) == 1
+        assert db.query(models.IdempotencyKey).count() == 0
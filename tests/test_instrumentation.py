@@ -0,0 +1,64 @@
+import logging
+
+from sqlalchemy import create_engine, text
+
+from app.instrumentation import instrument_engine
+from app.metrics import route_snapshot
+
+
+def _server_timing(response):
+    entries = {}
+    for entry in response.headers["server-timing"].split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+
+def test_server_timing_reports_queries(client):
+    response = client.get("/customers/")
+    assert response.status_code == 200
+
+    timing = _server_timing(response)
+    # The resource versions lookup of the ETag and the list itself
+    assert timing["db"]["desc"] == '"2 queries"'
+    assert float(timing["db"]["dur"]) >= 0
+    assert float(timing["app"]["dur"]) >= float(timing["db"]["dur"])
+
+
+def _count(routes, route, histogram):
+    return routes[route][histogram]["count"] if route in routes else 0
+
+
+def test_route_metrics_are_aggregated_by_route_template(client):
+    # The metrics are process-wide, so only this test's requests are compared
+    before = route_snapshot()
+    customer = client.post("/customers/", json={"name": "A", "surname": "B", "email": "a@example.com"}).json()
+    client.get(f"/customers/{customer['id']}")
+    client.get(f"/customers/{customer['id']}")
+    client.get("/customers/999")
+    client.get("/does-not-exist")
+
+    routes = client.get("/metrics/routes").json()["routes"]
+
+    by_id = "GET /customers/{customer_id}"
+    assert _count(routes, by_id, "latency_ms") - _count(before, by_id, "latency_ms") == 3
+    assert _count(routes, by_id, "queries") - _count(before, by_id, "queries") == 3
+    assert routes[by_id]["queries"]["buckets"]["+Inf"] == routes[by_id]["queries"]["count"]
+    assert routes[by_id]["slowest_statement"].startswith("SELECT")
+    assert routes["POST /customers/"]["queries"]["sum"] >= 2
+    assert _count(routes, "<unmatched>", "latency_ms") - _count(before, "<unmatched>", "latency_ms") == 1
+    assert "/customers/1" not in "".join(routes)
+
+
+def test_slow_queries_are_logged(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, slow_query_ms=0.000001)
+    instrument_engine(engine, slow_query_ms=0.000001)
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    slow = [record for record in caplog.records if record.name == "app.sql"]
+    assert len(slow) == 1
+    assert "SELECT 1" in slow[0].getMessage()
@@ -0,0 +1,124 @@
+import threading
+
+from app.metrics import Counter, Histogram, Slowest, render, route_snapshot
+
+
+def _samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    samples = {}
+    for line in response.text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def _create_order(client):
+    customer = client.post("/customers/", json={"name": "A", "surname": "B", "email": "a@example.com"}).json()
+    item = client.post("/shop-items/", json={"title": "Item", "description": "", "price": 1.0, "category_ids": []}).json()
+    return client.post("/orders/", json={
+        "customer_id": customer["id"],
+        "items": [{"shop_item_id": item["id"], "quantity": 1}, {"shop_item_id": item["id"], "quantity": 2}],
+    })
+
+
+def test_metrics_count_requests_per_route_template(client):
+    before = _samples(client)
+    client.get("/customers/999")
+    client.get("/customers/998")
+    after = _samples(client)
+
+    key = 'shop_http_requests_total{method="GET",route="/customers/{customer_id}",status="404"}'
+    assert after[key] - before.get(key, 0) == 2
+    count = 'shop_http_request_duration_seconds_count{method="GET",route="/customers/{customer_id}"}'
+    inf = 'shop_http_request_duration_seconds_bucket{method="GET",route="/customers/{customer_id}",le="+Inf"}'
+    assert after[count] == after[inf]
+    queries = 'shop_db_queries_per_request_count{method="GET",route="/customers/{customer_id}"}'
+    assert after[queries] - before.get(queries, 0) == 2
+    # The scrape itself is in flight
+    assert after["shop_http_requests_in_flight"] == 1
+
+
+def test_metrics_count_orders_and_lines(client):
+    before = _samples(client)
+    assert _create_order(client).status_code == 200
+    after = _samples(client)
+
+    assert after["shop_orders_created_total"] - before.get("shop_orders_created_total", 0) == 1
+    assert after["shop_order_lines_created_total"] - before.get("shop_order_lines_created_total", 0) == 2
+
+
+def test_metrics_report_threadpool_and_pool(client):
+    samples = _samples(client)
+
+    assert samples["shop_threadpool_threads_max"] > 0
+    assert samples["shop_threadpool_threads_busy"] >= 0
+    assert samples['shop_db_pool_size{engine="sync"}'] >= 0
+    assert 'shop_db_pool_checked_out{engine="sync"}' in samples
+
+
+def test_sharded_counter_sums_threads():
+    counter = Counter("test_total", "Test.", ("kind",))
+
+    def work():
+        for _ in range(1000):
+            counter.inc(labels=("a",))
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.values() == {("a",): 8000}
+
+
+def test_render_histogram():
+    histogram = Histogram("test_seconds", "Test.", (0.1, 1), ("route",))
+    histogram.observe(0.05, ("/a",))
+    histogram.observe(0.5, ("/a",))
+    histogram.observe(5, ("/a",))
+
+    assert render([histogram]).splitlines() == [
+        "# HELP test_seconds Test.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 5.55',
+        'test_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_route_snapshot_merges_shards_in_milliseconds(client):
+    before = route_snapshot().get("GET /health", {"latency_ms": {"count": 0}})["latency_ms"]["count"]
+
+    def work():
+        for _ in range(5):
+            client.get("/health")
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    health = route_snapshot()["GET /health"]
+    assert health["latency_ms"]["count"] - before == 20
+    assert list(health["latency_ms"]["buckets"])[:2] == ["5", "10"]
+    assert health["latency_ms"]["buckets"]["+Inf"] == health["latency_ms"]["count"]
+    assert health["queries"]["buckets"]["0"] >= 20
+    assert health["slowest_statement"] is None
+
+
+def test_slowest_keeps_the_maximum_across_shards():
+    slowest = Slowest("test_slowest", "Test.", ("route",))
+    slowest.observe(0.2, "SELECT 2", ("/a",))
+    thread = threading.Thread(target=slowest.observe, args=(0.5, "SELECT 5", ("/a",)))
+    thread.start()
+    thread.join()
+    slowest.observe(0.1, "SELECT 1", ("/a",))
+
+    assert slowest.values() == {("/a",): (0.5, "SELECT 5")}
@@ -0,0 +1,148 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app.migrations import LATEST_VERSION, MIGRATIONS, get_version, migrate
+from app.models import Base
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'indexes.db'}")
+    Base.metadata.create_all(bind=engine)
+    migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+def query_plan(engine, sql: str) -> str:
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize("sql, index", [
+    ("SELECT * FROM orders WHERE customer_id = 1", "ix_orders_customer_id"),
+    ("SELECT * FROM order_items WHERE order_id = 1", "ix_order_items_order_id"),
+    ("SELECT * FROM order_items WHERE shop_item_id = 1", "ix_order_items_sales"),
+    (
+        "SELECT shop_item_id FROM shop_item_category_association WHERE category_id = 1",
+        "ix_shop_item_category_association_category_id",
+    ),
+    ("SELECT * FROM customers WHERE surname = 'Doe'", "ix_customers_surname"),
+    ("SELECT * FROM shop_items WHERE title = 'Laptop'", "ix_shop_items_title"),
+])
+def test_lookups_use_indexes(migrated_engine, sql, index):
+    assert f"INDEX {index}" in query_plan(migrated_engine, sql)
+
+
+def test_order_lines_join_uses_index(migrated_engine):
+    plan = query_plan(
+        migrated_engine,
+        "SELECT * FROM orders JOIN order_items ON order_items.order_id = orders.id WHERE orders.customer_id = 1",
+    )
+    assert "INDEX ix_orders_customer_id" in plan
+    assert "INDEX ix_order_items_order_id" in plan
+
+
+def test_fresh_database_is_stamped(migrated_engine):
+    with migrated_engine.connect() as connection:
+        assert get_version(connection) == LATEST_VERSION
+    assert migrate(migrated_engine) == []
+
+
+def test_migrate_existing_database(migrated_engine):
+    # Bring the database back to the state of a shop.db created before the
+    # indexes existed
+    with migrated_engine.begin() as connection:
+        for table in ("orders", "order_items", "customers", "shop_items", "shop_item_category_association"):
+            for index in inspect(connection).get_indexes(table):
+                if index["name"] != "ix_" + table + "_id":
+                    connection.exec_driver_sql(f"DROP INDEX {index['name']}")
+        connection.exec_driver_sql("PRAGMA user_version = 0")
+    assert "ix_orders_customer_id" not in query_plan(migrated_engine, "SELECT * FROM orders WHERE customer_id = 1")
+
+    assert migrate(migrated_engine) == list(range(1, LATEST_VERSION + 1))
+    assert "INDEX ix_orders_customer_id" in query_plan(migrated_engine, "SELECT * FROM orders WHERE customer_id = 1")
+
+
+def test_cheapest_items_use_price_index(migrated_engine):
+    plan = query_plan(migrated_engine, "SELECT * FROM shop_items WHERE price >= 10 ORDER BY price, id LIMIT 20")
+    assert "INDEX ix_shop_items_price" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_migrate_adds_search_index(migrated_engine):
+    # A database from before full-text search, with items already in it
+    with migrated_engine.begin() as connection:
+        connection.exec_driver_sql("DROP TABLE shop_items_fts")
+        for trigger in ("insert", "delete", "update"):
+            connection.exec_driver_sql(f"DROP TRIGGER shop_items_fts_{trigger}")
+        connection.exec_driver_sql("INSERT INTO shop_items (title, description, price) VALUES ('Garden Hose', '', 1)")
+        connection.exec_driver_sql("PRAGMA user_version = 2")
+
+    assert migrate(migrated_engine) == list(range(3, LATEST_VERSION + 1))
+    with migrated_engine.connect() as connection:
+        rows = connection.exec_driver_sql("SELECT rowid FROM shop_items_fts WHERE shop_items_fts MATCH 'hose'").all()
+    assert len(rows) == 1
+
+
+def test_customer_order_history_uses_index(migrated_engine):
+    plan = query_plan(migrated_engine, "SELECT * FROM orders WHERE customer_id = 1 AND id > 10 ORDER BY id LIMIT 20")
+    assert "INDEX ix_orders_customer_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_item_sales_read_only_the_covering_index(migrated_engine):
+    plan = query_plan(
+        migrated_engine, "SELECT shop_item_id, sum(quantity), count(*) FROM order_items GROUP BY shop_item_id"
+    )
+    assert "COVERING INDEX ix_order_items_sales" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_migrate_backfills_order_totals(migrated_engine):
+    # A database from before order lines captured their prices
+    with migrated_engine.begin() as connection:
+        connection.exec_driver_sql("DROP INDEX ix_order_items_sales")
+        connection.exec_driver_sql("ALTER TABLE order_items DROP COLUMN unit_price")
+        connection.exec_driver_sql("ALTER TABLE orders DROP COLUMN total")
+        connection.exec_driver_sql("CREATE INDEX ix_order_items_sales ON order_items (shop_item_id, quantity)")
+        connection.exec_driver_sql("CREATE INDEX ix_order_items_shop_item_id ON order_items (shop_item_id)")
+        connection.exec_driver_sql("INSERT INTO customers (id, name, surname, email) VALUES (1, 'A', 'B', 'a@b.c')")
+        connection.exec_driver_sql("INSERT INTO shop_items (id, title, price) VALUES (1, 'Mug', 2.5), (2, 'Pan', 4)")
+        connection.exec_driver_sql("INSERT INTO orders (id, customer_id) VALUES (1, 1), (2, 1)")
+        connection.exec_driver_sql(
+            "INSERT INTO order_items (order_id, shop_item_id, quantity) VALUES (1, 1, 2), (1, 2, 1)"
+        )
+        connection.exec_driver_sql("PRAGMA user_version = 4")
+
+    assert migrate(migrated_engine) == list(range(5, LATEST_VERSION + 1))
+    with migrated_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT unit_price FROM order_items ORDER BY id").scalars().all() == [2.5, 4]
+        assert connection.exec_driver_sql("SELECT total FROM orders ORDER BY id").scalars().all() == [9.0, 0]
+        indexes = {index["name"]: index["column_names"] for index in inspect(connection).get_indexes("order_items")}
+    assert indexes["ix_order_items_sales"] == ["shop_item_id", "quantity", "unit_price"]
+    assert "ix_order_items_shop_item_id" not in indexes
+
+
+def test_failed_migration_is_rolled_back(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'failing.db'}")
+    Base.metadata.create_all(bind=engine)
+
+    def failing_upgrade(connection):
+        connection.exec_driver_sql("CREATE TABLE half_done (id INTEGER)")
+        connection.exec_driver_sql("DROP INDEX ix_shop_items_price")
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr(
+        "app.migrations.MIGRATIONS",
+        MIGRATIONS + [(LATEST_VERSION + 1, "Fail halfway", failing_upgrade)],
+    )
+    with pytest.raises(RuntimeError):
+        migrate(engine)
+
+    # Earlier migrations stay applied, the failed one left no trace
+    with engine.connect() as connection:
+        assert get_version(connection) == LATEST_VERSION
+        assert not inspect(connection).has_table("half_done")
+        assert "ix_shop_items_price" in {index["name"] for index in inspect(connection).get_indexes("shop_items")}
+    engine.dispose()
@@ -156,6 +156,156 @@ def test_update_order(client: TestClient):
     assert len(data["items"]) == 1
     assert data["items"][0]["shop_item_id"] == item2_id
     assert data["items"][0]["quantity"] == 3
+    assert data["items"][0]["unit_price"] == 20.0
+    assert data["total"] == 60.0
+
+
+def test_order_lines_keep_their_price(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Customer", "email": "test.prices@example.com"
+    }).json()["id"]
+    item1_id = client.post("/shop-items/", json={"title": "Item 1", "price": 10.0}).json()["id"]
+    item2_id = client.post("/shop-items/", json={"title": "Item 2", "price": 0.1}).json()["id"]
+
+    response = client.post("/orders/", json={"customer_id": customer_id, "items": [
+        {"shop_item_id": item1_id, "quantity": 2},
+        {"shop_item_id": item2_id, "quantity": 3},
+    ]})
+    data = response.json()
+    assert [item["unit_price"] for item in data["items"]] == [10.0, 0.1]
+    assert data["total"] == 20.3
+    order_id = data["id"]
+
+    client.put(f"/shop-items/{item1_id}", json={"price": 99.0})
+    data = client.get(f"/orders/{order_id}").json()
+    assert data["items"][0]["unit_price"] == 10.0
+    assert data["items"][0]["shop_item"]["price"] == 99.0
+    assert data["total"] == 20.3
+
+    # Changing only the customer keeps the lines and the total
+    data = client.put(f"/orders/{order_id}", json={"customer_id": customer_id}).json()
+    assert data["total"] == 20.3
+
+    data = client.put(f"/orders/{order_id}", json={"items": []}).json()
+    assert data["items"] == []
+    assert data["total"] == 0.0
+
+
+def test_update_order_keeps_unchanged_lines(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Customer", "email": "test.diff@example.com"
+    }).json()["id"]
+    item_ids = [client.post("/shop-items/", json={"title": f"Item {i}", "price": 2.0}).json()["id"] for i in range(3)]
+    data = client.post("/orders/", json={"customer_id": customer_id, "items": [
+        {"shop_item_id": item_ids[0], "quantity": 1},
+        {"shop_item_id": item_ids[1], "quantity": 1},
+    ]}).json()
+    line_ids = {item["shop_item_id"]: item["id"] for item in data["items"]}
+
+    client.put(f"/shop-items/{item_ids[0]}", json={"price": 50.0})
+    data = client.put(f"/orders/{data['id']}", json={"items": [
+        {"shop_item_id": item_ids[0], "quantity": 4},
+        {"shop_item_id": item_ids[2], "quantity": 1},
+    ]}).json()
+
+    lines = {item["shop_item_id"]: item for item in data["items"]}
+    assert set(lines) == {item_ids[0], item_ids[2]}
+    # The changed line is updated in place and keeps its captured price
+    assert lines[item_ids[0]]["id"] == line_ids[item_ids[0]]
+    assert lines[item_ids[0]]["quantity"] == 4
+    assert lines[item_ids[0]]["unit_price"] == 2.0
+    assert lines[item_ids[2]]["unit_price"] == 2.0
+    assert data["total"] == 10.0
+
+
+def test_update_order_item(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Customer", "email": "test.patch@example.com"
+    }).json()["id"]
+    item1_id = client.post("/shop-items/", json={"title": "Item 1", "price": 3.0}).json()["id"]
+    item2_id = client.post("/shop-items/", json={"title": "Item 2", "price": 10.0}).json()["id"]
+    data = client.post("/orders/", json={"customer_id": customer_id, "items": [
+        {"shop_item_id": item1_id, "quantity": 1},
+        {"shop_item_id": item2_id, "quantity": 1},
+    ]}).json()
+    order_id = data["id"]
+    line_id = data["items"][0]["id"]
+
+    response = client.patch(f"/orders/{order_id}/items/{line_id}", json={"quantity": 5})
+    assert response.status_code == 200
+    assert response.json()["id"] == line_id
+    assert response.json()["quantity"] == 5
+    assert response.json()["shop_item"]["id"] == item1_id
+    assert client.get(f"/orders/{order_id}").json()["total"] == 25.0
+
+    # Switching the item captures the new item's price
+    response = client.patch(f"/orders/{order_id}/items/{line_id}", json={"shop_item_id": item2_id})
+    assert response.json()["unit_price"] == 10.0
+    assert client.get(f"/orders/{order_id}").json()["total"] == 60.0
+
+
+def test_update_order_item_not_found(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Customer", "email": "test.patch404@example.com"
+    }).json()["id"]
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+    first = client.post("/orders/", json={"customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 1}]})
+    second = client.post("/orders/", json={"customer_id": customer_id})
+    line_id = first.json()["items"][0]["id"]
+
+    # A line can only be edited through its own order
+    response = client.patch(f"/orders/{second.json()['id']}/items/{line_id}", json={"quantity": 2})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Order line not found"
+    assert client.patch(f"/orders/99999/items/{line_id}", json={"quantity": 2}).status_code == 404
+
+
+def test_create_order_with_unknown_references(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Customer", "email": "test.refs@example.com"
+    }).json()["id"]
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+
+    response = client.post("/orders/", json={"customer_id": 99999, "items": [
+        {"shop_item_id": item_id, "quantity": 1},
+        {"shop_item_id": 99998, "quantity": 1},
+        {"shop_item_id": 99997, "quantity": 1},
+        {"shop_item_id": 99998, "quantity": 2},
+    ]})
+    assert response.status_code == 422
+    assert {error["loc"][-1]: error["ids"] for error in response.json()["detail"]} == {
+        "customer_id": [99999],
+        "shop_item_id": [99997, 99998],
+    }
+    assert client.get("/orders/").json() == []
+
+    response = client.post("/orders/", json={"customer_id": customer_id, "items": [{"shop_item_id": 5, "quantity": 1}]})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "shop_item_id"]
+
+
+def test_update_order_with_unknown_references(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Customer", "email": "test.refs2@example.com"
+    }).json()["id"]
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+    data = client.post("/orders/", json={
+        "customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 1}]
+    }).json()
+    order_id = data["id"]
+    line_id = data["items"][0]["id"]
+
+    assert client.put(f"/orders/{order_id}", json={"customer_id": 99999}).status_code == 422
+    response = client.put(f"/orders/{order_id}", json={"items": [{"shop_item_id": 99999, "quantity": 1}]})
+    assert response.status_code == 422
+    response = client.patch(f"/orders/{order_id}/items/{line_id}", json={"shop_item_id": 99999})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["ids"] == [99999]
+
+    # Nothing was written
+    data = client.get(f"/orders/{order_id}").json()
+    assert data["customer_id"] == customer_id
+    assert [(item["id"], item["shop_item_id"]) for item in data["items"]] == [(line_id, item_id)]
 
 
 def test_delete_order(client: TestClient):
@@ -197,4 +347,94 @@ def test_update_nonexistent_order(client: TestClient):
 
 def test_delete_nonexistent_order(client: TestClient):
     response = client.delete("/orders/99999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_read_orders_with_cursor(client: TestClient):
+    customer_data = {
+        "name": "Test",
+        "surname": "Customer",
+        "email": "test.customer8@example.com"
+    }
+    customer_id = client.post("/customers/", json=customer_data).json()["id"]
+    order_ids = [
+        client.post("/orders/", json={"customer_id": customer_id}).json()["id"]
+        for _ in range(3)
+    ]
+
+    first_page = client.get("/orders/", params={"limit": 2})
+    assert [order["id"] for order in first_page.json()] == order_ids[:2]
+
+    next_cursor = first_page.headers["X-Next-Cursor"]
+    second_page = client.get("/orders/", params={"limit": 2, "cursor": next_cursor})
+    assert [order["id"] for order in second_page.json()] == order_ids[2:]
+    assert "X-Next-Cursor" not in second_page.headers
+
+
+def create_export_fixture(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Export",
+        "surname": "Customer",
+        "email": "export.customer@example.com"
+    }).json()["id"]
+    item1_id = client.post("/shop-items/", json={"title": "Item 1", "price": 10.0}).json()["id"]
+    item2_id = client.post("/shop-items/", json={"title": "Item, with comma", "price": 2.5}).json()["id"]
+    order1_id = client.post("/orders/", json={
+        "customer_id": customer_id,
+        "items": [
+            {"shop_item_id": item1_id, "quantity": 1},
+            {"shop_item_id": item2_id, "quantity": 4}
+        ]
+    }).json()["id"]
+    order2_id = client.post("/orders/", json={"customer_id": customer_id}).json()["id"]
+    return order1_id, order2_id
+
+
+def test_export_orders_ndjson(client: TestClient):
+    import json
+    order1_id, order2_id = create_export_fixture(client)
+
+    response = client.get("/orders/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["order_id"] for row in rows] == [order1_id, order1_id, order2_id]
+    assert rows[1]["customer_email"] == "export.customer@example.com"
+    assert rows[1]["quantity"] == 4
+    assert rows[1]["unit_price"] == 2.5
+    assert rows[1]["line_total"] == 10.0
+    assert rows[2]["line_id"] is None
+
+
+def test_export_orders_csv_in_batches(client: TestClient, monkeypatch):
+    import csv
+    from app import export
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+    order1_id, order2_id = create_export_fixture(client)
+
+    response = client.get("/orders/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert [int(row["order_id"]) for row in rows] == [order1_id, order1_id, order2_id]
+    assert rows[1]["shop_item_title"] == "Item, with comma"
+
+
+def test_export_orders_invalid_format(client: TestClient):
+    response = client.get("/orders/export", params={"format": "xml"})
+    assert response.status_code == 422
+
+
+def test_create_order_keeps_line_order(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Line", "surname": "Order", "email": "line.order@example.com"
+    }).json()["id"]
+    item_ids = [client.post("/shop-items/", json={"title": f"Item {i}", "price": 1.0}).json()["id"] for i in range(4)]
+    requested = [(item_ids[2], 1), (item_ids[0], 3), (item_ids[3], 1), (item_ids[0], 2)]
+
+    response = client.post("/orders/", json={"customer_id": customer_id, "items": [
+        {"shop_item_id": shop_item_id, "quantity": quantity} for shop_item_id, quantity in requested
+    ]})
+    assert response.status_code == 200
+    lines = response.json()["items"]
+    assert [(line["shop_item_id"], line["quantity"]) for line in lines] == requested
+    assert [line["id"] for line in lines] == sorted(line["id"] for line in lines)
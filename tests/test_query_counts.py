@@ -0,0 +1,188 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+def create_orders(client: TestClient, count: int, start: int = 0):
+    # Every order gets its own customer, categories and items so that
+    # lazy loading would issue a query per row at every level.
+    for i in range(start, start + count):
+        customer = client.post("/customers/", json={
+            "name": "Test",
+            "surname": f"Customer{i}",
+            "email": f"query.count{i}@example.com"
+        }).json()
+        category = client.post("/categories/", json={"title": f"Category {i}"}).json()
+        item_ids = []
+        for j in range(2):
+            item = client.post("/shop-items/", json={
+                "title": f"Item {i}-{j}",
+                "price": 10.0 + j,
+                "category_ids": [category["id"]]
+            }).json()
+            item_ids.append(item["id"])
+        client.post("/orders/", json={
+            "customer_id": customer["id"],
+            "items": [{"shop_item_id": item_id, "quantity": 1} for item_id in item_ids]
+        })
+
+
+def count_queries(client: TestClient, query_counter, url: str):
+    query_counter.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    # Leave out the resource version lookup made for the ETag
+    return len([statement for statement in query_counter if "FROM resource_versions" not in statement])
+
+
+def test_read_orders_query_count_is_constant(client: TestClient, query_counter):
+    create_orders(client, 2)
+    small_page = count_queries(client, query_counter, "/orders/")
+
+    create_orders(client, 8, start=2)
+    large_page = count_queries(client, query_counter, "/orders/")
+
+    assert small_page == large_page
+    assert large_page <= 4
+
+
+def test_read_order_query_count(client: TestClient, query_counter):
+    create_orders(client, 1)
+    order_id = client.get("/orders/").json()[0]["id"]
+
+    assert count_queries(client, query_counter, f"/orders/{order_id}") <= 4
+
+
+def test_read_shop_items_query_count_is_constant(client: TestClient, query_counter):
+    create_orders(client, 1)
+    small_page = count_queries(client, query_counter, "/shop-items/")
+
+    create_orders(client, 10, start=1)
+    large_page = count_queries(client, query_counter, "/shop-items/")
+
+    assert small_page == large_page
+    assert large_page <= 2
+
+
+def test_create_order_query_count(client: TestClient, query_counter):
+    customer = client.post("/customers/", json={
+        "name": "Test",
+        "surname": "Customer",
+        "email": "bulk.order@example.com"
+    }).json()
+    category = client.post("/categories/", json={"title": "Category"}).json()
+    item_ids = [
+        client.post("/shop-items/", json={
+            "title": f"Item {i}",
+            "price": 1.0 + i,
+            "category_ids": [category["id"]]
+        }).json()["id"]
+        for i in range(5)
+    ]
+
+    query_counter.clear()
+    response = client.post("/orders/", json={
+        "customer_id": customer["id"],
+        "items": [{"shop_item_id": item_id, "quantity": 2} for item_id in item_ids]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["customer"]["id"] == customer["id"]
+    assert [item["shop_item"]["categories"][0]["id"] for item in data["items"]] == [category["id"]] * 5
+
+    # One lookup per referenced table, one INSERT for the order and one
+    # batched INSERT for all of its lines
+    inserts = [statement for statement in query_counter if statement.startswith("INSERT INTO order")]
+    assert len(inserts) == 2
+    # Plus the resource version bump
+    assert len(query_counter) <= 6
+
+
+def test_categories_with_counts_is_one_query(client: TestClient, query_counter):
+    create_orders(client, 5)
+
+    assert count_queries(client, query_counter, "/categories/?with_counts=true") == 1
+
+
+def test_customer_order_summary_is_one_query(client: TestClient, query_counter):
+    create_orders(client, 3)
+    customer_id = client.get("/orders/").json()[0]["customer"]["id"]
+
+    assert count_queries(client, query_counter, f"/customers/{customer_id}/orders/summary") == 1
+    assert count_queries(client, query_counter, f"/customers/{customer_id}/orders") <= 4
+
+
+def test_update_order_writes_only_changed_lines(client: TestClient, query_counter):
+    customer = client.post("/customers/", json={
+        "name": "Test", "surname": "Buyer", "email": "query.count.b2b@example.com"
+    }).json()
+    item_ids = [client.post("/shop-items/", json={"title": f"Part {i}", "price": 1.0}).json()["id"] for i in range(52)]
+    lines = [{"shop_item_id": item_id, "quantity": 1} for item_id in item_ids[:50]]
+    order_id = client.post("/orders/", json={"customer_id": customer["id"], "items": lines}).json()["id"]
+
+    # Change two quantities, drop one line and add two
+    lines[0]["quantity"] = 5
+    lines[1]["quantity"] = 7
+    lines = lines[:-1] + [{"shop_item_id": item_id, "quantity": 1} for item_id in item_ids[50:]]
+    query_counter.clear()
+    response = client.put(f"/orders/{order_id}", json={"items": lines})
+    assert response.status_code == 200
+
+    # One statement per kind of change, the UPDATE being an executemany
+    writes = [statement.split()[0] for statement in query_counter if "order_items" in statement.split()[:3]]
+    assert sorted(writes) == ["DELETE", "INSERT", "UPDATE"]
+
+
+def test_update_order_matches_lines_on_quantity_first(client: TestClient, query_counter):
+    customer = client.post("/customers/", json={
+        "name": "Test", "surname": "Buyer", "email": "query.count.match@example.com"
+    }).json()
+    item_ids = [client.post("/shop-items/", json={"title": f"Part {i}", "price": 1.0}).json()["id"] for i in range(2)]
+    data = client.post("/orders/", json={"customer_id": customer["id"], "items": [
+        {"shop_item_id": item_ids[0], "quantity": 1},
+        {"shop_item_id": item_ids[0], "quantity": 2},
+    ]}).json()
+    kept_id = data["items"][1]["id"]
+
+    query_counter.clear()
+    response = client.put(f"/orders/{data['id']}", json={"items": [
+        {"shop_item_id": item_ids[0], "quantity": 2},
+        {"shop_item_id": item_ids[1], "quantity": 1},
+    ]})
+    assert response.status_code == 200
+
+    # The line with the wanted quantity is kept as is, the other one deleted
+    writes = [statement.split()[0] for statement in query_counter if "order_items" in statement.split()[:3]]
+    assert sorted(writes) == ["DELETE", "INSERT"]
+    lines = {(line["shop_item_id"], line["quantity"]): line["id"] for line in response.json()["items"]}
+    assert lines[(item_ids[0], 2)] == kept_id
+
+
+def test_order_reference_checks_are_one_query_per_table(client: TestClient, query_counter):
+    customer = client.post("/customers/", json={
+        "name": "Test", "surname": "Buyer", "email": "query.count.refs@example.com"
+    }).json()
+    item_id = client.post("/shop-items/", json={"title": "Part", "price": 1.0}).json()["id"]
+
+    query_counter.clear()
+    response = client.post("/orders/", json={
+        "customer_id": customer["id"],
+        "items": [{"shop_item_id": item_id + i, "quantity": 1} for i in range(50)]
+    })
+    assert response.status_code == 422
+    assert len(response.json()["detail"][0]["ids"]) == 49
+    # One lookup for the customer, one for all the items and one for their
+    # categories, whatever the number of lines; nothing is written
+    assert len(query_counter) == 3
+    assert all(statement.startswith("SELECT") for statement in query_counter)
+
+
+def test_bulk_import_is_one_insert_per_chunk(client: TestClient, query_counter):
+    titles = [f"Category {i % 3}" for i in range(50)]
+    response = client.post("/categories/bulk", json=[{"title": title} for title in titles])
+
+    inserts = [statement for statement in query_counter if statement.startswith("INSERT INTO shop_item_categories")]
+    assert len(inserts) == 1
+    # Ids are paired with their rows by position
+    ids = response.json()["ids"]
+    assert ids == sorted(ids)
+    assert [client.get(f"/categories/{category_id}").json()["title"] for category_id in ids[:4]] == titles[:4]
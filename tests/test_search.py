@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.search import match_expression, rebuild_search_index
+from tests.conftest import engine
+
+
+def _item(client: TestClient, title: str, description: str = "", category_ids=()):
+    return client.post("/shop-items/", json={
+        "title": title, "description": description, "price": 1.0, "category_ids": list(category_ids),
+    }).json()
+
+
+def _search(client: TestClient, query: str):
+    response = client.get("/shop-items/search", params={"q": query})
+    assert response.status_code == 200
+    return [item["title"] for item in response.json()]
+
+
+def test_search_matches_prefixes_of_every_word(client: TestClient):
+    _item(client, "Gaming Laptop", "Fast and light")
+    _item(client, "Laptop Bag", "Fits a 15 inch laptop")
+    _item(client, "Desk Lamp")
+
+    assert sorted(_search(client, "lap")) == ["Gaming Laptop", "Laptop Bag"]
+    assert _search(client, "gam LAPTOP") == ["Gaming Laptop"]
+    assert _search(client, "inch") == ["Laptop Bag"]
+    assert _search(client, "phone") == []
+
+
+def test_search_ranks_title_matches_first(client: TestClient):
+    _item(client, "Coffee Mug", "A cup for tea drinkers")
+    _item(client, "Green Tea", "Loose leaf")
+
+    assert _search(client, "tea") == ["Green Tea", "Coffee Mug"]
+
+
+def test_search_filters_by_category(client: TestClient):
+    books = client.post("/categories/", json={"title": "Books", "description": ""}).json()["id"]
+    _item(client, "Python Cookbook", category_ids=[books])
+    _item(client, "Python Plush Toy")
+
+    response = client.get("/shop-items/search", params={"q": "python", "category_id": books})
+    assert [item["title"] for item in response.json()] == ["Python Cookbook"]
+
+
+def test_search_follows_writes(client: TestClient):
+    item = _item(client, "Red Scarf")
+    assert _search(client, "scarf") == ["Red Scarf"]
+
+    client.put(f"/shop-items/{item['id']}", json={"title": "Blue Hat"})
+    assert _search(client, "scarf") == []
+    assert _search(client, "hat") == ["Blue Hat"]
+
+    client.delete(f"/shop-items/{item['id']}")
+    assert _search(client, "hat") == []
+
+    client.post("/shop-items/bulk", json=[
+        {"title": "Bulk Kettle", "description": "", "price": 1.0, "category_ids": []},
+    ])
+    assert _search(client, "kettle") == ["Bulk Kettle"]
+
+
+def test_search_treats_operators_as_text(client: TestClient):
+    _item(client, "Cable OR Adapter")
+
+    assert _search(client, 'cable" OR "x') == []
+    assert _search(client, "adapter NOT*") == []
+    assert _search(client, "cable -adapter") == ["Cable OR Adapter"]
+    assert _search(client, "!!!") == []
+    assert client.get("/shop-items/search").status_code == 422
+
+
+def test_rebuild_search_index(client: TestClient):
+    _item(client, "Hiking Boots")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO shop_items_fts(shop_items_fts) VALUES ('delete-all')"))
+    assert _search(client, "boots") == []
+
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+    assert _search(client, "boots") == ["Hiking Boots"]
+
+
+def test_match_expression():
+    assert match_expression("Lap top") == '"Lap"* "top"*'
+    assert match_expression('a"b') == '"a"* "b"*'
+    assert match_expression("  ") is None
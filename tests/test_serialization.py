@@ -0,0 +1,78 @@
+from typing import List
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+
+from app import crud, schemas
+from app.main import app
+from tests.conftest import TestingSessionLocal
+
+
+@pytest.fixture
+def catalogue(client: TestClient):
+    customer_id = client.post("/customers/", json={
+        "name": "Fast", "surname": "Path", "email": "fast.path@example.com"
+    }).json()["id"]
+    tools = client.post("/categories/", json={"title": "Tools", "description": "Hand tools"}).json()["id"]
+    garden = client.post("/categories/", json={"title": "Garden"}).json()["id"]
+    items = [
+        client.post("/shop-items/", json={"title": "Rake", "price": 12.5, "category_ids": [garden, tools]}).json()["id"],
+        client.post("/shop-items/", json={"title": "Saw", "description": "Sharp", "price": 20.0}).json()["id"],
+        client.post("/shop-items/", json={"title": "Spade", "price": 7.25, "category_ids": [garden]}).json()["id"],
+    ]
+    client.post("/orders/", json={"customer_id": customer_id, "items": [
+        {"shop_item_id": items[0], "quantity": 2},
+        {"shop_item_id": items[1], "quantity": 1},
+    ]})
+    client.post("/orders/", json={"customer_id": customer_id})
+    client.post("/orders/", json={"customer_id": customer_id, "items": [{"shop_item_id": items[0], "quantity": 1}]})
+    return {"customer_id": customer_id, "tools": tools, "garden": garden, "items": items}
+
+
+def _dump(schema, rows):
+    return TypeAdapter(List[schema]).dump_python(rows, mode="json")
+
+
+def test_order_rows_match_schema(client: TestClient, catalogue):
+    with TestingSessionLocal() as db:
+        expected = _dump(schemas.Order, crud.get_orders(db))
+    response = client.get("/orders/")
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == expected
+    assert response.json()[0]["items"][0]["shop_item"]["categories"] != []
+
+    customer_orders = client.get(f"/customers/{catalogue['customer_id']}/orders", params={"skip": 1})
+    assert customer_orders.json() == expected[1:]
+
+
+def test_shop_item_rows_match_schema(client: TestClient, catalogue):
+    with TestingSessionLocal() as db:
+        expected = _dump(schemas.ShopItem, crud.get_shop_items(db, sort="-price"))
+    assert client.get("/shop-items/", params={"sort": "-price"}).json() == expected
+
+    category_items = client.get(f"/categories/{catalogue['garden']}/items").json()
+    assert [item["id"] for item in category_items] == [catalogue["items"][0], catalogue["items"][2]]
+
+
+def test_fast_path_keeps_headers(client: TestClient, catalogue):
+    first = client.get("/shop-items/", params={"limit": 2, "sort": "price"})
+    assert "etag" in first.headers
+    second = client.get("/shop-items/", params={"limit": 2, "sort": "price", "cursor": first.headers["x-next-cursor"]})
+    assert [item["title"] for item in second.json()] == ["Saw"]
+
+    orders = client.get("/orders/", params={"limit": 2})
+    assert "x-next-cursor" in orders.headers
+    etag = orders.headers["etag"]
+    assert client.get("/orders/", params={"limit": 2}, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_openapi_keeps_response_models(client: TestClient):
+    paths = client.get("/openapi.json").json()["paths"]
+
+    def response_schema(path):
+        return paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+
+    assert response_schema("/orders/")["items"] == {"$ref": "#/components/schemas/Order"}
+    assert response_schema("/shop-items/")["items"] == {"$ref": "#/components/schemas/ShopItem"}
+    assert response_schema("/customers/{customer_id}/orders")["items"] == {"$ref": "#/components/schemas/Order"}
@@ -146,6 +146,32 @@ def test_delete_shop_item(client: TestClient):
     assert response.status_code == 404
 
 
+def test_delete_ordered_shop_item(client: TestClient):
+    item_id = client.post("/shop-items/", json={"title": "Ordered Item", "price": 1.0}).json()["id"]
+    customer_id = client.post("/customers/", json={
+        "name": "Test", "surname": "Buyer", "email": "ordered.item@example.com"
+    }).json()["id"]
+    client.post("/orders/", json={"customer_id": customer_id, "items": [{"shop_item_id": item_id, "quantity": 1}]})
+
+    response = client.delete(f"/shop-items/{item_id}")
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Shop item is on orders"
+    assert client.get(f"/shop-items/{item_id}").status_code == 200
+
+
+def test_shop_item_with_unknown_categories(client: TestClient):
+    category_id = client.post("/categories/", json={"title": "Known"}).json()["id"]
+
+    response = client.post("/shop-items/", json={"title": "Item", "price": 1.0, "category_ids": [category_id, 99999]})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "category_ids"]
+    assert response.json()["detail"][0]["ids"] == [99999]
+    assert client.get("/shop-items/").json() == []
+
+    item_id = client.post("/shop-items/", json={"title": "Item", "price": 1.0}).json()["id"]
+    assert client.put(f"/shop-items/{item_id}", json={"category_ids": [99999]}).status_code == 422
+
+
 def test_read_nonexistent_shop_item(client: TestClient):
     response = client.get("/shop-items/99999")
     assert response.status_code == 404
@@ -159,4 +185,123 @@ def test_update_nonexistent_shop_item(client: TestClient):
 
 def test_delete_nonexistent_shop_item(client: TestClient):
     response = client.delete("/shop-items/99999")
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+def test_bulk_create_shop_items(client: TestClient):
+    category1_id = client.post("/categories/", json={"title": "Category 1"}).json()["id"]
+    category2_id = client.post("/categories/", json={"title": "Category 2"}).json()["id"]
+
+    items = [
+        {"title": "Item", "price": 1.0, "category_ids": [category1_id]},
+        {"title": "Item", "price": 1.0, "category_ids": [category1_id, category2_id]},
+        {"title": "Unknown category", "price": 2.0, "category_ids": [99999]},
+        {"title": "No price"},
+        {"title": "Plain", "description": "No categories", "price": 3.5},
+    ]
+    response = client.post("/shop-items/bulk", json=items)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 3
+    assert [error["index"] for error in data["errors"]] == [2, 3]
+    assert "99999" in data["errors"][0]["detail"]
+
+    category_counts = sorted(
+        len(client.get(f"/shop-items/{item_id}").json()["categories"]) for item_id in data["ids"][:2]
+    )
+    assert category_counts == [1, 2]
+    plain = client.get(f"/shop-items/{data['ids'][4]}").json()
+    assert plain["description"] == "No categories"
+    assert plain["categories"] == []
+
+
+def test_bulk_create_shop_items_in_chunks(client: TestClient, monkeypatch):
+    from app import crud
+    monkeypatch.setattr(crud, "BULK_CHUNK_SIZE", 3)
+
+    items = [{"title": f"Item {i}", "price": float(i)} for i in range(10)]
+    response = client.post("/shop-items/bulk", json=items)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 10
+    assert [client.get(f"/shop-items/{item_id}").json()["title"] for item_id in data["ids"]] == [
+        item["title"] for item in items
+    ]
+
+
+def _catalogue(client: TestClient):
+    electronics = client.post("/categories/", json={"title": "Electronics", "description": ""}).json()["id"]
+    books = client.post("/categories/", json={"title": "Books", "description": ""}).json()["id"]
+    items = [
+        ("Laptop", 999.0, [electronics]),
+        ("Phone", 599.0, [electronics]),
+        ("Python Book", 39.0, [books]),
+        ("Phone Guide", 15.0, [books, electronics]),
+        ("Mug", 9.0, []),
+        ("Phone Case", 15.0, [electronics]),
+    ]
+    for title, price, category_ids in items:
+        client.post("/shop-items/", json={
+            "title": title, "description": "", "price": price, "category_ids": category_ids,
+        })
+    return electronics, books
+
+
+def _titles(response):
+    assert response.status_code == 200
+    return [item["title"] for item in response.json()]
+
+
+def test_filter_shop_items(client: TestClient):
+    electronics, books = _catalogue(client)
+
+    assert _titles(client.get(f"/shop-items/?category_id={books}")) == ["Python Book", "Phone Guide"]
+    assert _titles(client.get(f"/shop-items/?category_id={books}&category_id={electronics}")) == [
+        "Laptop", "Phone", "Python Book", "Phone Guide", "Phone Case",
+    ]
+    assert _titles(client.get("/shop-items/?min_price=15&max_price=39")) == ["Python Book", "Phone Guide", "Phone Case"]
+    assert _titles(client.get("/shop-items/?title_prefix=Phone")) == ["Phone", "Phone Guide", "Phone Case"]
+    assert _titles(client.get("/shop-items/?title_prefix=phone")) == []
+    assert _titles(client.get(
+        f"/shop-items/?category_id={electronics}&max_price=600&title_prefix=Phone&sort=price"
+    )) == ["Phone Guide", "Phone Case", "Phone"]
+
+
+def test_sort_shop_items(client: TestClient):
+    _catalogue(client)
+
+    assert _titles(client.get("/shop-items/?sort=price")) == [
+        "Mug", "Phone Guide", "Phone Case", "Python Book", "Phone", "Laptop",
+    ]
+    assert _titles(client.get("/shop-items/?sort=-price")) == [
+        "Laptop", "Phone", "Python Book", "Phone Case", "Phone Guide", "Mug",
+    ]
+    assert _titles(client.get("/shop-items/?sort=title")) == [
+        "Laptop", "Mug", "Phone", "Phone Case", "Phone Guide", "Python Book",
+    ]
+    assert client.get("/shop-items/?sort=rating").status_code == 422
+
+
+@pytest.mark.parametrize("sort", ["price", "-price", "title", "-title", "id"])
+def test_keyset_pages_follow_the_sort_order(client: TestClient, sort):
+    electronics, _ = _catalogue(client)
+    expected = _titles(client.get(f"/shop-items/?sort={sort}&category_id={electronics}"))
+
+    titles = []
+    url = f"/shop-items/?sort={sort}&category_id={electronics}&limit=2"
+    response = client.get(url)
+    while True:
+        titles += _titles(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"{url}&cursor={cursor}")
+
+    assert titles == expected
+
+
+def test_cursor_must_match_sort(client: TestClient):
+    _catalogue(client)
+    cursor = client.get("/shop-items/?sort=price&limit=2").headers["X-Next-Cursor"]
+
+    response = client.get(f"/shop-items/?sort=title&limit=2&cursor={cursor}")
+    assert response.status_code == 400
@@ -0,0 +1,156 @@
+import os
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+import urllib.request
+
+from app.migrations import LATEST_VERSION
+
+# Wall time allowed for importing app.main once the frameworks it builds on
+# are loaded. Importing must not touch the database, so this only grows with
+# the number of models, schemas and routes. Best of three, the import takes
+# 250-350 ms on a development machine, in either database mode. Nearly all of
+# it is FastAPI building a pydantic TypeAdapter for every response model and
+# parameter of about 35 routes, once in their router and once more in
+# include_router, and pydantic building the schemas; mapper configuration and
+# the engines take another 40 ms. The budget is about twice that cost, so a
+# loaded CI machine passes while a heavy new import-time dependency still
+# fails. Database work at import is caught by the test below instead.
+IMPORT_BUDGET_MS = 750
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+START_APP = "from fastapi.testclient import TestClient\nfrom app.main import app\nwith TestClient(app): pass"
+
+
+def _run(code, tmp_path, **env):
+    environ = {
+        **os.environ,
+        "SHOP_DATABASE_URL": f"sqlite:///{tmp_path / 'shop.db'}",
+        "SHOP_INIT_DB": "1",
+        "SHOP_SEED_DATA": "0",
+        **env,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=environ, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_serving(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        assert process.poll() is None, process.stderr.read()
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError(f"{url} was not served within {timeout}s")
+
+
+def _customers(tmp_path):
+    with sqlite3.connect(tmp_path / "shop.db") as connection:
+        return connection.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+
+def test_import_does_not_touch_the_database(tmp_path):
+    _run("import app.main", tmp_path)
+
+    assert not (tmp_path / "shop.db").exists()
+
+
+def test_import_time_budget(tmp_path):
+    code = (
+        "import time\n"
+        "import anyio, fastapi, fastapi.routing, pydantic, sqlalchemy, sqlalchemy.ext.asyncio, sqlalchemy.orm\n"
+        "start = time.perf_counter()\n"
+        "import app.main\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    # Best of three, to keep a busy machine from failing the test
+    elapsed_ms = min(float(_run(code, tmp_path)) for _ in range(3))
+
+    assert elapsed_ms < IMPORT_BUDGET_MS
+
+
+def test_lifespan_creates_tables_without_seeding(tmp_path):
+    _run(START_APP, tmp_path)
+
+    assert _customers(tmp_path) == 0
+
+
+def test_workers_starting_together_set_up_the_schema_once(tmp_path):
+    environ = {
+        **os.environ,
+        "SHOP_DATABASE_URL": f"sqlite:///{tmp_path / 'shop.db'}",
+        "SHOP_INIT_DB": "1",
+        "SHOP_SEED_DATA": "0",
+    }
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-c", START_APP], cwd=ROOT, env=environ, stderr=subprocess.PIPE, text=True
+        )
+        for _ in range(4)
+    ]
+    for worker in workers:
+        _, stderr = worker.communicate(timeout=60)
+        assert worker.returncode == 0, stderr
+
+    with sqlite3.connect(tmp_path / "shop.db") as connection:
+        assert connection.execute("PRAGMA user_version").fetchone()[0] == LATEST_VERSION
+
+
+def test_lifespan_seeds_when_enabled(tmp_path):
+    _run(START_APP, tmp_path, SHOP_SEED_DATA="1")
+
+    assert _customers(tmp_path) == 3
+
+
+def test_lifespan_can_be_switched_off(tmp_path):
+    _run(START_APP, tmp_path, SHOP_INIT_DB="0")
+
+    assert not (tmp_path / "shop.db").exists()
+
+
+def test_manage_init_db_seed(tmp_path):
+    _run("from app.manage import main\nmain(['init-db', '--seed'])", tmp_path, SHOP_INIT_DB="0")
+
+    assert _customers(tmp_path) == 3
+
+
+def test_async_server_exits_after_shutdown(tmp_path):
+    port = _free_port()
+    environ = {
+        **os.environ,
+        "SHOP_DATABASE_URL": f"sqlite:///{tmp_path / 'shop.db'}",
+        "SHOP_DB_MODE": "async",
+        "SHOP_INIT_DB": "1",
+        "SHOP_SEED_DATA": "0",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=environ, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        _wait_until_serving(f"http://127.0.0.1:{port}/health", process)
+        # Opens a pooled aiosqlite connection
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/customers/", timeout=10) as response:
+            assert response.status == 200
+
+        process.send_signal(signal.SIGINT)
+        assert process.wait(timeout=20) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()